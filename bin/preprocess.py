@@ -48,8 +48,9 @@ def face_clustering(args):
             sys.stdout.flush()
 
         # load pre-computed distance matrix
+        # (memory-mapped when stored in a PAB file)
         path = clicommon.replaceURI(args.precomputed, uri)
-        matrix = LabelMatrixParser().read(path)
+        matrix = LabelMatrixParser().read(path, uri=uri)
 
         # load input annotation
         annotation = args.input(uri)
@@ -61,8 +62,8 @@ def face_clustering(args):
 
         # remove tracks for which no distance is available
         if args.no_distance:
-            labels, _ = matrix.labels
-            annotation = annotation(labels)
+            labels = matrix.get_rows()
+            annotation = annotation.subset(set(labels))
 
         if hasattr(args, 'uem'):
             uem = args.uem(uri)
@@ -73,8 +74,8 @@ def face_clustering(args):
 
         # save reduced similarity matrix
         if hasattr(args, 'dump'):
-            labels = annotation.labels()
-            matrix = matrix[set(labels), set(labels)]
+            labels = set(annotation.labels())
+            matrix = matrix.subset(rows=labels, columns=labels)
             with args.dump(uri) as f:
                 pickle.dump(matrix, f)
 
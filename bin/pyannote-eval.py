@@ -25,6 +25,7 @@ import numpy as np
 import scipy.stats
 import networkx as nx
 import pyannote
+import pyannote.profiling as profiling
 from pyannote.metric.diarization import DiarizationErrorRate, \
     DiarizationPurity, \
     DiarizationCoverage, \
@@ -75,6 +76,9 @@ def run(args):
     # (either from --uri(s) options or from input files)
     uris = pyannote.cli.get_uris()
 
+    if args.profile:
+        profiling.enable()
+
     pb = ProgressBar(widgets=[Bar(), ' ', ETA()], term_width=80)
     pb.maxval = len(uris)*len(args.hypothesis)
     pb.start()
@@ -85,7 +89,8 @@ def run(args):
         modality = None
 
     # process each URI, one after the other
-    for u, uri in enumerate(uris):
+    # (statistics of profiled operations are aggregated per URI)
+    for u, uri in enumerate(profiling.iteruris(uris)):
 
         # read reference for current URI
         ref = args.groundtruth(uri=uri, modality=modality)
@@ -161,6 +166,14 @@ def run(args):
     with args.dump() as f:
         M.to_csv(f, index_label=['hypothesis', 'uri'], header=True, index=True)
 
+    if args.profile:
+        with open(args.profile, 'w') as f:
+            profiling.to_json(f)
+        # summary of profiled operations over all URIs
+        summary = profiling.to_frame().groupby(level='name').sum()
+        summary = summary.sort_values('duration', ascending=False)
+        sys.stderr.write('%s\n' % summary.to_string())
+
 
 def view(args):
 
@@ -295,6 +308,12 @@ runparser.add_argument('--no-overlap', action='store_true', help=description)
 description = 'print value of error rate components.'
 runparser.add_argument('--components', action='store_true', help=description)
 
+description = ('profile core operations and save their number of calls, '
+               'duration and number of processed items (per URI) '
+               'to this JSON file.')
+runparser.add_argument('--profile', metavar='profile.json', default=None,
+                       help=description)
+
 description = 'choose evaluated modality in case reference contains several.'
 runparser.add_argument('--modality', metavar='MODALITY', type=str,
                        default=pyannote.cli.SUPPRESS, help=description)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Batch feature extraction
+
+Extract features of every resource into a feature cache (see
+pyannote.feature.cache), using a pool of worker processes. Features already
+in the cache are not extracted again: simply re-run the same command to
+resume an interrupted (or partially failed) extraction.
+
+Algorithms constructed with the same cache directory (e.g.
+SpeechActivityDetection(..., cache=DIRECTORY)) then read features from it.
+"""
+
+import sys
+import time
+import multiprocessing
+import pyannote.cli
+from pyannote.cli.uris import contains_uri, replace_uri
+from pyannote.feature.cache import FeatureCache, CACHED, EXTRACTED, FAILED
+from pyannote.algorithm.speech import SpeechActivityDetection, \
+    SpeechTurnSegmentation, SpeakerIdentification
+
+# default feature extractors of speech processing algorithms
+ALGORITHMS = {
+    'sad': SpeechActivityDetection,
+    'segmentation': SpeechTurnSegmentation,
+    'identification': SpeakerIdentification,
+}
+
+argparser = pyannote.cli.initParser('Batch feature extraction', uem=False)
+
+description = 'extract default features of this algorithm.'
+argparser.add_argument('algorithm', choices=sorted(ALGORITHMS),
+                       help=description)
+
+description = 'path to audio files.' + pyannote.cli.URI_SUPPORT
+argparser.add_argument('wav', metavar='file.wav', help=description)
+
+description = ('path to feature cache directory. defaults to $PYANNOTE_CACHE '
+               'or ~/.pyannote/cache/feature.')
+argparser.add_argument('--cache', metavar='DIRECTORY', default=None,
+                       help=description)
+
+description = 'number of worker processes. defaults to number of CPUs.'
+argparser.add_argument('--jobs', metavar='N', type=int,
+                       default=multiprocessing.cpu_count(), help=description)
+
+description = 'where to store list of resources for which extraction failed.'
+argparser.add_argument('--failed', metavar='failed.lst', default=None,
+                       help=description)
+
+# Actual argument parsing
+try:
+    args = argparser.parse_args()
+except IOError as e:
+    sys.stderr.write('%s' % e)
+    sys.exit(-1)
+
+if not contains_uri(args.wav):
+    sys.stderr.write('ERROR: missing URI placeholder in audio path.\n')
+    sys.exit(-1)
+
+# Obtain final list of URIs to process (from --uri(s) options)
+uris = pyannote.cli.get_uris()
+if not uris:
+    sys.stderr.write('ERROR: use --uri or --uris to select resources.\n')
+    sys.exit(-1)
+
+extractor = ALGORITHMS[args.algorithm].default_feature()
+cache = FeatureCache(directory=args.cache)
+
+wavs = {replace_uri(args.wav, uri): uri for uri in uris}
+
+counts = {CACHED: 0, EXTRACTED: 0, FAILED: 0}
+failed = []
+start = time.time()
+
+for n, (wav, status, error) in enumerate(
+    cache.extract_many(extractor, sorted(wavs), n_jobs=args.jobs)
+):
+
+    counts[status] += 1
+    uri = wavs[wav]
+
+    if status == FAILED:
+        failed.append(uri)
+        sys.stderr.write('ERROR: %s\n%s' % (uri, error))
+
+    # progress report
+    if args.verbose or status == FAILED:
+        elapsed = time.time() - start
+        eta = elapsed * (len(wavs) - n - 1) / (n + 1)
+        sys.stdout.write('[%d/%d] %s (%s) -- ETA %ds\n' % (
+            n + 1, len(wavs), uri, status, eta))
+        sys.stdout.flush()
+
+sys.stdout.write('%d extracted, %d already cached, %d failed.\n' % (
+    counts[EXTRACTED], counts[CACHED], counts[FAILED]))
+
+if args.failed is not None:
+    with open(args.failed, 'w') as f:
+        for uri in failed:
+            f.write('%s\n' % uri)
+
+sys.exit(1 if failed else 0)
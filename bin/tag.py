@@ -55,6 +55,11 @@ mgroup.add_argument('--one-to-one', action='store_true',
 mgroup.add_argument('--one-to-many', action='store_true',
                     help='perform one name-to-many input labels mapping')
 
+argparser.add_argument('--cross-file', action='store_true',
+                       help='perform one global mapping for all files '
+                            '(input labels are shared across files and '
+                            'therefore not anonymized)')
+
 
 # Actual argument parsing
 args = argparser.parse_args()
@@ -72,11 +77,19 @@ if hasattr(args, 'uris'):
 else:
     uris = args.input.uris
 
+# (names, input) pair for each URI
+pairs = []
+
 # process each URI, one after the other
 for u, uri in enumerate(uris):
 
     # read input for current URI
-    original = args.input(uri).anonymize()
+    original = args.input(uri)
+
+    # labels are kept when mapping is cross-file
+    # (for them to be matched across files)
+    if not args.cross_file:
+        original = original.anonymize_labels()
 
     # read names for current URI
     names = args.names(uri)
@@ -86,8 +99,10 @@ for u, uri in enumerate(uris):
         uem = args.uem(uri)
         names = names.crop(uem, mode='intersection')
 
-    tagged = tagger(names, original)
+    pairs.append((names, original))
 
+# tag all URIs at once
+for tagged in tagger.batch(pairs, cross_file=args.cross_file):
     MDTMParser().write(tagged, f=args.output)
 
 args.output.close()
@@ -22,10 +22,64 @@ import itertools
 import numpy as np
 from pyannote.base.annotation import Unknown
 from pyannote.stats.llr import LLRLinearRegression, LLRIsotonicRegression
-from pyannote.stats.llr import logsumexp
+from pyannote.stats.posterior import posterior
+from pyannote.algorithm.util.calibration import CalibrationMixin
 
 
-class AuthenticationCalibration(object):
+# Helper functions for authentication calibration
+def get_authentication_data(annotation, scores, targets):
+    """Get (score, groundtruth) pairs for all tracks of one file
+
+    Rows of `scores` are aligned with `annotation` tracks in one pass.
+    Tracks with no score are skipped.
+
+    Parameters
+    ----------
+    annotation : Annotation
+        Groundtruth annotation
+    scores : Scores
+        Identification scores
+    targets : list
+        Ordered list of targets
+
+    Returns
+    -------
+    X : (n_found_tracks x n_targets, ) numpy array
+        Track vs. target scores (track-major order)
+    Y : (n_found_tracks x n_targets, ) numpy array
+        Track vs. target groundtruth: 1. if track label is the target,
+        0. otherwise, NaN if track label is Unknown.
+    """
+
+    tracks, labels = [], []
+    for segment, track, label in annotation.itertracks(label=True):
+        tracks.append((segment, track))
+        labels.append(label)
+
+    found, X = scores.align(tracks, labels=targets)
+
+    # index of each track label in targets (-1 for non-targets)
+    index = {target: j for j, target in enumerate(targets)}
+    labels = [label for label, f in itertools.izip(labels, found) if f]
+    J = np.array([index.get(label, -1) for label in labels], dtype=int)
+    unknown = np.array([isinstance(label, Unknown) for label in labels],
+                       dtype=bool)
+
+    Y = np.zeros(X.shape, dtype=np.float)
+    I, = np.where(J > -1)
+    Y[I, J[I]] = 1.
+    Y[unknown, :] = np.nan
+
+    return X.ravel(), Y.ravel()
+
+
+def iter_authentication_data(annotations, scores, targets):
+    """Stream per-file (X, Y) chunks (see `get_authentication_data`)"""
+    for a, s in itertools.izip(annotations, scores):
+        yield get_authentication_data(a, s, targets)
+
+
+class AuthenticationCalibration(CalibrationMixin):
     """
 
     Parameters
@@ -41,14 +95,14 @@ class AuthenticationCalibration(object):
     @classmethod
     def from_file(cls, path):
         import pickle
-        with open(path, mode='r') as f:
+        with open(path, mode='rb') as f:
             calibration = pickle.load(f)
         return calibration
 
     def to_file(self, path):
         import pickle
-        with open(path, mode='w') as f:
-            pickle.dump(self, f)
+        with open(path, mode='wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
 
     def __init__(
         self,
@@ -108,36 +162,24 @@ class AuthenticationCalibration(object):
 
     def _fit_llr(self, annotations, scores):
 
-        X = []
-        Y = []
-
-        self.targets = None
-
-        for a, s in itertools.izip(annotations, scores):
-
-            # assumes that all scores s share the same set of labels
-            if self.targets is None:
-                self.targets = s.labels()
-
-            for segment, track, label in a.itertracks(label=True):
-
-                if not s.has_track(segment, track):
-                    continue
-
-                for target in self.targets:
-
-                    x = s[segment, track, target]
-
-                    if isinstance(label, Unknown):
-                        y = np.nan
-                    else:
-                        y = np.float(label == target)
-
-                    X.append(x)
-                    Y.append(y)
-
-        self._X = np.array(X)
-        self._Y = np.array(Y)
+        # assumes that all scores s share the same set of labels
+        scores = iter(scores)
+        try:
+            first = next(scores)
+        except StopIteration:
+            raise ValueError('at least one Scores is needed for training.')
+        self.targets = first.labels()
+        scores = itertools.chain([first], scores)
+
+        # gather (X, Y) file by file and concatenate them only once
+        X, Y = [], []
+        for x, y in iter_authentication_data(annotations, scores,
+                                             self.targets):
+            X.append(x)
+            Y.append(y)
+
+        self._X = np.concatenate(X)
+        self._Y = np.concatenate(Y)
 
         self.llr.fit(self._X, self._Y)
 
@@ -160,22 +202,19 @@ class AuthenticationCalibration(object):
 
         return self
 
-    def _llr2posterior(self, llr, priors, unknown_prior):
+    def _llr2posterior(self, llr, priors, unknown_prior, out=None):
         """Convert log-likelihood ratios to posterior probabilities
 
         Parameters
         ----------
-        llr :
+        llr : (n_tracks, n_targets) numpy array
+        priors : (n_targets, ) numpy array
+        unknown_prior : float
+        out : numpy array, optional
+            Use out=llr for in-place conversion.
 
         """
-        denominator = (
-            unknown_prior +
-            np.exp(logsumexp(llr, b=priors, axis=1))
-        )
-
-        posteriors = ((priors * np.exp(llr)).T / denominator).T
-
-        return posteriors
+        return posterior(llr, priors, unknown_prior=unknown_prior, out=out)
 
     def apply(self, scores):
         """
@@ -216,5 +255,7 @@ class AuthenticationCalibration(object):
                 priors = priors + self.priors.get(Unknown, 0.)/n_targets
 
         # compute posterior from LLR directly on the internal numpy array
-        func = lambda x: self._llr2posterior(x, priors, unknown_prior)
+        # (in place, as `apply` passes a copy of the scores to `func`)
+        func = lambda x: self._llr2posterior(
+            x, priors, unknown_prior, out=x)
         return llr.apply(func)
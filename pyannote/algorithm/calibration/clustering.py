@@ -23,6 +23,7 @@ import numpy as np
 from pyannote.base.matrix import LabelMatrix
 from pyannote.base.annotation import Unknown
 from pyannote.stats.llr import LLRLinearRegression, LLRIsotonicRegression
+from pyannote.algorithm.util.calibration import CalibrationMixin
 
 
 # Helper function for speaker diarization (i.e. speech turns clustering)
@@ -46,7 +47,7 @@ def get_groundtruth_from_annotation(annotation):
     return G
 
 
-class ClusteringCalibration(object):
+class ClusteringCalibration(CalibrationMixin):
     """
 
     Parameters
@@ -60,14 +61,14 @@ class ClusteringCalibration(object):
     @classmethod
     def from_file(cls, path):
         import pickle
-        with open(path, mode='r') as f:
+        with open(path, mode='rb') as f:
             calibration = pickle.load(f)
         return calibration
 
     def to_file(self, path):
         import pickle
-        with open(path, mode='w') as f:
-            pickle.dump(self, f)
+        with open(path, mode='wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
 
     def __init__(self, method='linear', equal_priors=False):
 
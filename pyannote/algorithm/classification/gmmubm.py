@@ -25,7 +25,7 @@ import numpy as np
 import sklearn
 
 from pyannote import Timeline, Annotation, Scores, Unknown
-from pyannote.stats.llr import logsumexp
+from pyannote.stats.posterior import posterior
 from pyannote.stats.lbg import LBG
 
 
@@ -409,13 +409,8 @@ class ClassificationGMMUBM(object):
 
         return scores
 
-    def _llr2posterior(self, llr, priors, unknown_prior):
-        denominator = (
-            unknown_prior +
-            np.exp(logsumexp(llr, b=priors, axis=1))
-        )
-        posteriors = ((priors * np.exp(llr)).T / denominator).T
-        return posteriors
+    def _llr2posterior(self, llr, priors, unknown_prior, out=None):
+        return posterior(llr, priors, unknown_prior=unknown_prior, out=out)
 
     def predict_proba(self, segmentation, features):
         """Compute posterior probabilities
@@ -462,7 +457,9 @@ class ClassificationGMMUBM(object):
                 priors = priors + self.priors.get(Unknown, 0.)/n_targets
 
         # compute posterior from LLR directly on the internal numpy array
-        func = lambda llr: self._llr2posterior(llr, priors, unknown_prior)
+        # (llr is a copy so it can safely be overwritten)
+        func = lambda llr: self._llr2posterior(
+            llr, priors, unknown_prior, out=llr)
         return scores.apply(func)
 
     def predict(self, segmentation, features):
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+from pyannote.base.timeline import Timeline
+
+
+class HACClusters(object):
+
+    """Clustering status of hierarchical agglomerative clustering
+
+    Keeps track of cluster merges with a union-find (disjoint-set) structure
+    over the labels of the initial annotation, so that merging two clusters
+    is a (nearly) constant-time rename instead of a full annotation copy.
+
+    It is given to models and stopping criteria (`status` keyword argument)
+    and answers the label-based queries they usually rely on (`labels`,
+    `get_members`, `label_timeline`, `label_coverage`). Indices of the
+    feature frames of each cluster are cached, and merged along with
+    clusters (`get_indices`). Use `to_annotation` to get the actual
+    annotation.
+
+    Parameters
+    ----------
+    annotation : Annotation
+        Initial annotation (one cluster per label). It is never modified.
+    """
+
+    def __init__(self, annotation):
+        super(HACClusters, self).__init__()
+
+        self.annotation = annotation
+
+        labels = annotation.labels()
+
+        # union-find forest over initial labels
+        self._parent = {label: label for label in labels}
+        self._rank = {label: 0 for label in labels}
+
+        # current clusters: cluster <--> root label
+        self._root = {label: label for label in labels}
+        self._cluster = {label: label for label in labels}
+
+        # initial labels of each cluster (indexed by root label)
+        self._members = {label: [label] for label in labels}
+
+        # cached timeline of merged clusters
+        self._timelines = {}
+
+        # cached frame indices (indexed by root label) for `_feature`
+        self._feature = None
+        self._indices = {}
+
+    def _get_uri(self):
+        return self.annotation.uri
+    uri = property(fget=_get_uri, doc="Resource identifier")
+
+    def _get_modality(self):
+        return self.annotation.modality
+    modality = property(fget=_get_modality, doc="Modality")
+
+    def _find(self, label):
+        """Root label of the tree containing initial `label`"""
+        parent = self._parent
+        while parent[label] != label:
+            # path halving
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    def __len__(self):
+        """Number of clusters"""
+        return len(self._root)
+
+    def __contains__(self, cluster):
+        return cluster in self._root
+
+    def labels(self):
+        """Sorted list of current clusters (same order as Annotation.labels)
+        """
+        return sorted(self._root, key=str)
+
+    def get_cluster(self, label):
+        """Current cluster of initial `label`"""
+        return self._cluster[self._find(label)]
+
+    def get_members(self, cluster):
+        """List of initial labels merged into `cluster`"""
+        return list(self._members[self._root[cluster]])
+
+    def merge(self, clusters, new_cluster):
+        """Merge clusters
+
+        Parameters
+        ----------
+        clusters : iterable
+            Clusters to merge
+        new_cluster : hashable
+            Name of resulting cluster. When it is the name of another
+            existing cluster, this cluster is merged as well (this is what
+            `annotation % {cluster: new_cluster}` would do).
+        """
+
+        clusters = set(clusters)
+        if new_cluster in self._root:
+            clusters.add(new_cluster)
+
+        roots = [self._root.pop(cluster) for cluster in clusters]
+        for cluster in clusters:
+            self._timelines.pop(cluster, None)
+
+        # merge frame indices (only when they are known for all clusters)
+        indices = [self._indices.pop(root, None) for root in roots]
+        if len(roots) > 1 and all(i is not None for i in indices):
+            indices = reduce(np.union1d, indices)
+        else:
+            indices = indices[0] if len(roots) == 1 else None
+
+        root = roots[0]
+        for other in roots[1:]:
+
+            # union by rank
+            if self._rank[root] < self._rank[other]:
+                root, other = other, root
+            self._parent[other] = root
+            if self._rank[root] == self._rank[other]:
+                self._rank[root] += 1
+
+            # extend longest list of members with shortest one
+            members, other_members = \
+                self._members[root], self._members.pop(other)
+            if len(members) < len(other_members):
+                members, other_members = other_members, members
+            members.extend(other_members)
+            self._members[root] = members
+
+            del self._cluster[other]
+
+        self._root[new_cluster] = root
+        self._cluster[root] = new_cluster
+        if indices is not None:
+            self._indices[root] = indices
+
+    def label_timeline(self, cluster):
+        """Timeline made of all segments of `cluster`"""
+
+        if cluster not in self._root:
+            return Timeline(uri=self.uri)
+
+        members = self._members[self._root[cluster]]
+        if len(members) == 1:
+            return self.annotation.label_timeline(members[0])
+
+        if cluster not in self._timelines:
+            segments = [segment for label in members
+                        for segment in self.annotation.label_timeline(label)]
+            self._timelines[cluster] = Timeline(segments=segments,
+                                                uri=self.uri)
+        return self._timelines[cluster]
+
+    def get_indices(self, cluster, feature):
+        """Indices of the frames of `cluster`
+
+        Parameters
+        ----------
+        cluster : hashable
+        feature : SlidingWindowFeature
+
+        Returns
+        -------
+        indices : numpy array
+            Sorted indices of the frames of `feature` covered by `cluster`
+            (i.e. `feature.data[indices]` are the frames of `cluster`).
+            They are computed once per initial label, and merged (not
+            computed again) when clusters are merged.
+        """
+
+        # indices are cached for one feature only
+        if feature is not self._feature:
+            self._feature = feature
+            self._indices = {}
+
+        root = self._root[cluster]
+        if root not in self._indices:
+            n = feature.getNumber()
+            ranges = [np.empty((0, ), dtype=np.int64)]
+            for label in self._members[root]:
+                timeline = self.annotation.label_timeline(label)
+                for segment in timeline.coverage():
+                    first, number = feature.sliding_window.segmentToRange(
+                        segment)
+                    ranges.append(np.arange(min(n, max(0, first)),
+                                            min(n, max(0, first + number))))
+            self._indices[root] = np.unique(np.hstack(ranges))
+
+        return self._indices[root]
+
+    def label_coverage(self, cluster):
+        """Coverage of `cluster`"""
+        return self.label_timeline(cluster).coverage()
+
+    def to_annotation(self):
+        """Annotation at current iteration
+
+        Returns
+        -------
+        annotation : Annotation
+            Initial annotation where each label is replaced by its cluster.
+        """
+        translation = {}
+        for label in self._parent:
+            cluster = self.get_cluster(label)
+            if cluster != label:
+                translation[label] = cluster
+
+        if not translation:
+            return self.annotation.copy()
+
+        return self.annotation % translation
@@ -25,6 +25,7 @@ from model import HACModel
 from stop import HACStop
 from constraint import HACConstraint
 from history import HACHistory
+from clusters import HACClusters
 
 
 class HierarchicalAgglomerativeClustering(object):
@@ -40,6 +41,15 @@ class HierarchicalAgglomerativeClustering(object):
         Constraint (not yet implemented)
     debug : bool, optional
 
+    Notes
+    -----
+    During iterations, models and stopping criterion are given the current
+    clustering status as a `HACClusters` instance (`status` keyword
+    argument), where merging clusters is a cheap label rename.
+    The actual annotation (`annotation` attribute) is only built on demand:
+    by `iterate` consumers, in `finalize`, or for models and stopping
+    criteria whose `needs_annotation` attribute is True.
+
     """
 
     def __init__(self, model, stop=None, constraint=None, debug=False):
@@ -57,6 +67,24 @@ class HierarchicalAgglomerativeClustering(object):
 
         self.debug = debug
 
+    def _get_annotation(self):
+        if self._annotation is None:
+            self._annotation = self.clusters.to_annotation()
+        return self._annotation
+
+    def _set_annotation(self, annotation):
+        self._annotation = annotation
+
+    annotation = property(fget=_get_annotation, fset=_set_annotation,
+                          doc="Annotation at current iteration")
+
+    def _get_kwargs(self, hook, **kwargs):
+        """Keyword arguments of `hook` (HACModel or HACStop) methods"""
+        kwargs['status'] = self.clusters
+        kwargs['annotation'] = self.annotation \
+            if hook.needs_annotation else None
+        return kwargs
+
     def initialize(self, annotation, feature=None):
 
         """Initialize HAC with one cluster per label
@@ -71,22 +99,25 @@ class HierarchicalAgglomerativeClustering(object):
         # initialize annotation
         self.annotation = annotation.copy()
 
+        # initialize clustering status (one cluster per label)
+        self.clusters = HACClusters(self.annotation)
+
         # initialize history with original annotation
         self.history = HACHistory(self.annotation)
 
         # one cluster per label
-        clusters = self.annotation.labels()
+        clusters = self.clusters.labels()
 
         # one model per cluster
         self.models = self.hacModel.get_models(
-            clusters,
-            annotation=self.annotation, feature=feature
+            clusters, annotation=self.annotation, status=self.clusters,
+            feature=feature
         )
 
         # cluster similarity matrix
         self.matrix = self.hacModel.get_similarity_matrix(
-            clusters, models=self.models,
-            annotation=self.annotation, feature=feature)
+            clusters, models=self.models, annotation=self.annotation,
+            status=self.clusters, feature=feature)
 
         # make sure diagonals are set to -np.inf
         # -np.inf means "do not merge"
@@ -100,10 +131,23 @@ class HierarchicalAgglomerativeClustering(object):
 
         # initialize stopping criterion
         self.hacStop.initialize(
-            annotation=self.annotation, models=self.models,
-            matrix=self.matrix, history=self.history, feature=feature)
+            annotation=self.annotation, status=self.clusters,
+            models=self.models, matrix=self.matrix, history=self.history,
+            feature=feature)
 
     def iterate(self, feature=None):
+        """Iterate until stopping criterion is reached
+
+        Generates
+        ---------
+        annotation : Annotation
+            Annotation after each iteration
+        """
+
+        for _ in self._iterate(feature=feature):
+            yield self.annotation
+
+    def _iterate(self, feature=None):
 
         while True:
 
@@ -152,16 +196,18 @@ class HierarchicalAgglomerativeClustering(object):
 
             # (cluster1+cluster2 ==> cluster1)
             self.models[cluster1] = self.hacModel.merge_models(
-                [cluster1, cluster2], annotation=self.annotation,
-                feature=feature, models=self.models,
-                matrix=self.matrix, history=self.history
+                [cluster1, cluster2], **self._get_kwargs(
+                    self.hacModel, feature=feature, models=self.models,
+                    matrix=self.matrix, history=self.history)
             )
 
             # remove (now meaningless) cluster2's model
             del self.models[cluster2]
 
-            # == update annotation (rename cluster2 into cluster1)
-            self.annotation = self.annotation % {cluster2: cluster1}
+            # == update clusters (rename cluster2 into cluster1)
+            # annotation will be updated on demand
+            self.clusters.merge([cluster1, cluster2], cluster1)
+            self._annotation = None
 
             # == update history (keep track of this iteration)
             self.history.add_iteration(
@@ -174,59 +220,52 @@ class HierarchicalAgglomerativeClustering(object):
             self.matrix.remove_column(cluster2)
 
             # update cluster1's row and column
-            for cluster in self.models:
-
-                if cluster == cluster1:
-                    continue
-
-                # update matrix[cluster1, cluster]
-                s = self.hacModel.get_similarity(
-                    cluster1, cluster, annotation=self.annotation,
-                    models=self.models, matrix=self.matrix,
-                    history=self.history, feature=feature
-                )
-                self.matrix[cluster1, cluster] = s
-
-                # update matrix[cluster, cluster1]
-                if not self.hacModel.is_symmetric():
-                    s = self.hacModel.get_similarity(
-                        cluster, cluster1, annotation=self.annotation,
-                        models=self.models, matrix=self.matrix,
-                        history=self.history, feature=feature
-                    )
-                self.matrix[cluster, cluster1] = s
+            clusters = [c for c in self.models if c != cluster1]
+
+            # update matrix[cluster1, cluster] for all clusters at once
+            kwargs = self._get_kwargs(
+                self.hacModel, models=self.models, matrix=self.matrix,
+                history=self.history, feature=feature)
+            s = self.hacModel.get_similarities(cluster1, clusters, **kwargs)
+
+            # update matrix[cluster, cluster1] for all clusters at once
+            if not self.hacModel.is_symmetric():
+                s_ = self.hacModel.get_similarities(
+                    cluster1, clusters, reverse=True, **kwargs)
+            else:
+                s_ = s
+
+            if clusters:
+                self.matrix.df.loc[cluster1, clusters] = s
+                self.matrix.df.loc[clusters, cluster1] = s_
 
             # TODO:
             # == update constraints
 
             #  == update stopping criterion
             # (most of the time, this does nothing)
-            self.hacStop.update(
-                [cluster1, cluster2], cluster1,
-                history=self.history, annotation=self.annotation,
-                models=self.models, matrix=self.matrix, feature=feature
-            )
+            kwargs = self._get_kwargs(
+                self.hacStop, history=self.history, models=self.models,
+                matrix=self.matrix, feature=feature)
+            self.hacStop.update([cluster1, cluster2], cluster1, **kwargs)
 
             # check if stopping criterion is reached
             # and, if so, stop agglomerating...
-            if self.hacStop.reached(
-                history=self.history,
-                annotation=self.annotation, models=self.models,
-                matrix=self.matrix, feature=feature
-            ):
+            if self.hacStop.reached(**kwargs):
                 if self.debug:
                     msg = "DEBUG > Reached stopping criterion.\n"
                     sys.stderr.write(msg)
 
                 break
 
-            yield self.annotation
+            yield
 
     def finalize(self, feature=None):
 
         self.annotation = self.hacStop.finalize(
             history=self.history, annotation=self.annotation,
-            models=self.models, matrix=self.matrix, feature=feature
+            status=self.clusters, models=self.models, matrix=self.matrix,
+            feature=feature
         )
         return self.annotation
 
@@ -243,7 +282,7 @@ class HierarchicalAgglomerativeClustering(object):
 
         self.initialize(annotation, feature=feature)
 
-        for _ in self.iterate(feature=feature):
+        for _ in self._iterate(feature=feature):
             pass
 
         return self.finalize(feature=feature)
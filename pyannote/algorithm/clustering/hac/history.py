@@ -20,6 +20,8 @@
 
 
 from collections import namedtuple
+import numpy as np
+from clusters import HACClusters
 
 
 class HACIteration(
@@ -48,6 +50,12 @@ class HACHistory(object):
 
     """History of hierarchical agglomerative clustering
 
+    Along with the list of iterations, the history maintains a dendrogram
+    in SciPy linkage matrix format (see `get_linkage`), so that clustering
+    can be cut after any number of iterations (or at any similarity
+    threshold) without re-running it. Use `to_file` and `from_file` to
+    store it and re-cut it later.
+
     Parameters
     ----------
     annotation : Annotation
@@ -59,10 +67,21 @@ class HACHistory(object):
     def __init__(self, annotation, iterations=None):
         super(HACHistory, self).__init__()
         self.annotation = annotation.copy()
-        if iterations is None:
-            self.iterations = []
-        else:
-            self.iterations = iterations
+
+        # dendrogram: one leaf per initial label, one node per binary merge
+        self._leaves = self.annotation.labels()
+        self._node = {label: i for i, label in enumerate(self._leaves)}
+        self._count = [1] * len(self._leaves)
+        self._linkage = []
+
+        # clustering status after `_n` iterations (for incremental cuts)
+        self._clusters = None
+        self._n = 0
+
+        self.iterations = []
+        if iterations is not None:
+            for iteration in iterations:
+                self.add_iteration(*iteration)
 
     def __len__(self):
         return len(self.iterations)
@@ -87,6 +106,86 @@ class HACHistory(object):
         )
         self.iterations.append(iteration)
 
+        # == update dendrogram
+
+        # merging into the name of another cluster merges it as well
+        # (see HACClusters.merge)
+        clusters = list(merged_clusters)
+        if new_cluster in self._node and new_cluster not in clusters:
+            clusters.append(new_cluster)
+
+        nodes = [self._node.pop(cluster) for cluster in clusters]
+        node = nodes[0]
+        for other in nodes[1:]:
+            count = self._count[node] + self._count[other]
+            self._linkage.append([node, other, similarity, count])
+            self._count.append(count)
+            node = len(self._count) - 1
+        self._node[new_cluster] = node
+
+    def get_linkage(self):
+        """Dendrogram in SciPy linkage matrix format
+
+        Returns
+        -------
+        leaves : list
+            Initial labels. Leaf i of the dendrogram is `leaves[i]`.
+        linkage : (n_merges, 4) numpy array
+            Row i describes the merge of nodes linkage[i, 0] and
+            linkage[i, 1] into node len(leaves) + i, containing
+            linkage[i, 3] initial labels. linkage[i, 2] is a non-negative
+            distance, computed as the difference between the largest merge
+            similarity and the similarity of row i, made monotone with a
+            running maximum (non-monotone similarities such as BIC would
+            otherwise lead to inversions). Raw similarities are available
+            in `iterations`. Iterations merging more than two clusters lead
+            to several rows.
+
+        Example
+        -------
+        >>> from scipy.cluster.hierarchy import fcluster
+        >>> leaves, linkage = history.get_linkage()
+        >>> clusters = fcluster(linkage, 3, criterion='maxclust')
+
+        """
+        linkage = np.array(self._linkage, dtype=np.float64).reshape((-1, 4))
+        if len(linkage):
+            similarity = linkage[:, 2]
+            linkage[:, 2] = np.maximum.accumulate(
+                np.max(similarity) - similarity)
+        return list(self._leaves), linkage
+
+    def get_n_iterations(self, threshold):
+        """Number of iterations before similarity goes below `threshold`
+
+        This is the number of iterations a similarity threshold stopping
+        criterion would have kept.
+        """
+        similarity = np.array([i.similarity for i in self.iterations],
+                              dtype=np.float64)
+        below = np.flatnonzero(similarity < threshold)
+        return below[0] if len(below) else len(similarity)
+
+    def _get_clusters(self, n):
+        """Clustering status (HACClusters) after `n` iterations"""
+
+        # restart from scratch only when going back in time
+        if self._clusters is None or n < self._n:
+            self._clusters = HACClusters(self.annotation)
+            self._n = 0
+
+        for iteration in self.iterations[self._n:n]:
+            self._clusters.merge(iteration.merged_clusters,
+                                 iteration.new_cluster)
+        self._n = n
+
+        return self._clusters
+
+    def get_translation(self, n):
+        """Get {initial label: cluster} mapping after `n` iterations"""
+        clusters = self._get_clusters(n)
+        return {label: clusters.get_cluster(label) for label in self._leaves}
+
     def __getitem__(self, n):
         """Get clustering status after `n` iterations
 
@@ -101,10 +200,44 @@ class HACHistory(object):
             Clustering status after `n` iterations
 
         """
-        annotation = self.annotation.copy()
-        for i in xrange(n):
-            iteration = self.iterations[i]
-            translation = {c: iteration.new_cluster
-                           for c in iteration.merged_clusters}
-            annotation = annotation % translation
-        return annotation
+        # replay merges and translate annotation only once
+        # (successive calls with increasing `n` only replay new merges)
+        return self._get_clusters(n).to_annotation()
+
+    def cut(self, threshold):
+        """Get clustering status at similarity `threshold`
+
+        Parameters
+        ----------
+        threshold : float
+            Stop merging as soon as similarity goes below this threshold.
+
+        Returns
+        -------
+        annotation : Annotation
+            Clustering status after `get_n_iterations(threshold)` iterations
+
+        """
+        return self[self.get_n_iterations(threshold)]
+
+    def __getstate__(self):
+        # clustering status cache is not serialized
+        return dict((key, value) for key, value in self.__dict__.iteritems()
+                    if key not in ('_clusters', '_n'))
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._clusters = None
+        self._n = 0
+
+    @classmethod
+    def from_file(cls, path):
+        import pickle
+        with open(path, mode='rb') as f:
+            history = pickle.load(f)
+        return history
+
+    def to_file(self, path):
+        import pickle
+        with open(path, mode='wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
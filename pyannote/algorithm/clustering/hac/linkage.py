@@ -18,6 +18,14 @@
 #     You should have received a copy of the GNU General Public License
 #     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
 
+"""Linkage-based hierarchical agglomerative clustering
+
+Clusters are compared based on a precomputed label similarity matrix
+(`feature`). Cluster similarities are stored in a NumPy array initialized
+by `get_similarity_array` and, after each merge, only the row and column of
+the merged cluster are updated with the Lance-Williams recurrence.
+"""
+
 from hac import HierarchicalAgglomerativeClustering
 from model import HACModel
 from stop import HACStop
@@ -26,12 +34,15 @@ import numpy as np
 
 class SimilarityThresholdStop(HACStop):
 
-    def __init__(self):
-        super(SimilarityThresholdStop, self).__init__()
+    needs_annotation = False
 
-    def initialize(self, threshold=0, **kwargs):
+    def __init__(self, threshold=0):
+        super(SimilarityThresholdStop, self).__init__()
         self.threshold = threshold
 
+    def initialize(self, **kwargs):
+        pass
+
     def update(self, merged_clusters, new_cluster, **kwargs):
         pass
 
@@ -45,14 +56,83 @@ class SimilarityThresholdStop(HACStop):
 
 
 class HACLinkageModel(HACModel):
+    """Base class for linkage models
+
+    A cluster model is the tuple of labels it contains.
+
+    Inheriting classes must implement `_linkage` (cluster similarity
+    from the block of label similarities) and/or `_lance_williams`
+    (similarity update after a merge).
+    """
+
+    needs_annotation = False
 
     def __init__(self):
         super(HACLinkageModel, self).__init__()
+        self._reset()
+
+    def _reset(self, feature=None, models=None, similarity=None):
+        # precomputed label similarity matrix
+        self._feature = feature
+        # cluster similarity array
+        self._similarity = similarity
+        # {model: index in cluster similarity array} dictionary
+        if models is None:
+            models = []
+        self._index = {model: i for i, model in enumerate(models)}
+        # number of labels in each cluster
+        self._size = np.array([len(model) for model in models],
+                              dtype=np.float64)
+
+    def _get_indices(self, models, feature):
+        """Index of `models` in cluster similarity array (or None)"""
+        if feature is None or feature is not self._feature:
+            return None
+        try:
+            return [self._index[model] for model in models]
+        except KeyError:
+            return None
+
+    def _linkage(self, similarity):
+        """Cluster similarity from label similarity block
+
+        Parameters
+        ----------
+        similarity : numpy array
+            Similarity between labels of first cluster (rows) and labels of
+            second cluster (columns).
+        """
+        if similarity.shape == (1, 1):
+            return similarity[0, 0]
+        raise NotImplementedError(
+            'Cluster similarity is only available during clustering.')
+
+    def _lance_williams(self, s_i, s_j, s_ij, n_i, n_j, n_k):
+        """Lance-Williams recurrence
+
+        Parameters
+        ----------
+        s_i, s_j : numpy arrays
+            Similarity of all clusters k with clusters i and j
+        s_ij : float
+            Similarity between clusters i and j
+        n_i, n_j : float
+            Size of clusters i and j
+        n_k : numpy array
+            Size of all clusters k
+
+        Returns
+        -------
+        s : numpy array
+            Similarity of all clusters k with merged cluster (i + j)
+        """
+        raise NotImplementedError(
+            "Method '_lance_williams' must be overriden.")
 
     def get_model(self, cluster, **kwargs):
         return tuple([cluster])
 
-    def merge_models(self, clusters, models=None, **kwargs):
+    def merge_models(self, clusters, models=None, feature=None, **kwargs):
         if models is None:
             raise ValueError('')
 
@@ -60,13 +140,31 @@ class HACLinkageModel(HACModel):
         for cluster in clusters:
             other_model = models[cluster]
             new_model.extend(other_model)
-        return tuple(new_model)
+        new_model = tuple(new_model)
 
-    def is_symmetric(self):
-        return False
+        # update cluster similarity array (if any)
+        merged = [models[cluster] for cluster in clusters]
+        indices = self._get_indices(merged, feature)
+        if indices is not None:
 
+            S = self._similarity
+            n = self._size
 
-class CompleteLinkageModel(HACLinkageModel):
+            i = indices[0]
+            for j in indices[1:]:
+                row = self._lance_williams(
+                    S[i, :], S[j, :], S[i, j], n[i], n[j], n)
+                col = self._lance_williams(
+                    S[:, i], S[:, j], S[j, i], n[i], n[j], n)
+                S[i, :] = row
+                S[:, i] = col
+                n[i] = n[i] + n[j]
+
+            for model in merged:
+                del self._index[model]
+            self._index[new_model] = i
+
+        return new_model
 
     def get_similarity(
         self, cluster1, cluster2, models=None, feature=None, **kwargs
@@ -80,53 +178,116 @@ class CompleteLinkageModel(HACLinkageModel):
 
         model1 = models[cluster1]
         model2 = models[cluster2]
-        return np.min(
-            feature.subset(
-                rows=set(model1), columns=set(model2)
-            ).df.values
-        )
 
+        indices = self._get_indices([model1, model2], feature)
+        if indices is not None:
+            i, j = indices
+            return self._similarity[i, j]
 
-class AverageLinkageModel(HACLinkageModel):
+        return self._linkage(
+            feature.df.loc[list(model1), list(model2)].values)
 
-    def get_similarity(
-        self, cluster1, cluster2, models=None, feature=None, **kwargs
+    def get_similarities(
+        self, cluster, clusters, reverse=False,
+        models=None, feature=None, **kwargs
     ):
 
         if models is None:
             raise ValueError('')
 
+        indices = self._get_indices(
+            [models[cluster]] + [models[c] for c in clusters], feature)
+        if indices is None:
+            return super(HACLinkageModel, self).get_similarities(
+                cluster, clusters, reverse=reverse,
+                models=models, feature=feature, **kwargs)
+
+        i, others = indices[0], indices[1:]
+        if reverse:
+            return self._similarity[others, i]
+        return self._similarity[i, others]
+
+    def get_similarity_array(
+        self, clusters, models=None, feature=None, **kwargs
+    ):
+
         if feature is None:
             raise ValueError('')
 
-        model1 = models[cluster1]
-        model2 = models[cluster2]
-        return np.mean(
-            feature.subset(
-                rows=set(model1), columns=set(model2)
-            ).df.values
-        )
+        if models is None:
+            models = {}
+
+        models = [models[c] if c in models else self.get_model(c)
+                  for c in clusters]
+        labels = [label for model in models for label in model]
+        similarity = np.array(
+            feature.df.loc[labels, labels].values, dtype=np.float64)
+
+        # aggregate label similarity into cluster similarity
+        if len(labels) != len(models):
+            boundaries = np.cumsum([0] + [len(model) for model in models])
+            blocks = zip(boundaries[:-1], boundaries[1:])
+            similarity = np.array(
+                [[self._linkage(similarity[r:R, c:C]) for (c, C) in blocks]
+                 for (r, R) in blocks], dtype=np.float64)
+
+        self._reset(feature=feature, models=models, similarity=similarity)
+
+        return np.array(similarity)
+
+    def is_symmetric(self):
+        return False
+
+
+class CompleteLinkageModel(HACLinkageModel):
+
+    def _linkage(self, similarity):
+        return np.min(similarity)
+
+    def _lance_williams(self, s_i, s_j, s_ij, n_i, n_j, n_k):
+        return np.minimum(s_i, s_j)
+
+
+class AverageLinkageModel(HACLinkageModel):
+
+    def _linkage(self, similarity):
+        return np.mean(similarity)
+
+    def _lance_williams(self, s_i, s_j, s_ij, n_i, n_j, n_k):
+        return (n_i * s_i + n_j * s_j) / (n_i + n_j)
 
 
 class SingleLinkageModel(HACLinkageModel):
 
-    def get_similarity(
-        self, cluster1, cluster2, models=None, feature=None, **kwargs
-    ):
+    def _linkage(self, similarity):
+        return np.max(similarity)
 
-        if models is None:
-            raise ValueError('')
+    def _lance_williams(self, s_i, s_j, s_ij, n_i, n_j, n_k):
+        return np.maximum(s_i, s_j)
 
-        if feature is None:
-            raise ValueError('')
 
-        model1 = models[cluster1]
-        model2 = models[cluster2]
-        return np.max(
-            feature.subset(
-                rows=set(model1), columns=set(model2)
-            ).df.values
-        )
+class WeightedLinkageModel(HACLinkageModel):
+    """Weighted average linkage (WPGMA)
+
+    Similarity with a merged cluster is the (unweighted) average of the
+    similarities with the two merged clusters.
+    """
+
+    def _lance_williams(self, s_i, s_j, s_ij, n_i, n_j, n_k):
+        return .5 * (s_i + s_j)
+
+
+class WardLinkageModel(HACLinkageModel):
+    """Ward linkage
+
+    Lance-Williams recurrence for Ward criterion. When label similarity is
+    the opposite of squared euclidean distance, the sequence of merges is
+    the same as scipy.cluster.hierarchy.linkage(method='ward').
+    """
+
+    def _lance_williams(self, s_i, s_j, s_ij, n_i, n_j, n_k):
+        return ((n_i + n_k) * s_i + (n_j + n_k) * s_j - n_k * s_ij) / \
+            (n_i + n_j + n_k)
 
 
 class CompleteLinkageClustering(HierarchicalAgglomerativeClustering):
@@ -168,3 +329,27 @@ class SingleLinkageClustering(HierarchicalAgglomerativeClustering):
     def __call__(self, annotation, matrix):
         return super(SingleLinkageClustering, self).__call__(
             annotation, feature=matrix)
+
+
+class WeightedLinkageClustering(HierarchicalAgglomerativeClustering):
+
+    def __init__(self, threshold=None):
+        model = WeightedLinkageModel()
+        stop = SimilarityThresholdStop(threshold=threshold)
+        super(WeightedLinkageClustering, self).__init__(model=model, stop=stop)
+
+    def __call__(self, annotation, matrix):
+        return super(WeightedLinkageClustering, self).__call__(
+            annotation, feature=matrix)
+
+
+class WardLinkageClustering(HierarchicalAgglomerativeClustering):
+
+    def __init__(self, threshold=None):
+        model = WardLinkageModel()
+        stop = SimilarityThresholdStop(threshold=threshold)
+        super(WardLinkageClustering, self).__init__(model=model, stop=stop)
+
+    def __call__(self, annotation, matrix):
+        return super(WardLinkageClustering, self).__call__(
+            annotation, feature=matrix)
@@ -18,12 +18,26 @@
 #     You should have received a copy of the GNU General Public License
 #     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
 
+import numpy as np
 from pyannote.base.matrix import LabelMatrix
 
 
 class HACModel(object):
 
-    """"""
+    """Cluster models and similarity for hierarchical agglomerative clustering
+
+    All methods are given the current clustering status as a `HACClusters`
+    instance (`status` keyword argument). It supports label-based queries
+    (`labels`, `get_members`, `label_timeline`, `label_coverage`) and
+    cached feature frame indices (`get_indices`).
+
+    Building the actual annotation at current iteration (`annotation`
+    keyword argument) costs one pass over all tracks. During iterations, it
+    is only given to models whose `needs_annotation` attribute is True
+    (default). Models that only rely on `status` should set it to False.
+    """
+
+    needs_annotation = True
 
     def __init__(self):
         super(HACModel, self).__init__()
@@ -32,7 +46,8 @@ class HACModel(object):
 
     def get_model(
         self, cluster,
-        annotation=None, models=None, matrix=None, history=None, feature=None
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
     ):
 
         """Get model for `cluster`
@@ -42,7 +57,7 @@ class HACModel(object):
         cluster : hashable
             Cluster unique identifier (typically, one annotation label)
         annotation : Annotation, optional
-            Annotation at current iteration
+            Annotation at current iteration (see `needs_annotation`)
         models : dict, optional
             Cluster models at current iteration
         matrix : LabelMatrix, optional
@@ -51,6 +66,8 @@ class HACModel(object):
             Clustering history up to current iteration
         feature : Feature, optional
             Feature
+        status : HACClusters, optional
+            Clustering status at current iteration
 
         Returns
         -------
@@ -65,7 +82,8 @@ class HACModel(object):
 
     def get_models(
         self, clusters,
-        annotation=None, models=None, matrix=None, history=None, feature=None
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
     ):
 
         """Get models for all clusters
@@ -75,7 +93,7 @@ class HACModel(object):
         clusters : iterable
             Iterable over cluster identifiers
         annotation : Annotation, optional
-            Annotation at current iteration
+            Annotation at current iteration (see `needs_annotation`)
         models : dict, optional
             Cluster models at current iteration
         matrix : LabelMatrix, optional
@@ -84,6 +102,8 @@ class HACModel(object):
             Clustering history up to current iteration
         feature : Feature, optional
             Feature
+        status : HACClusters, optional
+            Clustering status at current iteration
 
         Returns
         -------
@@ -94,14 +114,15 @@ class HACModel(object):
         return {
             c: self.get_model(
                 c, annotation=annotation, models=models, matrix=matrix,
-                history=history, feature=feature
+                history=history, feature=feature, status=status
             )
             for c in clusters
         }
 
     def merge_models(
         self, clusters,
-        annotation=None, models=None, matrix=None, history=None, feature=None
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
     ):
 
         """Get model resulting from  merging models of all clusters
@@ -111,7 +132,7 @@ class HACModel(object):
         clusters : iterable
             Iterable over cluster identifiers
         annotation : Annotation, optional
-            Annotation at current iteration
+            Annotation at current iteration (see `needs_annotation`)
         models : dict, optional
             Cluster models at current iteration
         matrix : LabelMatrix, optional
@@ -120,6 +141,8 @@ class HACModel(object):
             Clustering history up to current iteration
         feature : Feature, optional
             Feature
+        status : HACClusters, optional
+            Clustering status at current iteration
 
         Returns
         -------
@@ -136,7 +159,8 @@ class HACModel(object):
 
     def get_similarity(
         self, cluster1, cluster2,
-        annotation=None, models=None, matrix=None, history=None, feature=None
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
     ):
         """Compute similarity between two clusters
 
@@ -145,7 +169,7 @@ class HACModel(object):
         cluster1, cluster2 : hashable
             Cluster unique identifiers (typically, two annotation labels)
         annotation : Annotation, optional
-            Annotation at current iteration
+            Annotation at current iteration (see `needs_annotation`)
         models : dict, optional
             Cluster models at current iteration
         matrix : LabelMatrix, optional
@@ -154,6 +178,8 @@ class HACModel(object):
             Clustering history up to current iteration
         feature : Feature, optional
             Feature
+        status : HACClusters, optional
+            Clustering status at current iteration
 
         Notes
         -----
@@ -162,6 +188,116 @@ class HACModel(object):
 
         raise NotImplementedError("Method 'get_similarity' must be overriden.")
 
+    def get_similarities(
+        self, cluster, clusters, reverse=False,
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
+    ):
+        """Compute similarity between one cluster and many others
+
+        Parameters
+        ----------
+        cluster : hashable
+            Cluster unique identifier
+        clusters : list
+            Other cluster unique identifiers
+        reverse : bool, optional
+            When True, compute similarities from `clusters` to `cluster`
+            instead of similarities from `cluster` to `clusters`.
+            Only useful for non-symmetric similarities.
+        annotation : Annotation, optional
+            Annotation at current iteration (see `needs_annotation`)
+        models : dict, optional
+            Cluster models at current iteration
+        matrix : LabelMatrix, optional
+            Cluster similarity matrix at current iteration
+        history : HACHistory, optional
+            Clustering history up to current iteration
+        feature : Feature, optional
+            Feature
+        status : HACClusters, optional
+            Clustering status at current iteration
+
+        Returns
+        -------
+        similarities : (len(clusters), ) numpy array
+
+        Notes
+        -----
+        Default implementation calls `get_similarity` once per cluster.
+        Inheriting classes may override it with a batched implementation.
+        """
+
+        kwargs = {'annotation': annotation, 'models': models,
+                  'matrix': matrix, 'history': history, 'feature': feature,
+                  'status': status}
+
+        if reverse:
+            similarities = [self.get_similarity(other, cluster, **kwargs)
+                            for other in clusters]
+        else:
+            similarities = [self.get_similarity(cluster, other, **kwargs)
+                            for other in clusters]
+
+        return np.array(similarities, dtype=np.float64)
+
+    def get_similarity_array(
+        self, clusters,
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
+    ):
+        """Compute similarity between all pairs of clusters
+
+        Parameters
+        ----------
+        clusters : list
+        annotation : Annotation, optional
+            Annotation at current iteration (see `needs_annotation`)
+        models : dict, optional
+            Cluster models at current iteration
+        matrix : LabelMatrix, optional
+            Cluster similarity matrix at current iteration
+        history : HACHistory, optional
+            Clustering history up to current iteration
+        feature : Feature, optional
+            Feature
+        status : HACClusters, optional
+            Clustering status at current iteration
+
+        Returns
+        -------
+        similarity : (len(clusters), len(clusters)) numpy array
+            similarity[i, j] is the similarity between clusters[i] and
+            clusters[j]
+
+        Notes
+        -----
+        Default implementation calls `get_similarities` once per cluster.
+        """
+
+        kwargs = {'annotation': annotation, 'models': models,
+                  'matrix': matrix, 'history': history, 'feature': feature,
+                  'status': status}
+
+        clusters = list(clusters)
+        n = len(clusters)
+        symmetric = self.is_symmetric()
+
+        similarity = np.empty((n, n), dtype=np.float64)
+        for i, cluster in enumerate(clusters):
+
+            # if similarity is symmetric, no need to compute d(j, i)
+            others = clusters[:i+1] if symmetric else clusters
+            similarity[i, :len(others)] = self.get_similarities(
+                cluster, others, **kwargs)
+
+        # if similarity is symmetric, d(i,j) == d(j, i)
+        if symmetric:
+            upper = np.triu_indices(n, k=1)
+            similarity[upper] = similarity.T[upper]
+
+        return similarity
+
     def is_symmetric(self):
         """
         Returns
@@ -178,7 +314,8 @@ class HACModel(object):
 
     def get_similarity_matrix(
         self, clusters,
-        annotation=None, models=None, matrix=None, history=None, feature=None
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
     ):
         """Compute clusters similarity matrix
 
@@ -186,7 +323,7 @@ class HACModel(object):
         ----------
         clusters : iterable
         annotation : Annotation, optional
-            Annotation at current iteration
+            Annotation at current iteration (see `needs_annotation`)
         models : dict, optional
             Cluster models at current iteration
         matrix : LabelMatrix, optional
@@ -195,6 +332,8 @@ class HACModel(object):
             Clustering history up to current iteration
         feature : Feature, optional
             Feature
+        status : HACClusters, optional
+            Clustering status at current iteration
 
         Returns
         -------
@@ -207,34 +346,19 @@ class HACModel(object):
 
         # compute missing models
         models = {
-            c: models.get(c, self.get_model(
+            c: models[c] if c in models else self.get_model(
                 c, annotation=annotation, models=models, matrix=matrix,
-                history=history, feature=feature))
+                history=history, feature=feature, status=status)
             for c in clusters
         }
 
         # cluster similarity matrix
-        M = LabelMatrix(
-            data=None, dtype=None, rows=clusters, columns=clusters)
-
-        # loop on all pairs of clusters
-        for i, cluster1 in enumerate(clusters):
-            for j, cluster2 in enumerate(clusters):
-
-                # if similarity is symmetric, no need to compute d(j, i)
-                if self.is_symmetric() and j > i:
-                    break
-
-                # compute similarity
-                M[cluster1, cluster2] = self.get_similarity(
-                    cluster1, cluster2, models=models,
-                    annotation=annotation, feature=feature)
-
-                # if similarity is symmetric, d(i,j) == d(j, i)
-                if self.is_symmetric():
-                    M[cluster2, cluster1] = M[cluster1, cluster2]
+        clusters = list(clusters)
+        data = self.get_similarity_array(
+            clusters, models=models, annotation=annotation, feature=feature,
+            status=status)
 
-        return M
+        return LabelMatrix(data=data, rows=clusters, columns=clusters)
 
     def get_track_similarity_matrix(self, annotation, feature):
 
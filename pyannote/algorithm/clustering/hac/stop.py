@@ -21,21 +21,27 @@
 
 class HACStop(object):
 
-    """Stopping criterion for hierarchical agglomerative clustering"""
+    """Stopping criterion for hierarchical agglomerative clustering
+
+    See `HACModel` for `status` and `needs_annotation`.
+    """
+
+    needs_annotation = True
 
     def __init__(self):
         super(HACStop, self).__init__()
 
     def initialize(
         self,
-        annotation=None, models=None, matrix=None, history=None, feature=None
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
     ):
 
         """
         Parameters
         ----------
         annotation : Annotation, optional
-            Annotation at current iteration
+            Annotation at current iteration (see `needs_annotation`)
         models : dict, optional
             Cluster models at current iteration
         matrix : LabelMatrix, optional
@@ -44,6 +50,8 @@ class HACStop(object):
             Clustering history up to current iteration
         feature : Feature, optional
             Feature
+        status : HACClusters, optional
+            Clustering status at current iteration
 
         """
 
@@ -51,7 +59,8 @@ class HACStop(object):
 
     def update(
         self, merged_clusters, new_cluster,
-        annotation=None, models=None, matrix=None, history=None, feature=None
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
     ):
 
         """
@@ -59,7 +68,7 @@ class HACStop(object):
         Parameters
         ----------
         annotation : Annotation, optional
-            Annotation at current iteration
+            Annotation at current iteration (see `needs_annotation`)
         models : dict, optional
             Cluster models at current iteration
         matrix : LabelMatrix, optional
@@ -68,13 +77,16 @@ class HACStop(object):
             Clustering history up to current iteration
         feature : Feature, optional
             Feature
+        status : HACClusters, optional
+            Clustering status at current iteration
         """
 
         raise NotImplementedError("Method 'update' must be overriden.")
 
     def reached(
         self,
-        annotation=None, models=None, matrix=None, history=None, feature=None
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
     ):
 
         """
@@ -82,7 +94,7 @@ class HACStop(object):
         Parameters
         ----------
         annotation : Annotation, optional
-            Annotation at current iteration
+            Annotation at current iteration (see `needs_annotation`)
         models : dict, optional
             Cluster models at current iteration
         matrix : LabelMatrix, optional
@@ -91,6 +103,8 @@ class HACStop(object):
             Clustering history up to current iteration
         feature : Feature, optional
             Feature
+        status : HACClusters, optional
+            Clustering status at current iteration
 
         """
 
@@ -98,7 +112,8 @@ class HACStop(object):
 
     def finalize(
         self,
-        annotation=None, models=None, matrix=None, history=None, feature=None
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
     ):
 
         """
@@ -106,7 +121,7 @@ class HACStop(object):
         Parameters
         ----------
         annotation : Annotation, optional
-            Annotation at current iteration
+            Annotation at current iteration (see `needs_annotation`)
         models : dict, optional
             Cluster models at current iteration
         matrix : LabelMatrix, optional
@@ -115,6 +130,8 @@ class HACStop(object):
             Clustering history up to current iteration
         feature : Feature, optional
             Feature
+        status : HACClusters, optional
+            Clustering status at current iteration
 
         Returns
         -------
@@ -22,70 +22,108 @@ from pyannote.algorithm.clustering.hac.hac import HierarchicalAgglomerativeClust
 from pyannote.algorithm.clustering.hac.model import HACModel
 from pyannote.algorithm.clustering.hac.stop import HACStop
 from pyannote.algorithm.clustering.hac.constraint import HACConstraint
-from pyannote.stats.gaussian import Gaussian
+from pyannote.stats.gaussian import Gaussian, delta_bic
+import numpy as np
 
 
 class BICModel(HACModel):
     """"""
 
+    needs_annotation = False
+
     def __init__(self, covariance_type='full', penalty_coef=3.5):
         super(BICModel, self).__init__()
         self.covariance_type = covariance_type
         self.penalty_coef = penalty_coef
 
     def get_model(
-        self, cluster, annotation=None, feature=None, **kwargs
+        self, cluster, annotation=None, feature=None, status=None, **kwargs
     ):
 
-        timeline = annotation.label_timeline(cluster)
-        data = feature.crop(timeline)
+        # during clustering, frame indices are merged along with clusters
+        if status is not None:
+            data = feature.data[status.get_indices(cluster, feature)]
+        else:
+            data = feature.crop(annotation.label_timeline(cluster))
         gaussian = Gaussian(covariance_type=self.covariance_type)
         gaussian.fit(data)
         return gaussian
 
     def merge_models(
-        self, clusters, models=None, annotation=None, feature=None, **kwargs
+        self, clusters, models=None, annotation=None, feature=None,
+        status=None, **kwargs
     ):
-        if models is None:
-            models = {}
 
-        gaussians = {
-            c: models.get(c, self.get_model(
-                c, annotation=annotation, feature=feature))
-            for c in clusters
-        }
+        gaussians = self._get_gaussians(
+            clusters, models=models, annotation=annotation, feature=feature,
+            status=status)
 
-        gaussian = gaussians.popitem()[1]
+        gaussian = gaussians.pop()
         while gaussians:
-            other_gaussian = gaussians.popitem()[1]
+            other_gaussian = gaussians.pop()
             gaussian = gaussian.merge(other_gaussian)
 
         return gaussian
 
     def get_similarity(
         self, cluster1, cluster2,
-        annotation=None, models=None, matrix=None, history=None, feature=None
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
     ):
 
+        gaussian1, gaussian2 = self._get_gaussians(
+            [cluster1, cluster2], models=models, annotation=annotation,
+            feature=feature, status=status)
+
+        dbic, _ = gaussian1.bic(gaussian2, penalty_coef=self.penalty_coef)
+        return -dbic
+
+    def _get_gaussians(self, clusters, models=None, annotation=None,
+                       feature=None, status=None):
         if models is None:
             models = {}
+        return [models[c] if c in models else
+                self.get_model(c, annotation=annotation, feature=feature,
+                               status=status)
+                for c in clusters]
+
+    def get_similarities(
+        self, cluster, clusters, reverse=False,
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
+    ):
 
-        if cluster1 in models:
-            gaussian1 = models[cluster1]
-        else:
-            gaussian1 = self.get_model(
-                cluster1, annotation=annotation, feature=feature
-            )
+        # (BIC is symmetric, reverse does not matter)
+        gaussian, = self._get_gaussians(
+            [cluster], models=models, annotation=annotation, feature=feature,
+            status=status)
+        gaussians = self._get_gaussians(
+            clusters, models=models, annotation=annotation, feature=feature,
+            status=status)
 
-        if cluster2 in models:
-            gaussian2 = models[cluster2]
-        else:
-            gaussian2 = self.get_model(
-                cluster2, annotation=annotation, feature=feature
-            )
+        return -delta_bic(gaussian, gaussians, penalty_coef=self.penalty_coef)
 
-        dbic, _ = gaussian1.bic(gaussian2, penalty_coef=self.penalty_coef)
-        return -dbic
+    def get_similarity_array(
+        self, clusters,
+        annotation=None, models=None, matrix=None, history=None, feature=None,
+        status=None
+    ):
+
+        clusters = list(clusters)
+        gaussians = self._get_gaussians(
+            clusters, models=models, annotation=annotation, feature=feature,
+            status=status)
+
+        n = len(clusters)
+        similarity = np.empty((n, n), dtype=np.float64)
+        for i, gaussian in enumerate(gaussians):
+            similarity[i, :i+1] = -delta_bic(
+                gaussian, gaussians[:i+1], penalty_coef=self.penalty_coef)
+
+        upper = np.triu_indices(n, k=1)
+        similarity[upper] = similarity.T[upper]
+
+        return similarity
 
     def is_symmetric(self):
         return True
@@ -93,6 +131,8 @@ class BICModel(HACModel):
 
 class BICStop(HACStop):
 
+    needs_annotation = False
+
     def __init__(self):
         super(BICStop, self).__init__()
 
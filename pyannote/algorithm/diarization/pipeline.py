@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+End-to-end speaker diarization
+
+Speech activity detection, then speech turn segmentation, then BIC
+hierarchical agglomerative clustering. The output of each stage is cached
+on disk, indexed by the hash of the audio file content and of the
+parameters of this stage and of all previous ones: changing only the
+clustering penalty (for instance) reuses speech activity detection and
+speech turn segmentation.
+"""
+
+import os
+import time
+import errno
+import pickle
+import hashlib
+import itertools
+import traceback
+import multiprocessing
+from pyannote.base.annotation import Annotation
+from pyannote.feature.cache import _hash_file, _atomic_write
+from pyannote.algorithm.diarization.bic import BICClustering
+
+# pipeline stages, in order of application
+FEATURE = 'feature'
+SAD = 'sad'
+SEGMENTATION = 'segmentation'
+CLUSTERING = 'clustering'
+STAGES = [SAD, SEGMENTATION, CLUSTERING]
+
+
+def _hash_parameters(key, *objects):
+    """SHA1 hash of `key` (previous stage) and pickled `objects`"""
+    return hashlib.sha1(key + pickle.dumps(objects, protocol=2)).hexdigest()
+
+
+def _get_params(obj):
+    """Class and public attributes of `obj`
+
+    Private attributes (e.g. HACLinkageModel._similarity) hold run-time
+    state and must not change the hash of a stage.
+    """
+    params = sorted((name, value) for name, value in vars(obj).iteritems()
+                    if not name.startswith('_'))
+    return type(obj).__module__, type(obj).__name__, params
+
+
+def _apply(task):
+    """Apply pipeline on one file (worker of apply_many)"""
+    pipeline, wav, uri = task
+    try:
+        output = pipeline.apply(wav, uri=uri)
+        return wav, output, pipeline.timing, None
+    except Exception:
+        return wav, None, pipeline.timing, traceback.format_exc()
+
+
+class DiarizationPipeline(object):
+    """Speaker diarization pipeline
+
+    Parameters
+    ----------
+    sad : SpeechActivityDetection
+        Trained speech activity detection.
+    segmentation : SpeechTurnSegmentation, optional
+        Defaults to SpeechTurnSegmentation().
+    clustering : HierarchicalAgglomerativeClustering, optional
+        Applied on features of speech turn segmentation.
+        Defaults to BICClustering().
+    directory : str, optional
+        Where to cache output of each stage. Defaults to no cache.
+
+    Example
+    -------
+
+    >>> pipeline = DiarizationPipeline(sad, directory='/path/to/cache')
+    >>> diarization = pipeline.apply('/path/to/file.wav')
+
+    Tuning clustering penalty only runs the clustering stage:
+
+    >>> for penalty_coef in [1., 2., 3.5, 5.]:
+    ...     pipeline.clustering.hacModel.penalty_coef = penalty_coef
+    ...     diarization = pipeline.apply('/path/to/file.wav')
+
+    Notes
+    -----
+    Feature extraction relies on `sad` and `segmentation` features
+    extractors (and their own feature cache, if any).
+    """
+
+    def __init__(self, sad, segmentation=None, clustering=None,
+                 directory=None):
+
+        super(DiarizationPipeline, self).__init__()
+
+        self.sad = sad
+
+        if segmentation is None:
+            from pyannote.algorithm.speech import SpeechTurnSegmentation
+            segmentation = SpeechTurnSegmentation()
+        self.segmentation = segmentation
+
+        if clustering is None:
+            clustering = BICClustering()
+        self.clustering = clustering
+
+        if directory is not None:
+            directory = os.path.abspath(os.path.expanduser(directory))
+            try:
+                os.makedirs(directory)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+        self.directory = directory
+
+        # {stage: duration (in seconds)} for last processed file
+        self.timing = {}
+
+        # {(path, size, mtime): content hash} (avoid re-hashing audio files)
+        self._hashes = {}
+
+    def _get_keys(self, wav):
+        """{stage: key} where key depends on current and previous stages"""
+
+        stat = os.stat(wav)
+        stamp = (os.path.abspath(wav), stat.st_size, stat.st_mtime)
+        if stamp not in self._hashes:
+            self._hashes[stamp] = _hash_file(wav)
+        key = self._hashes[stamp]
+
+        keys = {}
+        key = keys[SAD] = _hash_parameters(
+            key, self.sad.hmm, self.sad.feature)
+        key = keys[SEGMENTATION] = _hash_parameters(
+            key, self.segmentation.segmentation, self.segmentation.feature)
+        key = keys[CLUSTERING] = _hash_parameters(
+            key, _get_params(self.clustering.hacModel),
+            _get_params(self.clustering.hacStop))
+
+        return keys
+
+    def _get_path(self, stage, key):
+        return os.path.join(self.directory, '%s-%s.pkl' % (stage, key))
+
+    def _load(self, stage, key):
+        """Cached stage output (or None if not in cache)"""
+
+        if self.directory is None:
+            return None
+
+        try:
+            with open(self._get_path(stage, key), 'rb') as f:
+                return pickle.load(f)
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return None
+
+    def _dump(self, stage, key, output):
+        if self.directory is None:
+            return
+        _atomic_write(self._get_path(stage, key),
+                      lambda f: pickle.dump(output, f, protocol=2))
+
+    def apply(self, wav, uri=None):
+        """Apply speaker diarization on .wav file
+
+        Parameters
+        ----------
+        wav : str
+            Path to processed .wav file.
+        uri : str, optional
+            Resource identifier of output annotation.
+
+        Returns
+        -------
+        diarization : Annotation
+            Speaker diarization. Per-stage timing is available in the
+            `timing` attribute.
+        """
+
+        keys = self._get_keys(wav)
+        self.timing = {FEATURE: 0.}
+
+        # features are only extracted if (and once) needed
+        features = {}
+
+        def get_features(algorithm):
+            if algorithm not in features:
+                t = time.time()
+                features[algorithm] = algorithm.get_features(wav)
+                self.timing[FEATURE] += time.time() - t
+            return features[algorithm]
+
+        def start(stage):
+            self.timing[stage] = -time.time() + self.timing[FEATURE]
+
+        def stop(stage):
+            # feature extraction time is not counted in stage time
+            self.timing[stage] += time.time() - self.timing[FEATURE]
+
+        # speech activity detection
+        start(SAD)
+        speech = self._load(SAD, keys[SAD])
+        if speech is None:
+            detection = self.sad.apply(features=get_features(self.sad))
+            speech = detection.label_timeline(self.sad.SPEECH)
+            self._dump(SAD, keys[SAD], speech)
+        stop(SAD)
+
+        # speech turn segmentation
+        start(SEGMENTATION)
+        speech_turns = self._load(SEGMENTATION, keys[SEGMENTATION])
+        if speech_turns is None:
+            segmentation = self.segmentation.apply(
+                features=get_features(self.segmentation), speech=speech)
+            speech_turns = Annotation()
+            for i, segment in enumerate(segmentation):
+                speech_turns[segment, '_'] = i
+            self._dump(SEGMENTATION, keys[SEGMENTATION], speech_turns)
+        stop(SEGMENTATION)
+
+        # clustering (using speech turn segmentation features)
+        start(CLUSTERING)
+        diarization = self._load(CLUSTERING, keys[CLUSTERING])
+        if diarization is None:
+            diarization = self.clustering(
+                speech_turns, feature=get_features(self.segmentation))
+            self._dump(CLUSTERING, keys[CLUSTERING], diarization)
+        stop(CLUSTERING)
+
+        diarization = diarization.copy()
+        diarization.uri = uri
+        return diarization
+
+    def apply_many(self, wavs, uris=None, n_jobs=1):
+        """Apply speaker diarization on many files
+
+        Parameters
+        ----------
+        wavs : iterable
+            Paths to audio files
+        uris : iterable, optional
+            Resource identifiers of output annotations.
+        n_jobs : int, optional
+            Number of worker processes. Defaults to 1.
+
+        Generates
+        ---------
+        wav : str
+            Path to audio file (in order of completion)
+        diarization : Annotation
+            Speaker diarization (None if it failed)
+        timing : dict
+            {stage: duration (in seconds)}
+        error : str
+            Error traceback if diarization failed, None otherwise.
+        """
+
+        if uris is None:
+            uris = itertools.repeat(None)
+
+        tasks = [(self, wav, uri) for wav, uri in itertools.izip(wavs, uris)]
+
+        if n_jobs == 1:
+            for result in itertools.imap(_apply, tasks):
+                yield result
+
+        else:
+            pool = multiprocessing.Pool(processes=n_jobs)
+            try:
+                for result in pool.imap_unordered(_apply, tasks):
+                    yield result
+                pool.close()
+            except:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
@@ -29,8 +29,10 @@ Several mapping algorithms are available in the ``pyannote.algorithm.mapping`` m
 
 from hungarian import HungarianMapper
 from argmax import ArgMaxMapper, ConservativeDirectMapper
+from louvain import LouvainMapper
 
-__all__ = ['HungarianMapper', 'ArgMaxMapper', 'ConservativeDirectMapper']
+__all__ = ['HungarianMapper', 'ArgMaxMapper', 'ConservativeDirectMapper',
+           'LouvainMapper']
 
 if __name__ == "__main__":
     import doctest
@@ -31,18 +31,22 @@ class ConservativeDirectMapper(BaseMapper):
     def __init__(self):
         super(ConservativeDirectMapper, self).__init__()
 
+    def _get_matrix(self, A, B):
+        return get_cooccurrence_matrix(A, B)
+
     def _associate(self, A, B):
-        # TODO : make it much simpler
+        return self._associate_matrix(self._get_matrix(A, B),
+                                      A.modality, B.modality)
 
-        # Cooccurrence matrix
-        matrix = get_cooccurrence_matrix(A, B)
+    def _associate_matrix(self, matrix, left, right):
 
         # For each row, find the most frequent cooccurring column
         pairs = matrix.argmax(axis=1)
 
         # and keep this pair only if there is no ambiguity
-        pairs = {a: b for a, b in pairs.iteritems()
-                 if np.sum((matrix.subset(rows=set([a])) > 0).df.values) == 1}
+        unambiguous = np.sum(matrix.df.values > 0, axis=1) == 1
+        unambiguous = dict(zip(matrix.get_rows(), unambiguous))
+        pairs = {a: b for a, b in pairs.iteritems() if unambiguous[a]}
 
         # Reverse dict and group alabels by argmax
         sriap = {}
@@ -51,7 +55,7 @@ class ConservativeDirectMapper(BaseMapper):
                 sriap[b] = set([])
             sriap[b].add(a)
 
-        M = ManyToOneMapping(A.modality, B.modality)
+        M = ManyToOneMapping(left, right)
 
         for b, a_s in sriap.iteritems():
             M += (a_s, [b])
@@ -119,10 +123,14 @@ class ArgMaxMapper(BaseMapper):
             cost = get_cooccurrence_matrix
         self.__cost = cost
 
+    def _get_matrix(self, A, B):
+        return self.__cost(A, B)
+
     def _associate(self, A, B):
+        return self._associate_matrix(self._get_matrix(A, B),
+                                      A.modality, B.modality)
 
-        # Cooccurrence matrix
-        matrix = self.__cost(A, B)
+    def _associate_matrix(self, matrix, left, right):
 
         # argmax
         pairs = matrix.argmax(axis=1)
@@ -135,7 +143,7 @@ class ArgMaxMapper(BaseMapper):
                 sriap[b] = set([])
             sriap[b].add(a)
 
-        M = ManyToOneMapping(A.modality, B.modality)
+        M = ManyToOneMapping(left, right)
 
         for b, a_s in sriap.iteritems():
             M += (a_s, [b])
@@ -18,7 +18,38 @@
 #     You should have received a copy of the GNU General Public License
 #     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
 
+import numpy as np
 from pyannote.base.mapping import Mapping
+from pyannote.base.matrix import LabelMatrix
+
+
+def _map(mapper, A, B):
+    return mapper(A, B)
+
+
+def _get_matrix(mapper, A, B):
+    return mapper._get_matrix(A, B)
+
+
+def _sum_matrices(matrices):
+    """Sum label matrices, aligned on the union of their labels"""
+
+    matrices = list(matrices)
+
+    # labels are sorted the same way as Annotation.labels()
+    rows = sorted(set(r for m in matrices for r in m.get_rows()), key=str)
+    cols = sorted(set(c for m in matrices for c in m.get_columns()), key=str)
+    r_index = {r: i for i, r in enumerate(rows)}
+    c_index = {c: j for j, c in enumerate(cols)}
+
+    K = np.zeros((len(rows), len(cols)), dtype=np.float)
+    for m in matrices:
+        i = [r_index[r] for r in m.get_rows()]
+        j = [c_index[c] for c in m.get_columns()]
+        K[np.ix_(i, j)] += m.df.values
+
+    return LabelMatrix(data=K, rows=rows, columns=cols)
+
 
 class BaseMapper(object):
     """
@@ -26,6 +57,10 @@ class BaseMapper(object):
     
     Any mapping algorithm must inherit from this base class and implement the 
     ``_associate(A, B)`` method.
+
+    Mapping algorithms based on a label cost matrix should also implement
+    ``_get_matrix(A, B)`` and ``_associate_matrix(matrix, left, right)`` to
+    support cross-file mapping (see ``cross_file``).
     
     """
     
@@ -46,6 +81,41 @@ class BaseMapper(object):
         """
         raise NotImplementedError("BaseMapper sub-class must implement "
                                   "_associate(A, B) method.")
+
+    def _get_matrix(self, A, B):
+        """Compute cost matrix between `A` and `B` labels
+
+        Parameters
+        ----------
+        A, B : :class:`pyannote.base.annotation.Annotation`
+
+        Returns
+        -------
+        matrix : :class:`pyannote.base.matrix.LabelMatrix`
+            Rows are `A` labels, columns are `B` labels.
+
+        """
+        raise NotImplementedError("%s does not rely on a cost matrix."
+                                  % self.__class__.__name__)
+
+    def _associate_matrix(self, matrix, left, right):
+        """Find the optimal mapping given a cost matrix
+
+        Parameters
+        ----------
+        matrix : :class:`pyannote.base.matrix.LabelMatrix`
+            Non-empty cost matrix (rows are left labels, columns are right
+            labels).
+        left, right : str
+            Left and right modalities
+
+        Returns
+        -------
+        mapping : :class:`pyannote.base.mapping.Mapping`
+
+        """
+        raise NotImplementedError("%s does not rely on a cost matrix."
+                                  % self.__class__.__name__)
         
     def __call__(self, A, B, init=None):
         """Find the optimal mapping between `A` and `B` labels
@@ -109,6 +179,8 @@ class BaseMapper(object):
             raise ValueError('Labels %s are missing from initial mapping.' \
                              % blabels - init.right_set)
         
+        all_alabels, all_blabels = alabels, blabels
+
         # initialize empty mapping between A and B labels
         M = Mapping(A.modality, B.modality)
         
@@ -118,8 +190,9 @@ class BaseMapper(object):
             
             # extract constrained sub-annotations
             # for later mapping between their labels
-            a = A.subset(lblA)
-            b = B.subset(lblB)
+            # (no need to when there is actually no constraint)
+            a = A if lblA >= all_alabels else A.subset(lblA)
+            b = B if lblB >= all_blabels else B.subset(lblB)
             
             # get actual `a` and `b` labels
             alabels = a.labels()
@@ -151,6 +224,85 @@ class BaseMapper(object):
         # return the final mapping
         return M
 
+    def batch(self, pairs, n_jobs=1):
+        """Find the optimal mapping for many pairs of annotations at once
+
+        Parameters
+        ----------
+        pairs : iterable
+            (A, B) annotations iterable (typically, one pair per file)
+        n_jobs : int, optional
+            Number of jobs used to process pairs in parallel.
+            Defaults to 1 (sequential).
+
+        Returns
+        -------
+        mappings : list
+            One :class:`pyannote.base.mapping.Mapping` per (A, B) pair.
+
+        """
+
+        if n_jobs == 1:
+            return [self(A, B) for A, B in pairs]
+
+        from joblib import Parallel, delayed
+        return Parallel(n_jobs=n_jobs)(
+            delayed(_map)(self, A, B) for A, B in pairs)
+
+    def cross_file(self, pairs, n_jobs=1):
+        """Find the optimal mapping between labels shared across files
+
+        Cost matrices of all (A, B) pairs are summed (labels with the same
+        name in different files being considered the same) and one global
+        optimal mapping is computed from the resulting matrix.
+
+        Parameters
+        ----------
+        pairs : iterable
+            (A, B) annotations iterable (typically, one pair per file)
+        n_jobs : int, optional
+            Number of jobs used to compute cost matrices in parallel.
+            Defaults to 1 (sequential).
+
+        Returns
+        -------
+        mapping : :class:`pyannote.base.mapping.Mapping`
+            Optimal mapping between `A` and `B` labels of all files.
+
+        """
+
+        pairs = list(pairs)
+
+        if pairs:
+            left, right = pairs[0][0].modality, pairs[0][1].modality
+        else:
+            left, right = None, None
+
+        if n_jobs == 1:
+            matrices = [self._get_matrix(A, B) for A, B in pairs]
+        else:
+            from joblib import Parallel, delayed
+            matrices = Parallel(n_jobs=n_jobs)(
+                delayed(_get_matrix)(self, A, B) for A, B in pairs)
+
+        matrix = _sum_matrices(matrices)
+        alabels = matrix.get_rows()
+        blabels = matrix.get_columns()
+
+        M = Mapping(left, right)
+
+        if alabels and blabels:
+            M += self._associate_matrix(matrix, left, right)
+
+        # otherwise, finding the optimal association is trivial
+        else:
+            for blabel in blabels:
+                M += (None, [blabel])
+            for alabel in alabels:
+                M += ([alabel], None)
+
+        return M
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
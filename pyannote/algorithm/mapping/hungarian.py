@@ -18,9 +18,8 @@
 #     You should have received a copy of the GNU General Public License
 #     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
 
-import numpy as np
-from munkres import Munkres
 from base import BaseMapper
+from pyannote.algorithm.util.assignment import maximum_weight_matching
 from pyannote.base.mapping import OneToOneMapping
 from pyannote.base.matrix import get_cooccurrence_matrix
 
@@ -81,37 +80,30 @@ class HungarianMapper(BaseMapper):
     def __init__(self, cost=None):
         super(HungarianMapper, self).__init__()
 
-        # Hungarian association solver / Munkres algorithm
-        self.__munkres = Munkres()
-
         # By default, uses label cooccurrence duration
         if cost is None:
             cost = get_cooccurrence_matrix
         self.__cost = cost
 
+    def _get_matrix(self, A, B):
+        return self.__cost(A, B)
+
     def _associate(self, A, B):
+        return self._associate_matrix(self._get_matrix(A, B),
+                                      A.modality, B.modality)
+
+    def _associate_matrix(self, matrix, left, right):
 
-        # Cooccurrence matrix
-        matrix = self.__cost(A, B)
-        M = OneToOneMapping(A.modality, B.modality)
+        M = OneToOneMapping(left, right)
 
-        # Shape and labels
-        nRows, nCols = matrix.shape
+        # Labels
         rows = matrix.get_rows()
         cols = matrix.get_columns()
 
-        # Cost matrix
-        N = max(nCols, nRows)
-        C = np.zeros((N, N))
-        C[:nCols, :nRows] = (np.max(matrix.df.values) - matrix.df.values).T
-
         # Optimal one-to-one mapping
-        mapping = self.__munkres.compute(C)
-
-        for b, a in mapping:
-            if (b < nCols) and (a < nRows):
-                if matrix[rows[a], cols[b]] > 0:
-                    M += ([rows[a]], [cols[b]])
+        # (only label pairs with positive cooccurrence are matched)
+        for a, b in zip(*maximum_weight_matching(matrix.df.values)):
+            M += ([rows[a]], [cols[b]])
 
         # A --> NoMatch
         for alabel in set(rows)-M.left_set:
@@ -18,18 +18,36 @@
 #     You should have received a copy of the GNU General Public License
 #     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
 
-import networkx as nx
+import numpy as np
+import scipy.sparse
 
-import pyannote.algorithm.community
-from pyannote.base.mapping import Mapping, MElement
-from pyannote.base.matrix import get_cooccurrence_matrix
+from pyannote.algorithm.util.community import csr_generate_dendogram
+from pyannote.base.mapping import Mapping
+from pyannote.base.matrix import get_cooccurrence_matrix, get_tfidf_matrix
 from base import BaseMapper
 
 
-class Louvain(BaseMapper):
+class LouvainMapper(BaseMapper):
+    """Many-to-many label mapping based on community detection
+
+    Labels of both annotations are the nodes of a graph whose edges are
+    weighted by label cooccurrence duration. Louvain community detection
+    is applied to this graph and each community becomes one many-to-many
+    mapping.
+
+    Parameters
+    ----------
+    normalize : bool, optional
+        When True, edges are weighted by term frequency
+        (see `pyannote.base.matrix.get_tfidf_matrix`) instead of
+        raw cooccurrence duration. Defaults to False.
+    overlap : bool, optional
+        When True, cooccurrence of labels within the same annotation
+        is also added to the graph. Defaults to False.
+    """
 
     def __init__(self, normalize=False, overlap=False):
-        super(Louvain, self).__init__()
+        super(LouvainMapper, self).__init__()
         self.__normalize = normalize
         self.__overlap = overlap
 
@@ -45,88 +63,78 @@ class Louvain(BaseMapper):
         fget=__get_overlap,
         doc="Intra-modality overlap?")
 
-    def __partition_to_cluster(self, partition):
-        clusters = {}
-        for node in partition:
-            if partition[node] not in clusters:
-                clusters[partition[node]] = []
-            clusters[partition[node]].append(node)
-        return clusters
-
-    def __autoconfusion_graph(self, A):
-
-        # AutoCooccurrence matrix
-        M = AutoCooccurrence(A, neighborhood=0., normalize=self.normalize)
-
-        # Shape and labels
-        Na, Na = M.shape
-        alabels, alabels = M.labels
-
-        G = nx.Graph()
-        for i in range(Na):
-            alabel_i = alabels[i]
-            anode_i = MElement(A.modality, alabel_i)
-            G.add_node(anode_i)
-            for j in range(i+1, Na):
-                alabel_j = alabels[j]
-                anode_j = MElement(A.modality, alabel_j)
-                if M[alabel_i, alabel_j] > 0.:
-                    G.add_edge(anode_i, anode_j)
-                    G[anode_i][anode_j]['weight'] = M[alabel_i, alabel_j]
-
-        return G
-
-    def __confusion_graph(self, A, B):
-
-        # Cooccurrence matrix
-        M = Cooccurrence(A, B, normalize=self.normalize)
-
-        # Shape and labels
-        Na, Nb = M.shape
-        alabels, blabels = M.labels
-
-        # Cooccurrence graph
-        G = nx.Graph()
-        for a, alabel in enumerate(alabels):
-            anode = MElement(A.modality, alabel)
-            G.add_node(anode)
-            for blabel in blabels:
-                bnode = MElement(B.modality, blabel)
-                if a < 1:
-                    G.add_node(bnode)
-                if M[alabel, blabel] > 0.:
-                    G.add_edge(anode, bnode)
-                    G[anode][bnode]['weight'] = M[alabel, blabel]
-
-        if self.overlap:
-            Ga = self.__autoconfusion_graph(A)
-            G.add_edges_from(Ga.edges(data=True))
-
-            Gb = self.__autoconfusion_graph(B)
-            G.add_edges_from(Gb.edges(data=True))
-
-        return G
+    def __cooccurrence(self, A, B):
+        if self.normalize:
+            return get_tfidf_matrix(A, B, idf=False)
+        return get_cooccurrence_matrix(A, B)
 
-    def _associate(self, A, B):
+    def __autocooccurrence(self, A):
+        # (a label always cooccurs with itself)
+        K = self.__cooccurrence(A, A).df.values.copy()
+        np.fill_diagonal(K, 0.)
+        return K
 
-        G = self.__confusion_graph(A, B)
+    def _get_matrix(self, A, B):
+        return self.__cooccurrence(A, B)
 
-        # Community detection
-        partition = pyannote.algorithm.community.best_partition(G)
-        clusters = self.__partition_to_cluster(partition)
+    def _associate(self, A, B):
 
-        # Many-to-many mapping
-        M = Mapping(A.modality, B.modality)
-        for cluster in clusters:
-            nodes = clusters[cluster]
-            key = [node.element for node in nodes \
-                   if node.modality == A.modality]
-            value = [node.element for node in nodes \
-                     if node.modality == B.modality]
+        matrix = self._get_matrix(A, B)
+        if not self.overlap:
+            return self._associate_matrix(matrix, A.modality, B.modality)
+
+        # intra-modality cooccurrence graphs (labels are in the same order
+        # as in the cooccurrence matrix, i.e. sorted)
+        return self.__partition(matrix, A.modality, B.modality,
+                                KA=self.__autocooccurrence(A),
+                                KB=self.__autocooccurrence(B))
+
+    def _associate_matrix(self, matrix, left, right):
+        return self.__partition(matrix, left, right)
+
+    def __partition(self, matrix, left, right, KA=None, KB=None):
+
+        alabels = matrix.get_rows()
+        blabels = matrix.get_columns()
+        Na, Nb = len(alabels), len(blabels)
+
+        # confusion graph adjacency matrix
+        # (nodes 0..Na-1 are A labels, nodes Na..Na+Nb-1 are B labels)
+        K = scipy.sparse.coo_matrix(np.maximum(matrix.df.values, 0.))
+        blocks = [[None, K], [K.T, None]]
+        if KA is not None:
+            blocks[0][0] = scipy.sparse.coo_matrix(
+                np.maximum(.5 * (KA + KA.T), 0.))
+        if KB is not None:
+            blocks[1][1] = scipy.sparse.coo_matrix(
+                np.maximum(.5 * (KB + KB.T), 0.))
+        adjacency = scipy.sparse.bmat(blocks, format='csr')
+
+        M = Mapping(left, right)
+        if Na + Nb == 0:
+            return M
+
+        # community detection
+        dendogram = csr_generate_dendogram(adjacency)
+        communities = dendogram[0]
+        for level in dendogram[1:]:
+            communities = level[communities]
+
+        # many-to-many mapping (one per community)
+        order = np.argsort(communities, kind='mergesort')
+        boundaries = np.searchsorted(communities[order],
+                                     np.arange(np.max(communities) + 2))
+        for c in range(len(boundaries) - 1):
+            nodes = order[boundaries[c]:boundaries[c+1]]
+            key = [alabels[n] for n in nodes if n < Na]
+            value = [blabels[n - Na] for n in nodes if n >= Na]
             M += (key, value)
 
         return M
 
+# backward compatibility
+Louvain = LouvainMapper
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
@@ -19,13 +19,15 @@
 #     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
 
 from pyannote.base import URI, MODALITY, SEGMENT, TRACK
-from pyannote.base import Timeline, Annotation, Unknown
+from pyannote.base import Annotation, Unknown
 from pyannote.base.matrix import get_cooccurrence_matrix
-from pyannote.algorithm.clustering.model.base import BaseModelMixin
 from pyannote.algorithm.mpg.node import IdentityNode, TrackNode
+from pyannote.base.segment import Segment, SEGMENT_PRECISION
 from pandas import DataFrame
 import networkx as nx
 import numpy as np
+import itertools
+import heapq
 
 PROBABILITY = 'probability'
 
@@ -92,6 +94,9 @@ class MultimodalProbabilityGraph(nx.Graph):
 
     def propagate_constraints(self):
         """Propagate p=0 and p=1 probabilities edges
+
+        Conflicting p=0 edges (between two nodes of the same p=1 connected
+        component) become p=1 edges.
         """
 
         # propagated p=1 constraints
@@ -99,7 +104,8 @@ class MultimodalProbabilityGraph(nx.Graph):
         c = nx.Graph(self)
         c.remove_edges_from([(e, f) for e, f, d in self.edges_iter(data=True)
                              if d[PROBABILITY] != 1])
-        components = nx.connected_components(c)
+        components = [list(component)
+                      for component in nx.connected_components(c)]
         for component in components:
             for i, n in enumerate(component):
                 for m in component[i+1:]:
@@ -483,17 +489,29 @@ class LabelSimilarityGraph(object):
     Parameters
     ----------
     s2p : func, optional
-        Similarity-to-probability function.
-        Defaults to identity (p=s)
+        Similarity-to-probability function (applied to the whole label
+        similarity matrix at once). Defaults to identity (p=s)
+    threshold : float, optional
+        When provided, only keep soft edges with probability greater than
+        `threshold`. Hard edges (p=1 between tracks with the same label and
+        p=0 between tracks with cooccurring labels) are always kept.
+    nbest : int, optional
+        When provided, only keep soft edges that are among the `nbest` most
+        probable ones of at least one of their two tracks.
+        Hard edges (same label or cooccurring labels) are always kept.
     """
-    def __init__(self, s2p=None, **kwargs):
+    def __init__(self, s2p=None, threshold=None, nbest=None, **kwargs):
         super(LabelSimilarityGraph, self).__init__()
 
         if s2p is None:
             s2p = lambda s: s
         self.s2p = s2p
 
+        self.threshold = threshold
+        self.nbest = nbest
+
         # setup model
+        from pyannote.algorithm.clustering.model.base import BaseModelMixin
         MMx = self.getMx(BaseModelMixin)
         if len(MMx) == 0:
             raise ValueError('Missing model mixin (MMx).')
@@ -541,57 +559,293 @@ class LabelSimilarityGraph(object):
         # label similarity matrix
         P = self.mmx_similarity_matrix(labels, annotation=diarization,
                                        feature=feature)
-        # change it into a probability matrix
-        P.M = self.s2p(P.M)
+
+        # change it into a (labels x labels) probability matrix
+        # (NaN when probability is not available)
+        probability = self.s2p(
+            P.df.reindex(index=labels, columns=labels).values)
 
         # label cooccurrence matrix
         K = get_cooccurrence_matrix(diarization, diarization)
+        cooccurring = K.df.reindex(index=labels, columns=labels).values > 0
 
         G = MultimodalProbabilityGraph()
         u = diarization.uri
         m = diarization.modality
 
-        tnodes = [TrackNode(**{URI: u, MODALITY: m, SEGMENT: s, TRACK: t})
-                  for s, t in diarization.itertracks()]
+        # track nodes and their label index
+        index = {l: i for i, l in enumerate(labels)}
+        tnodes, y = [], []
+        for s, t, l in diarization.itertracks(label=True):
+            tnodes.append(TrackNode(**{URI: u, MODALITY: m,
+                                       SEGMENT: s, TRACK: t}))
+            y.append(index[l])
+
+        G.add_nodes_from(tnodes)
+        G.add_edges_from(
+            (tnodes[i], tnodes[j], {PROBABILITY: p})
+            for i, j, p in _label_pair_edges(
+                np.array(y, dtype=int), probability, cooccurring,
+                threshold=self.threshold, nbest=self.nbest))
 
-        for i, n in enumerate(tnodes):
+        return G
 
-            G.add_node(n)
 
-            s = n.segment
-            t = n.track
-            l = diarization[s, t]
+def _label_pair_edges(y, probability, cooccurring, threshold=None, nbest=None):
+    """Track-to-track edges gathered from label-to-label matrices
 
-            for N in tnodes[i+1:]:
+    Parameters
+    ----------
+    y : (T, ) int array
+        Label index of each track
+    probability : (L, L) array
+        Label-to-label probability (NaN when not available)
+    cooccurring : (L, L) bool array
+        True for cooccurring labels
+    threshold : float, optional
+        Only keep soft edges with probability greater than `threshold`.
+    nbest : int, optional
+        Only keep soft edges among the `nbest` most probable ones of
+        at least one of their two tracks.
+        Edges between tracks with the same label or with cooccurring labels
+        are hard edges, whatever their probability: they are always kept.
+
+    Returns
+    -------
+    edges : list
+        (i, j, probability) list of edges between tracks i < j:
+        p=1 when tracks have the same label, p=0 when their labels are
+        cooccurring, label probability otherwise (no edge if not available).
+    """
 
-                S = N.segment
-                T = N.track
-                L = diarization[S, T]
+    # label-to-label probability, with hard constraints
+    Q = np.array(probability, dtype=float)
+    Q[cooccurring] = 0.
+    np.fill_diagonal(Q, 1.)
 
-                # if two tracks have the same label
-                # set probability to 1
-                if l == L:
-                    p = 1.
-                    k = False
-                # if two tracks are cooccurring
-                # set probability to 0
-                elif K[l, L] > 0:
-                    p = 0.
-                    k = True
-                # otherwise,
-                # try and get the probability from probability matrix
-                else:
-                    k = False
-                    try:
-                        p = P[l, L]
-                    except Exception, e:
-                        p = None
-
-                # if probability is not available, do not add any edge
-                if p is not None:
-                    G.add_edge(n, N, **{PROBABILITY: p})
+    # hard edges only depend on labels, not on probability values
+    # (which may be raw similarities outside [0, 1])
+    available = ~np.isnan(Q)
+    hard = np.array(cooccurring, dtype=bool)
+    np.fill_diagonal(hard, True)
+    soft = available & ~hard
 
-        return G
+    # soft edges below threshold are discarded
+    if threshold is not None:
+        with np.errstate(invalid='ignore'):
+            soft &= Q > threshold
+
+    T = len(y)
+    I, J = [], []
+
+    def upper(mask):
+        """(i, j) pairs of tracks i < j for which mask[y[i], y[j]] is True"""
+        # one vectorized pass per track (T x T matrix is never built)
+        for i in range(T - 1):
+            j = i + 1 + np.flatnonzero(mask[y[i], y[i+1:]])
+            I.append(np.repeat(i, len(j)))
+            J.append(j)
+
+    if nbest is None:
+        upper(hard | soft)
+
+    else:
+        # hard edges are always kept
+        upper(hard)
+
+        # keep soft edges among the `nbest` most probable ones
+        # of at least one of their two tracks
+        for i in range(T):
+            j = np.flatnonzero(soft[y[i], y])
+            j = j[j != i]
+            if len(j) > nbest:
+                best = np.argsort(-Q[y[i], y[j]], kind='mergesort')[:nbest]
+                j = j[best]
+            I.append(np.minimum(i, j))
+            J.append(np.maximum(i, j))
+
+    if not I:
+        return []
+
+    I = np.hstack(I).astype(int)
+    J = np.hstack(J).astype(int)
+
+    # remove duplicate edges
+    _, unique = np.unique(I * T + J, return_index=True)
+    I, J = I[unique], J[unique]
+
+    return zip(I, J, Q[y[I], y[J]])
+
+
+def _cooccurring_tracks(A, B, min_duration=0.):
+    """Sweep over two annotations at once
+
+    Equivalent to tagging the (non-overlapping) segmentation of the union of
+    both annotation timelines with each annotation (A >> timeline and
+    B >> timeline) but in a single ordered pass over all tracks.
+
+    Parameters
+    ----------
+    A, B : Annotation
+    min_duration : float, optional
+        Elementary segments shorter than `min_duration` are skipped.
+
+    Generates
+    ---------
+    segment : Segment
+        Elementary segment
+    tracks_A, tracks_B : dict
+        {(segment, track): label} dictionary of all tracks in A (resp. B)
+        intersecting elementary segment. Only elementary segments with at
+        least one track in both annotations are generated.
+    """
+
+    tracks = [list(A.itertracks(label=True)), list(B.itertracks(label=True))]
+
+    # all segment boundaries
+    boundaries = sorted(set(
+        t for _tracks in tracks for s, _, _ in _tracks for t in s))
+
+    # next track to start, active tracks and their end time heap
+    nexts = [0, 0]
+    active = [{}, {}]
+    ends = [[], []]
+
+    for start, end in itertools.izip(boundaries[:-1], boundaries[1:]):
+
+        for i in range(2):
+
+            # activate tracks starting now
+            # (itertracks is sorted by start time)
+            while (nexts[i] < len(tracks[i]) and
+                   tracks[i][nexts[i]][0].start <= start):
+                s, t, l = tracks[i][nexts[i]]
+                active[i][s, t] = l
+                heapq.heappush(ends[i], (s.end, nexts[i]))
+                nexts[i] += 1
+
+            # deactivate tracks that do not intersect current segment
+            while ends[i] and ends[i][0][0] - SEGMENT_PRECISION <= start:
+                _, n = heapq.heappop(ends[i])
+                s, t, _ = tracks[i][n]
+                del active[i][s, t]
+
+        segment = Segment(start=start, end=end)
+        if not segment or segment.duration <= min_duration:
+            continue
+
+        if active[0] and active[1]:
+            yield segment, active[0], active[1]
+
+
+class TrackCooccurrenceStatistics(object):
+    """Mergeable cross-modal track cooccurrence statistics
+
+    Statistics are accumulated in (Na, Nb)-indexed numpy histograms, where
+    Na (resp. Nb) is the number of cooccurring tracks in modality A (resp. B).
+
+    Statistics gathered on different files (possibly in different processes)
+    can be merged with `+`.
+
+    Parameters
+    ----------
+    min_duration : float, optional
+        Minimum duration of elementary segments used for estimation.
+
+    Attributes
+    ----------
+    possible_match : numpy array
+        possible_match[n, m] is the total possible match duration
+        when there are n A-tracks & m B-tracks
+    actual_match : numpy array
+        actual_match[n, m] is the total actual match duration
+        when there are n A-tracks & m B-tracks
+    overlap : numpy array
+        overlap[n, m] is the total duration
+        when there are n A-tracks & m B-tracks
+    """
+
+    def __init__(self, min_duration=0.):
+        super(TrackCooccurrenceStatistics, self).__init__()
+        self.min_duration = min_duration
+        self.possible_match = np.zeros((1, 1), dtype=np.float64)
+        self.actual_match = np.zeros((1, 1), dtype=np.float64)
+        self.overlap = np.zeros((1, 1), dtype=np.float64)
+
+    def _grow(self, shape):
+        """Make sure histograms are at least `shape` large"""
+        old_shape = self.overlap.shape
+        if all(o >= n for o, n in zip(old_shape, shape)):
+            return
+        shape = tuple(max(o, n) for o, n in zip(old_shape, shape))
+        for name in ['possible_match', 'actual_match', 'overlap']:
+            histogram = np.zeros(shape, dtype=np.float64)
+            histogram[:old_shape[0], :old_shape[1]] = getattr(self, name)
+            setattr(self, name, histogram)
+
+    def update(self, A, B):
+        """Accumulate statistics from one pair of annotations
+
+        Parameters
+        ----------
+        A, B : Annotation
+            Annotations of the same resource in both modalities
+
+        Returns
+        -------
+        self
+        """
+
+        Na, Nb, N, duration = [], [], [], []
+
+        for segment, tracks_A, tracks_B in _cooccurring_tracks(
+                A, B, min_duration=self.min_duration):
+            Na.append(len(tracks_A))
+            Nb.append(len(tracks_B))
+            # number of matching tracks
+            N.append(len(set(tracks_A.itervalues()) &
+                         set(tracks_B.itervalues())))
+            duration.append(segment.duration)
+
+        if not duration:
+            return self
+
+        Na, Nb = np.array(Na), np.array(Nb)
+        N, duration = np.array(N), np.array(duration)
+
+        self._grow((np.max(Na) + 1, np.max(Nb) + 1))
+        np.add.at(self.possible_match, (Na, Nb),
+                  np.minimum(Na, Nb) * duration)
+        np.add.at(self.actual_match, (Na, Nb), N * duration)
+        np.add.at(self.overlap, (Na, Nb), duration)
+
+        return self
+
+    def __add__(self, other):
+        merged = self.__class__(min_duration=self.min_duration)
+        merged._grow(self.overlap.shape)
+        merged._grow(other.overlap.shape)
+        for stats in [self, other]:
+            n, m = stats.overlap.shape
+            merged.possible_match[:n, :m] += stats.possible_match
+            merged.actual_match[:n, :m] += stats.actual_match
+            merged.overlap[:n, :m] += stats.overlap
+        return merged
+
+    def to_df(self, histogram):
+        """Convert histogram to DataFrame
+
+        (Na, Nb) configurations never seen are set to NaN and fully
+        unseen Na rows or Nb columns are removed.
+        """
+        data = np.where(self.overlap > 0, histogram, np.nan)
+        df = DataFrame(data=data)
+        return df.dropna(axis=0, how='all').dropna(axis=1, how='all')
+
+
+def _update_statistics(A, B, min_duration):
+    """Picklable helper for parallel TrackCooccurrenceGraph.fit"""
+    return TrackCooccurrenceStatistics(min_duration=min_duration).update(A, B)
 
 
 class TrackCooccurrenceGraph(object):
@@ -640,34 +894,22 @@ class TrackCooccurrenceGraph(object):
         self.modalityA = modalityA
         self.modalityB = modalityB
 
-    def _AB2ab(self, A, B):
-        """
-
-        Parameters
-        ----------
-        A : Annotation
-        B : Annotation
-
-        Returns
-        -------
-        timeline : Timeline
-        a : Annotation
-        b : Annotation
+    def _check(self, A, B):
+        """Check that A and B are annotations of the same resource"""
+        assert isinstance(A, Annotation), "%r is not an Annotation" % A
+        assert isinstance(B, Annotation), "%r is not an Annotation" % B
+        assert A.uri == B.uri, \
+            "resource mismatch (%r, %r)" % (A.uri, B.uri)
 
-        """
-        tl = (A.get_timeline().union(B.get_timeline())).segmentation()
-        tl = Timeline([s for s in tl if s.duration > self.min_duration],
-                      uri=tl.uri)
-        a = A >> tl
-        b = B >> tl
-        return tl, a, b
-
-    def fit(self, annotations):
+    def fit(self, annotations, n_jobs=1):
         """
 
         Parameters
         ----------
         annotations : (Annotation, Annotation) iterator
+        n_jobs : int, optional
+            Number of jobs used to gather statistics in parallel (one file
+            per job). Defaults to 1 (sequential).
 
         Returns
         -------
@@ -675,22 +917,32 @@ class TrackCooccurrenceGraph(object):
 
         """
 
-        # possible_match[n, m] is the total possible match duration
-        # when there are n A-tracks & m B-tracks
-        possible_match = DataFrame()
+        annotations = self._iter_checked(annotations)
+
+        statistics = TrackCooccurrenceStatistics(
+            min_duration=self.min_duration)
+
+        if n_jobs == 1:
+            for A, B in annotations:
+                statistics.update(A, B)
 
-        # actual_match[n, m] is the total actual match duration
-        # when there are n A-tracks & m B-tracks
-        actual_match = DataFrame()
+        else:
+            from joblib import Parallel, delayed
+            for stats in Parallel(n_jobs=n_jobs)(
+                delayed(_update_statistics)(A, B, self.min_duration)
+                for A, B in annotations
+            ):
+                statistics = statistics + stats
 
-        # overlap[n, m] is the total duration
-        # when there are n A-tracks & m B-tracks
-        overlap = DataFrame()
+        return self.fit_statistics(statistics)
+
+    def _iter_checked(self, annotations):
+        """Check (and iterate over) annotations lazily"""
 
         for n, (A, B) in enumerate(annotations):
 
-            assert isinstance(A, Annotation), "%r is not an Annotation" % A
-            assert isinstance(B, Annotation), "%r is not an Annotation" % B
+            self._check(A, B)
+
             if n == 0:
                 self.modalityA = A.modality
                 self.modalityB = B.modality
@@ -699,47 +951,28 @@ class TrackCooccurrenceGraph(object):
                     "bad modality (%r, %r)" % (self.modalityA, A.modality)
                 assert B.modality == self.modalityB, \
                     "bad modality (%r, %r)" % (self.modalityB, B.modality)
-            assert A.uri == B.uri, \
-                "resource mismatch (%r, %r)" % (A.uri, B.uri)
 
-            timeline, a, b = self._AB2ab(A, B)
+            yield A, B
 
-            for segment in timeline:
+    def fit_statistics(self, statistics):
+        """
 
-                duration = segment.duration
+        Parameters
+        ----------
+        statistics : TrackCooccurrenceStatistics
+            (Merged) statistics
 
-                # number of tracks
-                atracks = a.tracks(segment)
-                Na = len(atracks)
-                btracks = b.tracks(segment)
-                Nb = len(btracks)
+        Returns
+        -------
+        self
 
-                if Na == 0 or Nb == 0:
-                    continue
+        """
 
-                # number of matching tracks
-                N = len(a.get_labels(segment) & b.get_labels(segment))
-
-                # increment possible_match & actual_match
-                try:
-                    p_m = possible_match.get_value(Na, Nb)
-                    a_m = actual_match.get_value(Na, Nb)
-                    ovl = overlap.get_value(Na, Nb)
-                except Exception, e:
-                    p_m = 0.
-                    a_m = 0.
-                    ovl = 0.
-
-                possible_match = possible_match.set_value(Na, Nb,
-                                                          p_m + min(Na, Nb)*duration)
-                actual_match = actual_match.set_value(Na, Nb,
-                                                      a_m + N*duration)
-                overlap = overlap.set_value(Na, Nb, ovl + duration)
-
-        self.actual_match = actual_match
-        self.possible_match = possible_match
+        self.statistics = statistics
+        self.actual_match = statistics.to_df(statistics.actual_match)
+        self.possible_match = statistics.to_df(statistics.possible_match)
         self.raw_P = self.actual_match / self.possible_match
-        self.overlap = overlap
+        self.overlap = statistics.to_df(statistics.overlap)
 
         # make sure probability is smaller than 1.
         self.P = np.minimum(1-1e-6, self.raw_P)
@@ -761,10 +994,7 @@ class TrackCooccurrenceGraph(object):
 
         """
 
-        assert isinstance(A, Annotation), "%r is not an Annotation" % A
-        assert isinstance(B, Annotation), "%r is not an Annotation" % B
-
-        assert A.uri == B.uri, "resource mismatch (%r, %r)" % (A.uri, B.uri)
+        self._check(A, B)
 
         ma = A.modality
         mb = B.modality
@@ -776,41 +1006,38 @@ class TrackCooccurrenceGraph(object):
         G = MultimodalProbabilityGraph()
         u = A.uri
 
-        # Sub-tracks graph
-        # it contains only [ta] -- [tb] edges for cooccurring subtracks
-        # track names are kept unchanged
-        timeline, a, b = self._AB2ab(A, B)
+        # cross-modal probability for each (Na, Nb) configuration
+        # (NaN if either never seen before or not significant)
+        P = {(Na, Nb): p
+             for Na, row in self.P.iterrows()
+             for Nb, p in row.iteritems() if not np.isnan(p)}
 
-        for s in timeline:
+        edges = []
 
-            # Sub-tracks for current sub-segment and their number
-            subtracks_a = a.tracks(s)
-            Na = len(subtracks_a)
-            subtracks_b = b.tracks(s)
-            Nb = len(subtracks_b)
+        for s, tracks_A, tracks_B in _cooccurring_tracks(
+                A, B, min_duration=self.min_duration):
 
-            # if one modality does not have any track, go to next segment
-            if Na == 0 or Nb == 0:
-                continue
+            # number of tracks in both modalities for current sub-segment
+            Na = len(tracks_A)
+            Nb = len(tracks_B)
 
             # if one modality has more than one coocurring track
             # and option only1x1 is ON, go to next segment
             if only1x1 and (Na != 1 or Nb != 1):
                 continue
 
-            # if cross-modal probability is not available for this configuration
-            # (either never seen before or not significant), go to next segment
-            try:
-                probability = self.P.get_value(Na, Nb)
-                assert not np.isnan(probability)
-            except Exception, e:
+            # if cross-modal probability is not available for this
+            # configuration, go to next segment
+            probability = P.get((Na, Nb), None)
+            if probability is None:
                 continue
 
-            for sA, tA in A.crop(s, mode='loose').itertracks():
-                node_A = TrackNode(u, ma, sA, tA)
-                for sB, tB in B.crop(s, mode='loose').itertracks():
-                    node_B = TrackNode(u, mb, sB, tB)
-                    G.add_edge(node_A, node_B, **{PROBABILITY: probability})
+            edges.extend(
+                (TrackNode(u, ma, sA, tA), TrackNode(u, mb, sB, tB),
+                 {PROBABILITY: probability})
+                for sA, tA in tracks_A for sB, tB in tracks_B)
+
+        G.add_edges_from(edges)
 
         return G
 
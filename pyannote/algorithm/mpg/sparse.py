@@ -0,0 +1,485 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2013 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compact (scipy.sparse) representation of probability graphs
+
+Nodes are stored as a list (their position is their integer index) and edge
+probabilities as an upper-triangular CSR matrix. Explicit zeros are kept on
+purpose: a p=0 edge (e.g. a cooccurrence constraint) is not the same thing as
+a missing edge.
+"""
+
+import itertools
+import numpy as np
+import networkx as nx
+import scipy.sparse
+from scipy.sparse.csgraph import connected_components
+
+PROBABILITY = 'probability'
+
+
+def _upper_csr(n, rows, cols, data):
+    """Build upper-triangular CSR matrix from (possibly redundant) edges
+
+    Parameters
+    ----------
+    n : int
+        Number of nodes
+    rows, cols : (E, ) int arrays
+        Edge end points (in any order)
+    data : (E, ) float array
+        Edge probabilities. In case the same edge appears more than once,
+        the last value wins (just like repeated nx.Graph.add_edge calls).
+
+    Returns
+    -------
+    matrix : (n, n) scipy.sparse.csr_matrix
+        Upper-triangular matrix (with explicit zeros and no self-loop)
+    """
+
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    data = np.asarray(data, dtype=np.float64)
+
+    # store each edge only once (i < j)
+    rows, cols = np.minimum(rows, cols), np.maximum(rows, cols)
+    keep = rows != cols
+    rows, cols, data = rows[keep], cols[keep], data[keep]
+
+    # sort edges by (row, column) while keeping the last duplicate
+    key = rows * n + cols
+    order = np.argsort(key, kind='mergesort')
+    key = key[order]
+    last = np.ones(len(key), dtype=bool)
+    last[:-1] = key[1:] != key[:-1]
+    order = order[last]
+    rows, cols, data = rows[order], cols[order], data[order]
+
+    # edges are already sorted: build CSR structure directly
+    # (going through COO would lose explicit zeros)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+
+    return scipy.sparse.csr_matrix((data, cols, indptr), shape=(n, n))
+
+
+def _indicator(labels, n_labels):
+    """(len(labels), n_labels) sparse indicator matrix"""
+    n = len(labels)
+    return scipy.sparse.csr_matrix(
+        (np.ones(n), (np.arange(n), labels)), shape=(n, n_labels))
+
+
+class SparseProbabilityGraph(object):
+    """Compact probability graph
+
+    Drop-in storage for `MultimodalProbabilityGraph` and
+    `PersonInstanceGraph` when the number of edges becomes too large for
+    networkx dictionaries.
+
+    Parameters
+    ----------
+    nodes : iterable, optional
+        Graph nodes (any hashable objects). Node n is indexed by its position.
+    probability : scipy.sparse matrix, optional
+        (len(nodes), len(nodes)) edge probability matrix. Only its upper
+        triangular part is used.
+    node_data : dict, optional
+        {node: attribute dictionary} for nodes with attributes.
+
+    Examples
+    --------
+
+        >>> sparse = SparseProbabilityGraph.from_graph(mpg)
+        >>> sparse.propagate_constraints()
+        >>> for component in sparse.subgraphs_iter(threshold=0.):
+        ...     g = component.to_graph(create_using=MultimodalProbabilityGraph())
+
+    """
+
+    @classmethod
+    def from_edges(cls, nodes, edges, node_data=None):
+        """
+
+        Parameters
+        ----------
+        nodes : iterable
+        edges : iterable
+            (node, other_node, probability) iterable
+        node_data : dict, optional
+
+        Returns
+        -------
+        graph : SparseProbabilityGraph
+        """
+        nodes = list(nodes)
+        index = {node: i for i, node in enumerate(nodes)}
+
+        rows, cols, data = [], [], []
+        for e, f, p in edges:
+            rows.append(index[e])
+            cols.append(index[f])
+            data.append(p)
+
+        probability = _upper_csr(len(nodes), rows, cols, data)
+        return cls(nodes=nodes, probability=probability, node_data=node_data)
+
+    @classmethod
+    def from_graph(cls, g):
+        """
+
+        Parameters
+        ----------
+        g : nx.Graph
+            Probability graph (e.g. `MultimodalProbabilityGraph`)
+            with a 'probability' attribute on every edge.
+
+        Returns
+        -------
+        graph : SparseProbabilityGraph
+        """
+        node_data = {n: dict(d) for n, d in g.nodes_iter(data=True) if d}
+        edges = ((e, f, d[PROBABILITY])
+                 for e, f, d in g.edges_iter(data=True))
+        return cls.from_edges(g.nodes_iter(), edges, node_data=node_data)
+
+    def __init__(self, nodes=None, probability=None, node_data=None):
+        super(SparseProbabilityGraph, self).__init__()
+
+        self._nodes = [] if nodes is None else list(nodes)
+        self._index = {node: i for i, node in enumerate(self._nodes)}
+        if len(self._index) != len(self._nodes):
+            raise ValueError('duplicate nodes.')
+
+        n = len(self._nodes)
+
+        if probability is None:
+            probability = scipy.sparse.csr_matrix((n, n), dtype=np.float64)
+
+        elif probability.shape != (n, n):
+            raise ValueError(
+                'probability matrix shape %r does not match number '
+                'of nodes (%d).' % (probability.shape, n))
+
+        else:
+            probability = scipy.sparse.triu(probability, k=1).tocsr()
+            probability.sort_indices()
+
+        self._probability = probability
+        self._csc = None
+
+        self.node_data = {} if node_data is None else dict(node_data)
+
+    # ------------------------------------------------------------------------
+    # networkx-compatible (read-only) view
+    # ------------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __contains__(self, node):
+        return node in self._index
+
+    def nodes(self):
+        return list(self._nodes)
+
+    def nodes_iter(self, data=False):
+        if data:
+            return ((n, self.node_data.get(n, {})) for n in self._nodes)
+        return iter(self._nodes)
+
+    def number_of_nodes(self):
+        return len(self._nodes)
+
+    def number_of_edges(self):
+        return self._probability.nnz
+
+    def index(self, node):
+        """Integer index of `node`"""
+        return self._index[node]
+
+    def _edges(self):
+        """(rows, columns, probabilities) arrays of upper-triangular edges"""
+        P = self._probability
+        rows = np.repeat(np.arange(P.shape[0]), np.diff(P.indptr))
+        return rows, P.indices, P.data
+
+    def edges_iter(self, data=False):
+        nodes = self._nodes
+        rows, cols, probability = self._edges()
+        if data:
+            for i, j, p in itertools.izip(rows, cols, probability):
+                yield nodes[i], nodes[j], {PROBABILITY: p}
+        else:
+            for i, j in itertools.izip(rows, cols):
+                yield nodes[i], nodes[j]
+
+    def edges(self, data=False):
+        return list(self.edges_iter(data=data))
+
+    def _get(self, i, j):
+        """Position of edge (i, j) in CSR data array, or None"""
+        if i > j:
+            i, j = j, i
+        P = self._probability
+        start, end = P.indptr[i], P.indptr[i+1]
+        k = start + np.searchsorted(P.indices[start:end], j)
+        if k < end and P.indices[k] == j:
+            return k
+        return None
+
+    def has_edge(self, e, f):
+        try:
+            k = self._get(self._index[e], self._index[f])
+        except KeyError:
+            return False
+        return k is not None
+
+    def get_probability(self, e, f):
+        """Probability of edge (e, f), NaN if there is no such edge"""
+        k = self._get(self._index[e], self._index[f])
+        if k is None:
+            return np.nan
+        return self._probability.data[k]
+
+    def __getitem__(self, node):
+        """Adjacency dictionary {neighbor: {'probability': p}}"""
+
+        i = self._index[node]
+
+        # neighbors with larger index are found in row i...
+        P = self._probability
+        start, end = P.indptr[i], P.indptr[i+1]
+        neighbors = {self._nodes[j]: {PROBABILITY: p}
+                     for j, p in itertools.izip(P.indices[start:end],
+                                                P.data[start:end])}
+
+        # ... neighbors with smaller index are found in column i
+        if self._csc is None:
+            self._csc = P.tocsc()
+        Q = self._csc
+        start, end = Q.indptr[i], Q.indptr[i+1]
+        neighbors.update({self._nodes[j]: {PROBABILITY: p}
+                          for j, p in itertools.izip(Q.indices[start:end],
+                                                     Q.data[start:end])})
+
+        return neighbors
+
+    def neighbors(self, node):
+        return list(self[node])
+
+    def to_graph(self, create_using=None):
+        """Convert to networkx graph
+
+        Parameters
+        ----------
+        create_using : nx.Graph, optional
+            Graph to fill (e.g. an empty `MultimodalProbabilityGraph`).
+            Defaults to an empty nx.Graph.
+
+        Returns
+        -------
+        g : nx.Graph
+        """
+        g = nx.Graph() if create_using is None else create_using
+        g.add_nodes_from(self.nodes_iter(data=True))
+        g.add_edges_from(self.edges_iter(data=True))
+        return g
+
+    # ------------------------------------------------------------------------
+
+    def copy(self):
+        return self.__class__(nodes=self._nodes,
+                              probability=self._probability.copy(),
+                              node_data=self.node_data)
+
+    def subgraph(self, nbunch):
+        """Induced subgraph
+
+        Parameters
+        ----------
+        nbunch : iterable
+            Nodes
+
+        Returns
+        -------
+        subgraph : SparseProbabilityGraph
+        """
+        indices = np.sort([self._index[n] for n in nbunch]).astype(np.int64)
+        return self._subgraph(indices)
+
+    def _subgraph(self, indices):
+
+        n = len(self._nodes)
+        rows, cols, probability = self._edges()
+
+        # new index of each node (-1 if not in subgraph)
+        new = -np.ones(n, dtype=np.int64)
+        new[indices] = np.arange(len(indices))
+
+        # sub-matrix is built by hand because scipy.sparse fancy indexing
+        # would drop explicit zeros (p=0 edges)
+        keep = (new[rows] >= 0) & (new[cols] >= 0)
+        probability = _upper_csr(len(indices), new[rows[keep]],
+                                 new[cols[keep]], probability[keep])
+
+        return self._from_indices(indices, probability)
+
+    def _from_indices(self, indices, probability):
+        nodes = [self._nodes[i] for i in indices]
+        node_data = {n: self.node_data[n]
+                     for n in nodes if n in self.node_data}
+        return self.__class__(nodes=nodes, probability=probability,
+                              node_data=node_data)
+
+    def _components(self, mask):
+        """Connected components over edges selected by `mask`
+
+        Returns
+        -------
+        n_components : int
+        labels : (n_nodes, ) int array
+        """
+        n = len(self._nodes)
+        rows, cols, _ = self._edges()
+        graph = scipy.sparse.csr_matrix(
+            (np.ones(np.sum(mask)), (rows[mask], cols[mask])), shape=(n, n))
+        return connected_components(graph, directed=False)
+
+    def propagate_constraints(self):
+        """Propagate p=0 and p=1 probabilities edges
+
+        Every two nodes in the same p=1 connected component get a p=1 edge,
+        and every two nodes in (different) components connected by at least
+        one p=0 edge get a p=0 edge.
+
+        Conflicting p=0 edges (between two nodes of the same p=1 component)
+        become p=1 edges. This is also what
+        `MultimodalProbabilityGraph.propagate_constraints` does, as
+        nx.blockmodel ignores edges within a component.
+        """
+
+        n = len(self._nodes)
+        rows, cols, probability = self._edges()
+
+        # p=1 connected components
+        n_components, labels = self._components(probability == 1)
+        M = _indicator(labels, n_components)
+
+        # propagated p=1 constraints (pairs of nodes in the same component)
+        p1 = scipy.sparse.triu(M * M.T, k=1).tocoo()
+
+        # propagated p=0 constraints
+        # (pairs of nodes in components connected by p=0 edges)
+        # p=0 edges within a p=1 component are conflicting: p=1 wins
+        # (they do not propagate and are overwritten by p=1 constraints)
+        zero = probability == 0
+        a, b = labels[rows[zero]], labels[cols[zero]]
+        a, b = a[a != b], b[a != b]
+        Z = scipy.sparse.csr_matrix(
+            (np.ones(2 * len(a)), (np.hstack([a, b]), np.hstack([b, a]))),
+            shape=(n_components, n_components))
+        p0 = scipy.sparse.triu(M * Z * M.T, k=1).tocoo()
+
+        # just like successive add_edge calls: original edges,
+        # then p=1 constraints, then p=0 constraints (last one wins)
+        self._probability = _upper_csr(
+            n,
+            np.hstack([rows, p1.row, p0.row]),
+            np.hstack([cols, p1.col, p0.col]),
+            np.hstack([probability, np.ones(p1.nnz), np.zeros(p0.nnz)]))
+        self._csc = None
+
+        return self
+
+    def subgraphs_iter(self, threshold=0.):
+        """Iterate over connected components
+
+        Components are computed on edges with probability strictly greater
+        than `threshold`. Yielded subgraphs still contain all edges between
+        their nodes.
+
+        Parameters
+        ----------
+        threshold : float, optional
+            Defaults to 0.
+
+        Generates
+        ---------
+        subgraph : SparseProbabilityGraph
+        """
+
+        rows, cols, probability = self._edges()
+        n_components, labels = self._components(probability > threshold)
+
+        # group node indices by component (stable, hence sorted)
+        order = np.argsort(labels, kind='mergesort')
+        sizes = np.bincount(labels, minlength=n_components)
+        boundaries = np.cumsum(sizes)
+
+        # local index of each node within its own component
+        local = np.empty(len(order), dtype=np.int64)
+        local[order] = np.arange(len(order)) - np.repeat(boundaries - sizes,
+                                                         sizes)
+
+        # group edges by component
+        # (edges between two components are not part of any subgraph)
+        inside = labels[rows] == labels[cols]
+        rows, cols, probability = rows[inside], cols[inside], probability[inside]
+        edge_order = np.argsort(labels[rows], kind='mergesort')
+        rows, cols, probability = (rows[edge_order], cols[edge_order],
+                                   probability[edge_order])
+        edge_boundaries = np.cumsum(np.bincount(labels[rows],
+                                                minlength=n_components))
+
+        start, edge_start = 0, 0
+        for size, end, edge_end in itertools.izip(sizes, boundaries,
+                                                  edge_boundaries):
+            matrix = _upper_csr(size,
+                                local[rows[edge_start:edge_end]],
+                                local[cols[edge_start:edge_end]],
+                                probability[edge_start:edge_end])
+            yield self._from_indices(order[start:end], matrix)
+            start, edge_start = end, edge_end
+
+    def map(self, func):
+        """
+
+        Parameters
+        ----------
+        func : function
+            Vectorized function applied to the array of edge probabilities.
+            In case func(p) is NaN or inf, the correspond edge is removed.
+
+        Returns
+        -------
+        mapped : SparseProbabilityGraph
+        """
+        rows, cols, probability = self._edges()
+        mapped = np.asarray(func(probability), dtype=np.float64)
+        finite = np.isfinite(mapped)
+        matrix = _upper_csr(len(self._nodes),
+                            rows[finite], cols[finite], mapped[finite])
+        return self.__class__(nodes=self._nodes, probability=matrix,
+                              node_data=self.node_data)
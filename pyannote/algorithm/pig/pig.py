@@ -18,6 +18,7 @@
 #     You should have received a copy of the GNU General Public License
 #     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
 
+import itertools
 import numpy as np
 import networkx as nx
 from vertex import InstanceVertex, IdentityVertex
@@ -28,6 +29,61 @@ PROBABILITY_ONE = 1
 PROBABILITY_ZERO = 0
 
 
+def _cooccurring_segments(timeline):
+    """Generate all pairs of intersecting segments in one sweep
+
+    Unlike `timeline.co_iter(timeline)`, each unordered pair is generated
+    only once. Segments are visited in their natural (sorted) order, while
+    keeping track of the ones that are still "active".
+
+    Parameters
+    ----------
+    timeline : `Timeline`
+
+    Generates
+    ---------
+    segment, other_segment
+        Pairs of intersecting segments (including each segment with itself).
+    """
+
+    active = []
+
+    for segment in timeline:
+
+        # segments are sorted by start time: any active segment that does not
+        # intersect current segment will never intersect any later one.
+        active = [other for other in active if other.intersects(segment)]
+
+        for other in active:
+            yield other, segment
+
+        yield segment, segment
+
+        active.append(segment)
+
+
+def _matrix_edges(rows, columns, values):
+    """(row, column, {PROBABILITY: value}) edges for all non-NaN values
+
+    Parameters
+    ----------
+    rows, columns : list
+        Row and column vertices
+    values : (len(rows), len(columns)) numpy array
+
+    Returns
+    -------
+    edges : list
+        Edges in the same order as LabelMatrix.itervalues()
+    """
+    values = np.asarray(values, dtype=np.float)
+    I, J = np.nonzero(~np.isnan(values))
+    return [
+        (rows[i], columns[j], {PROBABILITY: p})
+        for i, j, p in itertools.izip(I, J, values[I, J])
+    ]
+
+
 class PersonInstanceGraph(nx.Graph):
     """Person Instance Graph"""
 
@@ -105,52 +161,45 @@ class PersonInstanceGraph(nx.Graph):
 
         # Add identity vertices (one par label)
         if identity_vertex:
-
-            for label in annotation.labels():
-                i = IdentityVertex(identity=label)
-                self.add_node(i)
+            self.add_nodes_from(
+                IdentityVertex(identity=label)
+                for label in annotation.labels())
+
+        # One instance vertex per track, grouped by segment.
+        # Vertices are built once and shared by all kinds of edges.
+        vertices = {}
+        labels = {}
+        for segment, track, label in annotation.itertracks(label=True):
+            v = InstanceVertex(
+                segment=segment, track=track, modality=modality, uri=uri
+            )
+            vertices.setdefault(segment, []).append(v)
+            labels[v] = label
 
         # Add instance vertices (one per track)
         if instance_vertex:
-
-            for segment, track in annotation.itertracks():
-                v = InstanceVertex(
-                    segment=segment, track=track, modality=modality, uri=uri
-                )
-                self.add_node(v)
+            self.add_nodes_from(labels)
 
         # Add identification edges (one per (track, label) pair)
         if identification_edge:
-
-            for segment, track, label in annotation.itertracks(label=True):
-
-                v = InstanceVertex(
-                    segment=segment, track=track, modality=modality, uri=uri
-                )
-                i = IdentityVertex(identity=label)
-
-                self.add_edge(v, i, {PROBABILITY: PROBABILITY_ONE})
+            edges = [(v, IdentityVertex(identity=label))
+                     for v, label in labels.iteritems()]
+            self.add_edges_from(edges, {PROBABILITY: PROBABILITY_ONE})
 
         # Add cooccurrence edges (one per pair of cooccurring tracks)
         if cooccurrence_edge:
 
-            for segment, track in annotation.itertracks():
-
-                v = InstanceVertex(
-                    segment=segment, track=track, modality=modality, uri=uri
-                )
-
-                # Loop on cooccurring tracks
-                for s, t in annotation.crop(segment, mode='loose').itertracks():
-
-                    w = InstanceVertex(
-                        segment=s, track=t, modality=modality, uri=uri
-                    )
-
-                    # Prevent loop edges from being added to the graph
-                    # (even though every track does cooccur with itself...)
-                    if v != w:
-                        self.add_edge(v, w, {PROBABILITY: PROBABILITY_ZERO})
+            edges = [
+                (v, w)
+                for segment, other_segment in _cooccurring_segments(
+                    annotation.get_timeline())
+                for v, w in itertools.product(vertices[segment],
+                                              vertices[other_segment])
+                # Prevent loop edges from being added to the graph
+                # (even though every track does cooccur with itself...)
+                if v != w
+            ]
+            self.add_edges_from(edges, {PROBABILITY: PROBABILITY_ZERO})
 
         return self
 
@@ -171,19 +220,22 @@ class PersonInstanceGraph(nx.Graph):
         uri = scores.uri
         modality = scores.modality
 
-        for segment, track, label, probability in scores.itervalues():
-
-            # Make sure the score is actually a probabiliy
-            assert 0 <= probability and probability <= 1
-
-            v = InstanceVertex(
-                segment=segment, track=track, modality=modality, uri=uri
+        edges = [
+            (
+                InstanceVertex(
+                    segment=segment, track=track, modality=modality, uri=uri),
+                IdentityVertex(identity=label),
+                {PROBABILITY: probability}
             )
+            for segment, track, label, probability in scores.itervalues()
+        ]
 
-            i = IdentityVertex(identity=label)
+        # Make sure scores are actually probabilities
+        probabilities = np.array([data[PROBABILITY] for _, _, data in edges])
+        assert np.all((0 <= probabilities) & (probabilities <= 1))
 
-            # Add the edge between current (track, label) pair
-            self.add_edge(v, i, {PROBABILITY: probability})
+        # Add all edges between (track, label) pairs at once
+        self.add_edges_from(edges)
 
         return self
 
@@ -207,12 +259,16 @@ class PersonInstanceGraph(nx.Graph):
         if calibration is not None:
             matrix = calibration.apply(matrix)
 
-        for (s1, t1), (s2, t2), p in matrix.itervalues():
-            v1 = InstanceVertex(
-                segment=s1, track=t1, modality=modality, uri=uri)
-            v2 = InstanceVertex(
-                segment=s2, track=t2, modality=modality, uri=uri)
-            self.add_edge(v1, v2, {PROBABILITY: p})
+        rows = [
+            InstanceVertex(segment=s, track=t, modality=modality, uri=uri)
+            for s, t in matrix.get_rows()
+        ]
+        columns = [
+            InstanceVertex(segment=s, track=t, modality=modality, uri=uri)
+            for s, t in matrix.get_columns()
+        ]
+
+        self.add_edges_from(_matrix_edges(rows, columns, matrix.df.values))
 
         return self
 
@@ -225,19 +281,17 @@ class PersonInstanceGraph(nx.Graph):
             Affinity matrix indexed by instance vertices
         """
 
+        rows = matrix.get_rows()
+        columns = matrix.get_columns()
+
         # Make sure rows are instance vertices
-        assert all(
-            [isinstance(v, InstanceVertex) for v in matrix.get_rows()]
-        )
+        assert all([isinstance(v, InstanceVertex) for v in rows])
         # Make sure columns are instance vertices
-        assert all(
-            [isinstance(w, InstanceVertex) for w in matrix.get_columns()]
-        )
+        assert all([isinstance(w, InstanceVertex) for w in columns])
 
         # Add affinity edges between instance vertices
-        # (note: LabelMatrix.itervalues() does not yiel NaN values)
-        for v, w, p in matrix.itervalues():
-            self.add_edge(v, w, {PROBABILITY: p})
+        # (note: NaN values are skipped, just like LabelMatrix.itervalues())
+        self.add_edges_from(_matrix_edges(rows, columns, matrix.df.values))
 
         return self
 
@@ -24,6 +24,7 @@ import pickle
 import datetime
 import itertools
 from pyannote.algorithm.segmentation import SegmentationGaussianDivergence
+from pyannote.feature.cache import get_cache
 
 
 class SpeechActivityDetection(object):
@@ -51,8 +52,9 @@ class SpeechActivityDetection(object):
         (in seconds). Defaults to 250ms.
     feature : optional
         Defaults to MFCC with 12 coefficients, their delta, and delta energy.
-    cache : bool, optional
+    cache : bool, str or FeatureCache, optional
         Whether to cache feature extraction (True) or not (False).
+        Use a path (or a FeatureCache) to choose the cache directory.
         Defaults to False.
     """
 
@@ -72,25 +74,23 @@ class SpeechActivityDetection(object):
         self.hmm = hmm
         self.hmm.min_duration = min_duration
 
-        # default features for speech activity detection
-        # are MFCC (12 coefficients + delta coefficient + delta energy)
         if feature is None:
-            from pyannote.feature.yaafe import YaafeMFCC
-            feature = YaafeMFCC(e=False, coefs=12, De=True, D=True)
+            feature = self.default_feature()
         self.feature = feature
 
-        if cache:
+        # persistent feature extraction cache
+        self.cache = get_cache(cache)
 
-            # initialize cache
-            from joblib import Memory
-            from tempfile import mkdtemp
-            memory = Memory(cachedir=mkdtemp(), verbose=0)
-
-            # cache feature extraction method
-            self.get_features = memory.cache(self.get_features)
+    @classmethod
+    def default_feature(cls):
+        """MFCC (12 coefficients + delta coefficient + delta energy)"""
+        from pyannote.feature.yaafe import YaafeMFCC
+        return YaafeMFCC(e=False, coefs=12, De=True, D=True)
 
     def get_features(self, wav):
-        return self.feature.extract(wav)
+        if self.cache is None:
+            return self.feature.extract(wav)
+        return self.cache.extract(self.feature, wav)
 
     def fit(self, reference, wav=None, features=None):
         """
@@ -191,7 +191,7 @@ class SpeechActivityDetection(object):
         Parameters
         ----------
         path : str
-        cache : bool, optional
+        cache : bool, str or FeatureCache, optional
             Whether to cache feature extraction (True) or not (False).
             Defaults to False.
         """
@@ -231,8 +231,9 @@ class SpeechTurnSegmentation(object):
     threshold : float, optional
     feature : optional
         Defaults to MFCC with 12 coefficients + energy.
-    cache : bool, optional
+    cache : bool, str or FeatureCache, optional
         Whether to cache feature extraction (True) or not (False).
+        Use a path (or a FeatureCache) to choose the cache directory.
         Defaults to False.
     """
 
@@ -256,28 +257,26 @@ class SpeechTurnSegmentation(object):
 
             self.segmentation = segmentation
 
-        # default features for segmentation
-        # are MFCC (energy + 12 coefficients)
         if feature is None:
-            from pyannote.feature.yaafe import YaafeMFCC
-            feature = YaafeMFCC(
-                e=True, De=False, DDe=False,
-                coefs=12, D=False, DD=False
-            )
+            feature = self.default_feature()
         self.feature = feature
 
-        if cache:
+        # persistent feature extraction cache
+        self.cache = get_cache(cache)
 
-            # initialize cache
-            from joblib import Memory
-            from tempfile import mkdtemp
-            memory = Memory(cachedir=mkdtemp(), verbose=0)
-
-            # cache feature extraction method
-            self.get_features = memory.cache(self.get_features)
+    @classmethod
+    def default_feature(cls):
+        """MFCC (energy + 12 coefficients)"""
+        from pyannote.feature.yaafe import YaafeMFCC
+        return YaafeMFCC(
+            e=True, De=False, DDe=False,
+            coefs=12, D=False, DD=False
+        )
 
     def get_features(self, wav):
-        return self.feature.extract(wav)
+        if self.cache is None:
+            return self.feature.extract(wav)
+        return self.cache.extract(self.feature, wav)
 
     def apply(self, wav=None, features=None, speech=None):
         """Perform speech turn segmentation
@@ -343,7 +342,7 @@ class SpeechTurnSegmentation(object):
         Parameters
         ----------
         path : str
-        cache : bool, optional
+        cache : bool, str or FeatureCache, optional
             Whether to cache feature extraction (True) or not (False).
             Defaults to False.
         """
@@ -380,8 +379,9 @@ class SpeakerIdentification(object):
     feature : optional
         Defaults to MFCC with 13 coefficients, their delta, delta delta,
         delta energy and delta delta energy
-    cache : bool, optional
+    cache : bool, str or FeatureCache, optional
         Whether to cache feature extraction (True) or not (False).
+        Use a path (or a FeatureCache) to choose the cache directory.
         Defaults to False.
     """
 
@@ -395,26 +395,12 @@ class SpeakerIdentification(object):
 
         self.gmm_ubm = gmm_ubm
 
-        # default features for speaker identification are MFCC
-        # 13 coefs + delta coefs  + delta delta coefs
-        #          + delta energy + delta delta energy
         if feature is None:
-            from pyannote.feature.yaafe import YaafeMFCC
-            feature = YaafeMFCC(
-                e=False, De=True, DDe=True,
-                coefs=13, D=True, DD=True
-            )
+            feature = self.default_feature()
         self.feature = feature
 
-        if cache:
-
-            # initialize cache
-            from joblib import Memory
-            from tempfile import mkdtemp
-            memory = Memory(cachedir=mkdtemp(), verbose=0)
-
-            # cache feature extraction method
-            self.get_features = memory.cache(self.get_features)
+        # persistent feature extraction cache
+        self.cache = get_cache(cache)
 
     @property
     def equal_priors(self):
@@ -432,8 +418,20 @@ class SpeakerIdentification(object):
     def open_set(self, value):
         self.gmm_ubm.open_set = value
 
+    @classmethod
+    def default_feature(cls):
+        """MFCC (13 coefficients + delta coefficients + delta delta
+        coefficients + delta energy + delta delta energy)"""
+        from pyannote.feature.yaafe import YaafeMFCC
+        return YaafeMFCC(
+            e=False, De=True, DDe=True,
+            coefs=13, D=True, DD=True
+        )
+
     def get_features(self, wav):
-        return self.feature.extract(wav)
+        if self.cache is None:
+            return self.feature.extract(wav)
+        return self.cache.extract(self.feature, wav)
 
     def fit(self, reference, wav=None, features=None):
         """
@@ -532,7 +530,7 @@ class SpeakerIdentification(object):
         Parameters
         ----------
         path : str
-        cache : bool, optional
+        cache : bool, str or FeatureCache, optional
             Whether to cache feature extraction (True) or not (False).
             Defaults to False.
         """
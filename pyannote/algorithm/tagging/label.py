@@ -80,6 +80,12 @@ class LabelTagger(BaseTagger):
 
         # get many-to-one label mapping
         mapping = ManyToOneMapping.fromMapping(self.__mapper(target, source))
+
+        # do the actual translation
+        return self._translate(target, mapping)
+
+    def _translate(self, target, mapping):
+
         # we only want to translate labels for which a mapping label was found.
         # the other labels are left unchanged.
         label_func = lambda x: mapping(x) if mapping(x) else x
@@ -88,6 +94,49 @@ class LabelTagger(BaseTagger):
         return target.translate(label_func)
         # return target.copy(label_func=label_func)
 
+    def batch(self, pairs, cross_file=False, n_jobs=1):
+        """Tag many targets at once
+
+        Parameters
+        ----------
+        pairs : iterable
+            (source, target) annotations iterable (typically, one per file)
+        cross_file : bool, optional
+            When True, one global mapping between target and source labels
+            is computed over all pairs (labels being shared across files).
+            Defaults to False (one mapping per pair).
+        n_jobs : int, optional
+            Number of jobs used to process pairs in parallel.
+            Defaults to 1 (sequential).
+
+        Returns
+        -------
+        tagged : list
+            Tagged targets, in the same order as `pairs`.
+
+        See Also
+        --------
+        :meth:`pyannote.algorithm.mapping.base.BaseMapper.batch`
+        :meth:`pyannote.algorithm.mapping.base.BaseMapper.cross_file`
+
+        """
+
+        pairs = [self._check(source, target) for source, target in pairs]
+        reversed_pairs = [(target, source) for source, target in pairs]
+
+        # get many-to-one label mappings
+        if cross_file:
+            mapping = ManyToOneMapping.fromMapping(
+                self.__mapper.cross_file(reversed_pairs, n_jobs=n_jobs))
+            mappings = [mapping] * len(pairs)
+        else:
+            mappings = [ManyToOneMapping.fromMapping(mapping)
+                        for mapping in self.__mapper.batch(reversed_pairs,
+                                                           n_jobs=n_jobs)]
+
+        return [self._translate(target, mapping)
+                for (_, target), mapping in zip(pairs, mappings)]
+
 
 class HungarianTagger(LabelTagger):
     """Label tagging based on the Hungarian label mapping algorithm.
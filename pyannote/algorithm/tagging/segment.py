@@ -23,7 +23,125 @@ Module ``pyannote.algorithm.tagging.segment``
 provides segment-wise tagging algorithms.
 """
 
+import operator
 from base import BaseTagger
+from pyannote.base.annotation import Unknown
+from pyannote.profiling import profiled
+
+
+def _intersecting_tracks(source, segments):
+    """Sweep over source tracks and (sorted) target segments at once
+
+    Equivalent to calling source.crop(segment, mode='loose') for every
+    target segment, but in a single ordered pass over source segments.
+
+    Parameters
+    ----------
+    source : Annotation
+    segments : iterable
+        Sorted target segments
+
+    Generates
+    ---------
+    segment : Segment
+        Target segment
+    intersecting : list
+        Sorted list of (source_segment, {track: label}) for all source
+        segments intersecting target segment. Target segments without any
+        intersecting source segment are skipped.
+    """
+
+    # source segments are sorted by start time
+    sources = list(source._tracks.items())
+    n_sources = len(sources)
+    n = 0
+
+    # source segments that may intersect current (or next) target segment
+    active = []
+
+    for segment in segments:
+
+        # activate source segments starting before target segment ends
+        while n < n_sources and sources[n][0].start < segment.end:
+            active.append(sources[n])
+            n += 1
+
+        # deactivate source segments ending before target segment starts
+        # (next target segments start even later)
+        active = [(s, t) for s, t in active if s.end > segment.start]
+
+        intersecting = [(s, t) for s, t in active if s.intersects(segment)]
+        if intersecting:
+            yield segment, intersecting
+
+
+def _duration(segments):
+    """Duration of coverage of (possibly overlapping) segments
+
+    Same as Timeline(segments).duration()
+    """
+
+    segments = sorted(set(s for s in segments if s))
+    if not segments:
+        return 0.
+
+    coverage = []
+    new_segment = segments[0]
+    for segment in segments:
+        if not (segment ^ new_segment):
+            new_segment |= segment
+        else:
+            coverage.append(new_segment)
+            new_segment = segment
+    coverage.append(new_segment)
+
+    return sum([s.duration for s in coverage])
+
+
+def _argmax(labels, durations, known_first=False):
+    """Same as Annotation.argmax(segment) with precomputed durations
+
+    Parameters
+    ----------
+    labels : list
+        Candidate labels, sorted by their string representation
+    durations : dict
+        Intersection duration of each label with target segment
+    known_first : bool, optional
+        See Annotation.argmax
+
+    Returns
+    -------
+    label : any existing label or None
+    """
+
+    if not labels:
+        return None
+
+    durations = {lbl: durations[lbl] for lbl in labels}
+
+    if known_first:
+        maxduration = max(durations.values())
+        for lbl in durations.keys():
+            if isinstance(lbl, Unknown):
+                durations[lbl] = durations[lbl] - maxduration
+
+    label = max(durations.iteritems(), key=operator.itemgetter(1))[0]
+
+    return label if durations[label] > 0 else None
+
+
+def _label_durations(segment, intersecting):
+    """Intersection duration of each label with target segment"""
+
+    intersections = {}
+    for s, tracks in intersecting:
+        intersection = s & segment
+        for label in tracks.itervalues():
+            intersections.setdefault(label, []).append(intersection)
+
+    return {label: _duration(segments)
+            for label, segments in intersections.iteritems()}
 
 
 class DirectTagger(BaseTagger):
@@ -38,6 +156,8 @@ class DirectTagger(BaseTagger):
     def __init__(self):
         super(DirectTagger, self).__init__(annotation=False, timeline=True)
 
+    @profiled('DirectTagger',
+              items=lambda self, source, timeline: len(timeline))
     def _tag_timeline(self, source, timeline):
         """Timeline tagging
 
@@ -61,14 +181,18 @@ class DirectTagger(BaseTagger):
         T = source.empty()
 
         # tag each segment of target timeline
-        for segment in timeline:
+        # (sweeping through source and target at once)
+        tracks = []
+        for segment, intersecting in _intersecting_tracks(source, timeline):
+
+            tagged = {}
+            for _, source_tracks in intersecting:
+                for track, label in source_tracks.iteritems():
+                    tagged[T._new_track(tagged, candidate=track)] = label
 
-            # extract the part of source annotation
-            # intersecting current target segment
-            t = source.crop(segment, mode='loose')
+            tracks.append((segment, tagged))
 
-            for _, track, label in t.itertracks(label=True):
-                T[segment, T.new_track(segment, candidate=track)] = label
+        T._set_tracks(tracks)
 
         return T
 
@@ -106,16 +230,9 @@ class ConservativeDirectTagger(BaseTagger):
         tagged = annotation.copy()
 
         # tag each segment of target annotation, one after the other
-        for segment in tagged.itersegments():
-
-            # extract the part of source annotation
-            # intersecting current target segment
-            t = source.crop(segment, mode='loose')
-
-            # if there is no intersecting segment
-            # just skip to the next one
-            if not t:
-                continue
+        # (segments without any intersecting source segment are skipped)
+        segments = list(tagged.itersegments())
+        for segment, intersecting in _intersecting_tracks(source, segments):
 
             # only tag segment
             # when target has exactly one track and source only one
@@ -129,11 +246,12 @@ class ConservativeDirectTagger(BaseTagger):
                 track = tracks.pop()
 
             # don't do anything if source has more than one label
-            labels = t.labels()
+            labels = set(label for _, source_tracks in intersecting
+                         for label in source_tracks.itervalues())
             if len(labels) > 1:
                 continue
             else:
-                label = labels[0]
+                label = labels.pop()
 
             tagged[segment, track] = label
 
@@ -196,30 +314,29 @@ class ArgMaxDirectTagger(BaseTagger):
         n = 0
 
         # tag each segment of target timeline, one after the other
-        for segment in timeline:
-
-            # extract the part of source annotation
-            # intersecting current target segment
-            t = source.crop(segment, mode='loose')
-
-            # if there is no intersecting segment
-            # just skip to the next one
-            if not t:
-                continue
+        # (segments without any intersecting source segment are skipped)
+        tracks = []
+        for segment, intersecting in _intersecting_tracks(source, timeline):
 
             # find largest number of co-occurring tracks ==> N
             # find N labels with greatest intersection duration
             # tag N tracks with those N labels
 
             # find largest number of simultaneous tracks (n_tracks)
-            n_tracks = max([len(t.get_tracks(s)) for s in t.itersegments()])
+            n_tracks = max([len(t) for _, t in intersecting])
+
+            # intersection duration of each label
+            durations = _label_durations(segment, intersecting)
+            labels = sorted(durations, key=str)
 
             # find n_tracks labels with greatest intersection duration
             # and add them to the segment
+            tagged = {}
             for i in range(n_tracks):
 
                 # find current best label
-                label = t.argmax(segment, known_first=self.known_first)
+                label = _argmax(labels, durations,
+                                known_first=self.known_first)
 
                 # if there is no label in stock
                 # just stop tagging this segment
@@ -228,9 +345,14 @@ class ArgMaxDirectTagger(BaseTagger):
                 # if current best label exists
                 # create a new track and go for it.
                 else:
-                    T[segment, n] = label
+                    tagged[n] = label
                     n = n+1
-                    t = t.subset(set([label]), invert=True)
+                    labels.remove(label)
+
+            if tagged:
+                tracks.append((segment, tagged))
+
+        T._set_tracks(tracks)
 
         return T
 
@@ -255,23 +377,21 @@ class ArgMaxDirectTagger(BaseTagger):
         tagged = annotation.copy()
 
         # tag each segment of target annotation, one after the other
-        for segment in tagged.itersegments():
+        # (segments without any intersecting source segment are skipped)
+        segments = list(tagged.itersegments())
+        for segment, intersecting in _intersecting_tracks(source, segments):
 
-            # extract the part of source annotation
-            # intersecting current target segment
-            t = source.crop(segment, mode='loose')
-
-            # if there is no intersecting segment
-            # just skip to the next one
-            if not t:
-                continue
+            # intersection duration of each label
+            durations = _label_durations(segment, intersecting)
+            labels = sorted(durations, key=str)
 
             # tag each track one after the other
             # always choose label with greatest intersection duration
             for track in tagged.get_tracks(segment):
 
                 # find current best label
-                label = t.argmax(segment, known_first=self.known_first)
+                label = _argmax(labels, durations,
+                                known_first=self.known_first)
 
                 # if there is no label in stock
                 # just stop tagging this segment
@@ -282,7 +402,7 @@ class ArgMaxDirectTagger(BaseTagger):
                 # go for it and tag track
                 else:
                     tagged[segment, track] = label
-                    t = t.subset(set([label]), invert=True)
+                    labels.remove(label)
 
         return tagged
 
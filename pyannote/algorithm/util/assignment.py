@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2012-2013 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Linear assignment problem solvers
+
+`linear_sum_assignment` solves the (rectangular) linear assignment problem
+with a Jonker-Volgenant-like shortest augmenting path algorithm [1]_ whose
+inner loops are vectorized with NumPy.
+
+`maximum_weight_matching` relies on it to find the one-to-one mapping that
+maximizes the total (non-negative) weight, solving each connected block of
+the non-zero weight structure independently.
+
+References
+----------
+.. [1] D.F. Crouse. "On implementing 2D rectangular assignment algorithms",
+       IEEE Transactions on Aerospace and Electronic Systems, 2016.
+
+"""
+
+import numpy as np
+import scipy.sparse
+from scipy.sparse.csgraph import connected_components
+from pyannote.profiling import profiled
+
+
+def _shortest_augmenting_path(cost):
+    """Solve square or wide (n_rows <= n_cols) assignment problem
+
+    Parameters
+    ----------
+    cost : (n_rows, n_cols) numpy array
+        Finite cost matrix, with n_rows <= n_cols
+
+    Returns
+    -------
+    col4row : (n_rows, ) numpy array
+        col4row[i] is the column assigned to row i
+    """
+
+    n_rows, n_cols = cost.shape
+
+    # dual variables
+    u = np.zeros((n_rows, ))
+    v = np.zeros((n_cols, ))
+
+    col4row = -np.ones((n_rows, ), dtype=int)
+    row4col = -np.ones((n_cols, ), dtype=int)
+
+    for current_row in range(n_rows):
+
+        shortest = np.inf * np.ones((n_cols, ))
+        path = -np.ones((n_cols, ), dtype=int)
+        visited_rows = np.zeros((n_rows, ), dtype=bool)
+        visited_cols = np.zeros((n_cols, ), dtype=bool)
+
+        i = current_row
+        min_value = 0.
+        sink = -1
+
+        # Dijkstra-like search for the shortest augmenting path
+        while sink < 0:
+
+            visited_rows[i] = True
+            remaining = ~visited_cols
+
+            reduced = min_value + cost[i] - u[i] - v
+            update = remaining & (reduced < shortest)
+            path[update] = i
+            shortest[update] = reduced[update]
+
+            # closest remaining column
+            # (free columns are preferred in case of ties)
+            candidates = np.flatnonzero(remaining)
+            distances = shortest[candidates]
+            min_value = np.min(distances)
+            closest = candidates[distances == min_value]
+            free = closest[row4col[closest] < 0]
+            j = free[0] if len(free) else closest[0]
+
+            visited_cols[j] = True
+            if row4col[j] < 0:
+                sink = j
+            else:
+                i = row4col[j]
+
+        # update dual variables
+        u[current_row] += min_value
+        others = visited_rows.copy()
+        others[current_row] = False
+        u[others] += min_value - shortest[col4row[others]]
+        v[visited_cols] -= min_value - shortest[visited_cols]
+
+        # augment previous solution along the path
+        j = sink
+        while True:
+            i = path[j]
+            row4col[j] = i
+            col4row[i], j = j, col4row[i]
+            if i == current_row:
+                break
+
+    return col4row
+
+
+def linear_sum_assignment(cost):
+    """Solve the (rectangular) linear sum assignment problem
+
+    Find the one-to-one assignment of min(n_rows, n_cols) rows and columns
+    that minimizes the total cost.
+
+    Parameters
+    ----------
+    cost : (n_rows, n_cols) array-like
+        Finite cost matrix
+
+    Returns
+    -------
+    rows, cols : numpy arrays
+        Assigned row and column indices, sorted by row index.
+        cost[rows, cols].sum() is minimum.
+
+    Examples
+    --------
+
+        >>> cost = np.array([[4, 1, 3], [2, 0, 5], [3, 2, 2]])
+        >>> rows, cols = linear_sum_assignment(cost)
+        >>> print cols
+        [1 0 2]
+
+    """
+
+    cost = np.asarray(cost, dtype=np.float64)
+
+    if cost.ndim != 2:
+        raise ValueError('cost matrix must be 2-dimensional.')
+
+    if not np.all(np.isfinite(cost)):
+        raise ValueError('cost matrix must only contain finite values.')
+
+    n_rows, n_cols = cost.shape
+    if n_rows == 0 or n_cols == 0:
+        return np.zeros((0, ), dtype=int), np.zeros((0, ), dtype=int)
+
+    # algorithm expects at least as many columns as rows
+    if n_rows > n_cols:
+        cols, rows = linear_sum_assignment(cost.T)
+        order = np.argsort(rows)
+        return rows[order], cols[order]
+
+    col4row = _shortest_augmenting_path(cost)
+    return np.arange(n_rows), col4row
+
+
+@profiled('maximum_weight_matching', items=lambda weight: np.size(weight))
+def maximum_weight_matching(weight):
+    """One-to-one matching maximizing the total non-negative weight
+
+    Rows and columns with zero weight only are skipped and the bipartite
+    graph of non-zero weights is split into connected blocks that are solved
+    independently. Only pairs with strictly positive weight are returned.
+
+    Parameters
+    ----------
+    weight : (n_rows, n_cols) array-like
+        Non-negative weight matrix (e.g. label cooccurrence duration)
+
+    Returns
+    -------
+    rows, cols : numpy arrays
+        Matched row and column indices, sorted by row index.
+
+    """
+
+    weight = np.asarray(weight, dtype=np.float64)
+    n_rows, n_cols = weight.shape
+
+    # bipartite graph with one edge per non-zero weight
+    # (rows are nodes 0..n_rows-1, columns are nodes n_rows..n_rows+n_cols-1)
+    I, J = np.nonzero(weight > 0)
+    graph = scipy.sparse.coo_matrix(
+        (np.ones(I.shape), (I, n_rows + J)),
+        shape=(n_rows + n_cols, n_rows + n_cols))
+    _, component = connected_components(graph, directed=False)
+    row_component = component[:n_rows]
+    col_component = component[n_rows:]
+
+    matched_rows, matched_cols = [], []
+
+    # rows & columns with non-zero weight are grouped by connected block
+    for c in np.unique(row_component[I]):
+
+        rows = np.flatnonzero(row_component == c)
+        cols = np.flatnonzero(col_component == c)
+
+        # trivial block
+        if len(rows) == 1 or len(cols) == 1:
+            block = weight[np.ix_(rows, cols)]
+            r, k = np.unravel_index(np.argmax(block), block.shape)
+            matched_rows.append(rows[r])
+            matched_cols.append(cols[k])
+            continue
+
+        block = weight[np.ix_(rows, cols)]
+        r, k = linear_sum_assignment(np.max(block) - block)
+        positive = block[r, k] > 0
+        matched_rows.extend(rows[r[positive]])
+        matched_cols.extend(cols[k[positive]])
+
+    matched_rows = np.array(matched_rows, dtype=int)
+    matched_cols = np.array(matched_cols, dtype=int)
+    order = np.argsort(matched_rows)
+
+    return matched_rows[order], matched_cols[order]
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
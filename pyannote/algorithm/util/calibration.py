@@ -20,12 +20,22 @@
 
 
 from pyannote.base.annotation import Annotation, Unknown
-from pyannote.base.scores import Scores
 from pyannote.algorithm.tagging import ArgMaxDirectTagger
 import numpy as np
 import sc2llr
 
 
+class CalibrationMixin(object):
+    """Serialization of trained calibrations
+
+    Training data (`_X` and `_Y` attributes) is not serialized.
+    """
+
+    def __getstate__(self):
+        return dict((key, value) for key, value in self.__dict__.iteritems()
+                    if key not in ('_X', '_Y'))
+
+
 class TwoClassesCalibration(object):
     """
     Score calibration for two-class classification
@@ -133,34 +143,37 @@ class IDScoreCalibration(object):
 
         Returns
         -------
-        X : list of scores
+        X : (n_tracks, n_targets) numpy array
             track vs. target scores
-        Y : list of boolean
+        Y : (n_tracks, n_targets) boolean numpy array
             track vs. target groundtruth
-        Xi, Yi :
-            same as X,Y but per target
+        target : list
+            targets (i.e. X and Y columns)
 
         """
         target = score.labels()
 
-        X = []
-        Xi = {L: [] for L in target}
-        Y = []
-        Yi = {L: [] for L in target}
-
+        # tracks with known labels
+        tracks, labels = [], []
         for s, t, l in reference.itertracks(label=True):
-
             if isinstance(l, Unknown):
                 continue
+            tracks.append((s, t))
+            labels.append(l)
 
-            for L in target:
-                v = score[s, t, L]
-                X.append(v)
-                Y.append(L == l)
-                Xi[L].append(v)
-                Yi[L].append(L == l)
+        # align score rows with reference tracks
+        found, X = score.align(tracks, labels=target)
+        if not np.all(found):
+            missing = [track for track, f in zip(tracks, found) if not f]
+            raise KeyError('missing scores for tracks %r' % missing)
 
-        return X, Y, Xi, Yi
+        index = {L: j for j, L in enumerate(target)}
+        J = np.array([index.get(l, -1) for l in labels], dtype=int)
+        Y = np.zeros(X.shape, dtype=bool)
+        I, = np.where(J > -1)
+        Y[I, J[I]] = True
+
+        return X, Y, target
 
     def fit(self, targets, references, scores):
         """
@@ -178,12 +191,9 @@ class IDScoreCalibration(object):
         # prior probability for unknown
         Pu = 0.
 
-        # score distributions
+        # score distributions (one chunk per file)
         X = []
         Y = []
-        # per target
-        Xi = {}
-        Yi = {}
 
         tagger = ArgMaxDirectTagger()
 
@@ -197,13 +207,12 @@ class IDScoreCalibration(object):
                     Pu = Pu + reference.label_duration(L)
 
             # accumulate score distribution
-            x, y, xi, yi = self._X_Y(reference, score)
-            X = X + x
-            for i,x in xi.iteritems():
-                Xi[i] = Xi.get(i,[]) + x
-            Y = Y + y
-            for i,y in yi.iteritems():
-                Yi[i] = Yi.get(i,[]) + y
+            x, y, _ = self._X_Y(reference, score)
+            X.append(x.ravel())
+            Y.append(y.ravel())
+
+        X = np.concatenate(X) if X else np.array([])
+        Y = np.concatenate(Y) if Y else np.array([], dtype=bool)
 
         # make Pu a probability
         self.Pu = Pu / (Pu + sum([duration for _,duration in Pi.iteritems()]))
@@ -220,26 +229,23 @@ class IDScoreCalibration(object):
         return self
 
 
-    def _s2p(self, scores):
+    def _s2p(self, data):
         """
         Parameters
         ----------
-        scores : dict
-            target to score dictionary
+        data : (n_tracks, n_targets) array
+            Scores
 
         Returns
         -------
-        prob : dict
-            target to posterior probability dictionary
+        prob : (n_tracks, n_targets) array
+            Posterior probabilities
         """
-        prob = {}
         a, b = self.s2llr
-        lr = {i: self.Pk*np.exp(a*s+b) for i,s in scores.iteritems()}
-        lr_sum = sum([v for _,v in lr.iteritems()])
-        for i, s in scores.iteritems():
-            rho = lr[i] / (lr_sum - lr[i] + self.Pu)
-            prob[i] = rho / (1+rho)
-        return prob
+        lr = self.Pk*np.exp(a*data+b)
+        lr_sum = np.sum(lr, axis=1)[:, np.newaxis]
+        rho = lr / (lr_sum - lr + self.Pu)
+        return rho / (1+rho)
 
     def __call__(self, scores):
         """
@@ -254,10 +260,4 @@ class IDScoreCalibration(object):
             Scores converted to probabilities
 
         """
-        probs = Scores(uri=scores.uri, modality=scores.modality)
-        for s, t in scores.itertracks():
-            prob = self._s2p(scores.get_track_scores(s,t))
-            for target, p in prob.iteritems():
-                probs[s,t,target] = p
-        return probs
-
+        return scores.map(self._s2p)
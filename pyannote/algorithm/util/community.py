@@ -2,8 +2,11 @@
 # -*- coding: utf-8 -*-
 """
 This module implements community detection.
+
+Louvain local moving and aggregation steps are performed on CSR adjacency
+matrices (scipy.sparse), see `csr_generate_dendogram`.
 """
-__all__ = ["partition_at_level", "modularity", "best_partition", "generate_dendogram", "induced_graph"]
+__all__ = ["partition_at_level", "modularity", "best_partition", "generate_dendogram", "induced_graph", "csr_generate_dendogram"]
 __author__ = """Thomas Aynaud (thomas.aynaud@lip6.fr)"""
 #    Copyright (C) 2009 by
 #    Thomas Aynaud <thomas.aynaud@lip6.fr>
@@ -12,8 +15,11 @@ __author__ = """Thomas Aynaud (thomas.aynaud@lip6.fr)"""
 
 __PASS_MAX = -1
 __MIN = 0.0000001
+__VECTORIZE_MIN_DEGREE = 32
 
 import networkx as nx
+import numpy as np
+import scipy.sparse
 import sys
 import types
 import array
@@ -98,27 +104,12 @@ def modularity(partition, graph) :
     if type(graph) != nx.Graph :
         raise TypeError("Bad graph type, use only non directed graph")
 
-    inc = dict([])
-    deg = dict([])
-    links = graph.size(weight='weight')
-    if links == 0 :
+    nodes, adjacency = _to_csr(graph)
+    if adjacency.nnz == 0 :
         raise ValueError("A graph without link has an undefined modularity")
-    
-    for node in graph :
-        com = partition[node]
-        deg[com] = deg.get(com, 0.) + graph.degree(node, weight = 'weight')
-        for neighbor, datas in graph[node].iteritems() :
-            weight = datas.get("weight", 1)
-            if partition[neighbor] == com :
-                if neighbor == node :
-                    inc[com] = inc.get(com, 0.) + float(weight)
-                else :
-                    inc[com] = inc.get(com, 0.) + float(weight) / 2.
 
-    res = 0.
-    for com in set(partition.values()) :
-        res += (inc.get(com, 0.) / links) - (deg.get(com, 0.) / (2.*links))**2
-    return res
+    communities = _renumber(np.array([partition[node] for node in nodes]))
+    return _csr_modularity(adjacency, communities)
 
 
 def best_partition(graph, partition = None) :
@@ -231,38 +222,71 @@ def generate_dendogram(graph, part_init = None) :
     if type(graph) != nx.Graph :
         raise TypeError("Bad graph type, use only non directed graph")
 
-    #special case, when there is no link 
-    #the best partition is everyone in its community
-    if graph.number_of_edges() == 0 :
-        part = dict([])
-        for node in graph.nodes() :
-            part[node] = node
-        return part
-        
-    current_graph = graph.copy()
-    status = Status()
-    status.init(current_graph, part_init)
-    mod = __modularity(status)
-    status_list = list()
-    __one_level(current_graph, status)
-    new_mod = __modularity(status)
-    partition = __renumber(status.node2com)
-    status_list.append(partition)
-    mod = new_mod
-    current_graph = induced_graph(partition, current_graph)
-    status.init(current_graph)
-    
+    nodes, adjacency = _to_csr(graph)
+
+    communities = None
+    if part_init is not None :
+        communities = _renumber(np.array([part_init[node] for node in nodes]))
+
+    levels = csr_generate_dendogram(adjacency, communities=communities)
+
+    # first level is indexed by graph nodes, next ones by communities
+    dendogram = [dict(zip(nodes, levels[0].tolist()))]
+    for level in levels[1:] :
+        dendogram.append(dict(enumerate(level.tolist())))
+    return dendogram
+
+
+def csr_generate_dendogram(adjacency, communities = None) :
+    """Find communities in the graph and return the associated dendogram
+
+    Same as `generate_dendogram` for a graph given as a symmetric (sparse)
+    adjacency matrix, where self-loop weights are stored (once) on the
+    diagonal -- i.e. networkx.to_scipy_sparse_matrix(graph) convention.
+
+    Nodes are visited in index order and, when several neighbor communities
+    lead to the same modularity increase, the one with the smallest index
+    is chosen: the result is fully deterministic.
+
+    Parameters
+    ----------
+    adjacency : (n_nodes, n_nodes) scipy.sparse matrix or numpy array
+        Symmetric matrix of non-negative edge weights
+    communities : (n_nodes, ) numpy array, optional
+        Initial partition, with communities numbered from 0.
+
+    Returns
+    -------
+    dendogram : list of numpy arrays
+        level[i] is the community of node (or community of previous level) i
+    """
+    adjacency = scipy.sparse.csr_matrix(adjacency, dtype=np.float64)
+    n_nodes = adjacency.shape[0]
+
+    if adjacency.nnz and adjacency.data.min() < 0 :
+        raise ValueError("Bad graph type, use positive weights")
+
+    # special case, when there is no link
+    # the best partition is everyone in its community
+    if adjacency.nnz == 0 :
+        return [np.arange(n_nodes)]
+
+    if communities is None :
+        communities = np.arange(n_nodes)
+
+    levels = []
+    mod = None
     while True :
-        __one_level(current_graph, status)
-        new_mod = __modularity(status)
-        if new_mod - mod < __MIN :
+        communities, new_mod = _one_level(adjacency, communities)
+        if mod is not None and new_mod - mod < __MIN :
             break
-        partition = __renumber(status.node2com)
-        status_list.append(partition)
+        partition = _renumber(communities)
+        levels.append(partition)
         mod = new_mod
-        current_graph = induced_graph(partition, current_graph)
-        status.init(current_graph)
-    return status_list[:]
+        adjacency = _csr_induced_graph(partition, adjacency)
+        communities = np.arange(adjacency.shape[0])
+
+    return levels
 
 
 def induced_graph(partition, graph) :
@@ -308,23 +332,202 @@ def induced_graph(partition, graph) :
     return ret
 
 
-def __renumber(dictionary) :
-    """Renumber the values of the dictionary from 0 to n
+def _to_csr(graph, weight = 'weight') :
+    """Nodes list and CSR adjacency matrix of a networkx graph"""
+    nodes = graph.nodes()
+    adjacency = nx.to_scipy_sparse_matrix(graph, nodelist = nodes,
+                                          weight = weight, format = 'csr')
+    return nodes, adjacency.astype(np.float64)
+
+
+def _renumber(communities) :
+    """Renumber communities from 0 to n (in order of first appearance)
     """
-    count = 0
-    ret = dictionary.copy()
-    new_values = dict([])
-    
-    for key in dictionary.keys() :
-        value = dictionary[key]
-        new_value = new_values.get(value, -1)
-        if new_value == -1 :
-            new_values[value] = count
-            new_value = count
-            count = count + 1
-        ret[key] = new_value
-        
-    return ret
+    _, first, inverse = np.unique(communities, return_index = True,
+                                  return_inverse = True)
+    mapping = np.empty(first.shape, dtype = int)
+    mapping[np.argsort(first)] = np.arange(len(first))
+    return mapping[inverse]
+
+
+def _csr_induced_graph(partition, adjacency) :
+    """Adjacency matrix of the graph where nodes are the communities
+
+    Same as `induced_graph`: a link between two communities has the total
+    weight of the links between their elements, internal links (and
+    self-loops) being summed into the community self-loop.
+    """
+    n_nodes = adjacency.shape[0]
+    n_communities = np.max(partition) + 1
+    indicator = scipy.sparse.csr_matrix(
+        (np.ones(n_nodes), (np.arange(n_nodes), partition)),
+        shape = (n_nodes, n_communities))
+    induced = (indicator.T * adjacency * indicator).tocsr()
+
+    # internal links appear twice in the diagonal, self-loops only once
+    loops = np.bincount(partition, weights = adjacency.diagonal(),
+                        minlength = n_communities)
+    diagonal = induced.diagonal()
+    induced = induced + scipy.sparse.diags(.5 * (loops - diagonal))
+    induced.eliminate_zeros()
+    return induced.tocsr()
+
+
+def _csr_status(adjacency, communities) :
+    """Node degrees, node self-loops and communities degrees and internals
+    """
+    loops = adjacency.diagonal()
+    degrees = np.asarray(adjacency.sum(axis = 1)).ravel() + loops
+    n_nodes = adjacency.shape[0]
+
+    # (np.bincount returns integers when there is nothing to count)
+    com_degrees = np.bincount(communities, weights = degrees,
+                              minlength = n_nodes).astype(np.float64)
+
+    # links between two nodes of the same community (counted twice)
+    # and self-loops (counted once)
+    coo = adjacency.tocoo()
+    same = communities[coo.row] == communities[coo.col]
+    weights = np.where(coo.row == coo.col, 1., .5) * coo.data
+    com_internals = np.bincount(communities[coo.row[same]],
+                                weights = weights[same],
+                                minlength = n_nodes).astype(np.float64)
+
+    return degrees, loops, com_degrees, com_internals
+
+
+def _status_modularity(com_degrees, com_internals, communities, links) :
+    """Modularity computed from communities degrees and internals"""
+    present = np.unique(communities)
+    return np.sum(com_internals[present] / links -
+                  (com_degrees[present] / (2. * links)) ** 2)
+
+
+def _csr_modularity(adjacency, communities) :
+    """Modularity of a partition of a graph given by its adjacency matrix"""
+    adjacency = scipy.sparse.csr_matrix(adjacency, dtype=np.float64)
+    _, _, com_degrees, com_internals = _csr_status(adjacency, communities)
+    links = .5 * (adjacency.sum() + adjacency.diagonal().sum())
+    return _status_modularity(com_degrees, com_internals, communities, links)
+
+
+def _one_level(adjacency, communities) :
+    """Compute one level of communities
+
+    Node moves are inherently sequential. Gains of high-degree nodes are
+    computed with numpy (one vectorized pass over the neighborhood) while
+    low-degree nodes, for which numpy call overhead dominates, are handled
+    with plain Python lists built once from the CSR structure.
+
+    Returns
+    -------
+    communities : numpy array
+    modularity : float
+    """
+    communities = np.array(communities, dtype = int)
+    degrees, loops, com_degrees, com_internals = \
+        _csr_status(adjacency, communities)
+    links = .5 * (np.sum(degrees))
+
+    # neighbors and link weights of every node (self-loops excluded)
+    coo = adjacency.tocoo()
+    others = coo.row != coo.col
+    neighbors, weights = coo.col[others], coo.data[others]
+    boundaries = np.searchsorted(coo.row[others],
+                                 np.arange(adjacency.shape[0] + 1)).tolist()
+    indices, data = neighbors.tolist(), weights.tolist()
+
+    new_mod = _status_modularity(com_degrees, com_internals, communities,
+                                 links)
+
+    # both list (fast scalar access) and array (fast vectorized access)
+    # versions of communities and communities degrees are kept up to date
+    node2com = communities.tolist()
+    com_degrees_list = com_degrees.tolist()
+    node_degrees = degrees.tolist()
+    node_loops = loops.tolist()
+
+    modif = True
+    nb_pass_done = 0
+    while modif and nb_pass_done != __PASS_MAX :
+        cur_mod = new_mod
+        modif = False
+        nb_pass_done += 1
+
+        for node in xrange(len(node2com)) :
+
+            start, end = boundaries[node], boundaries[node + 1]
+            if start == end :
+                continue
+
+            com_node = node2com[node]
+            degree = node_degrees[node]
+            degc_totw = degree / (2. * links)
+
+            if end - start > __VECTORIZE_MIN_DEGREE :
+
+                # total link weight to each neighbor community
+                neigh_communities, inverse = np.unique(
+                    communities[neighbors[start:end]], return_inverse = True)
+                dnc = np.bincount(inverse, weights = weights[start:end])
+                dnc_node = np.sum(dnc[neigh_communities == com_node])
+
+                # remove node from its community
+                com_degrees[com_node] -= degree
+                com_degrees_list[com_node] -= degree
+
+                # best modularity increase
+                # (smallest community index in case of ties)
+                incr = dnc - com_degrees[neigh_communities] * degc_totw
+                best = np.argmax(incr)
+                if incr[best] > 0 :
+                    best_com, dnc_best = int(neigh_communities[best]), dnc[best]
+                else :
+                    best_com, dnc_best = com_node, dnc_node
+
+            else :
+
+                # total link weight to each neighbor community
+                neigh_communities = {}
+                for i in xrange(start, end) :
+                    com = node2com[indices[i]]
+                    neigh_communities[com] = \
+                        neigh_communities.get(com, 0.) + data[i]
+                dnc_node = neigh_communities.get(com_node, 0.)
+
+                # remove node from its community
+                com_degrees[com_node] -= degree
+                com_degrees_list[com_node] -= degree
+
+                # best modularity increase
+                # (smallest community index in case of ties)
+                best_com = com_node
+                best_increase = 0.
+                for com, dnc in neigh_communities.iteritems() :
+                    incr = dnc - com_degrees_list[com] * degc_totw
+                    if incr > best_increase or \
+                       (incr == best_increase and incr > 0 and com < best_com) :
+                        best_increase = incr
+                        best_com = com
+                dnc_best = neigh_communities.get(best_com, 0.)
+
+            # insert node in the best community
+            com_internals[com_node] -= dnc_node + node_loops[node]
+            com_internals[best_com] += dnc_best + node_loops[node]
+            com_degrees[best_com] += degree
+            com_degrees_list[best_com] += degree
+
+            if best_com != com_node :
+                node2com[node] = best_com
+                communities[node] = best_com
+                modif = True
+
+        new_mod = _status_modularity(com_degrees, com_internals, communities,
+                                     links)
+        if new_mod - cur_mod < __MIN :
+            break
+
+    return communities, new_mod
 
 
 def __load_binary(data) :
@@ -356,164 +559,6 @@ def __load_binary(data) :
     return graph
 
 
-def __one_level(graph, status) :
-    """Compute one level of communities
-    """
-    modif = True
-    nb_pass_done = 0
-    cur_mod = __modularity(status)
-    new_mod = cur_mod
-    
-    while modif  and nb_pass_done != __PASS_MAX :
-        cur_mod = new_mod
-        modif = False
-        nb_pass_done += 1
-        
-        for node in graph.nodes() :
-            com_node = status.node2com[node]
-            degc_totw = status.gdegrees.get(node, 0.) / (status.total_weight*2.)
-            neigh_communities = __neighcom(node, graph, status)
-            __remove(node, com_node,
-                    neigh_communities.get(com_node, 0.), status)
-            best_com = com_node
-            best_increase = 0
-            for com, dnc in neigh_communities.iteritems() :
-                incr =  dnc  - status.degrees.get(com, 0.) * degc_totw
-                if incr > best_increase :
-                    best_increase = incr
-                    best_com = com                    
-            __insert(node, best_com,
-                    neigh_communities.get(best_com, 0.), status)
-            if best_com != com_node :
-                modif = True                
-        new_mod = __modularity(status)
-        if new_mod - cur_mod < __MIN :
-            break
-
-
-class Status :
-    """
-    To handle several data in one struct.
-
-    Could be replaced by named tuple, but don't want to depend on python 2.6
-    """
-    node2com = {}
-    total_weight = 0
-    internals = {}
-    degrees = {}
-    gdegrees = {}
-    
-    def __init__(self) :
-        self.node2com = dict([])
-        self.total_weight = 0
-        self.degrees = dict([])
-        self.gdegrees = dict([])
-        self.internals = dict([])
-        self.loops = dict([])
-        
-    def __str__(self) :
-        return ("node2com : " + str(self.node2com) + " degrees : "
-            + str(self.degrees) + " internals : " + str(self.internals)
-            + " total_weight : " + str(self.total_weight))
-
-    def copy(self) :
-        """Perform a deep copy of status"""
-        new_status = Status()
-        new_status.node2com = self.node2com.copy()
-        new_status.internals = self.internals.copy()
-        new_status.degrees = self.degrees.copy()
-        new_status.gdegrees = self.gdegrees.copy()
-        new_status.total_weight = self.total_weight
-
-    def init(self, graph, part = None) :
-        """Initialize the status of a graph with every node in one community"""
-        count = 0
-        self.node2com = dict([])
-        self.total_weight = 0
-        self.degrees = dict([])
-        self.gdegrees = dict([])
-        self.internals = dict([])
-        self.total_weight = graph.size(weight = 'weight')
-        if part == None :
-            for node in graph.nodes() :
-                self.node2com[node] = count
-                deg = float(graph.degree(node, weight = 'weight'))
-                if deg < 0 :
-                    raise ValueError("Bad graph type, use positive weights")
-                self.degrees[count] = deg
-                self.gdegrees[node] = deg
-                self.loops[node] = float(graph.get_edge_data(node, node,
-                                                 {"weight":0}).get("weight", 1))
-                self.internals[count] = self.loops[node]
-                count = count + 1
-        else :
-            for node in graph.nodes() :
-                com = part[node]
-                self.node2com[node] = com
-                deg = float(graph.degree(node, weigh = 'weight'))
-                self.degrees[com] = self.degrees.get(com, 0) + deg
-                self.gdegrees[node] = deg
-                inc = 0.
-                for neighbor, datas in graph[node].iteritems() :
-                    weight = datas.get("weight", 1)
-                    if weight <= 0 :
-                        raise ValueError("Bad graph type, use positive weights")
-                    if part[neighbor] == com :
-                        if neighbor == node :
-                            inc += float(weight)
-                        else :
-                            inc += float(weight) / 2.
-                self.internals[com] = self.internals.get(com, 0) + inc
-
-
-
-def __neighcom(node, graph, status) :
-    """
-    Compute the communities in the neighborood of node in the graph given
-    with the decomposition node2com
-    """
-    weights = {}
-    for neighbor, datas in graph[node].iteritems() :
-        if neighbor != node :
-            weight = datas.get("weight", 1)
-            neighborcom = status.node2com[neighbor]
-            weights[neighborcom] = weights.get(neighborcom, 0) + weight
-            
-    return weights
-
-
-def __remove(node, com, weight, status) :
-    """ Remove node from community com and modify status"""
-    status.degrees[com] = ( status.degrees.get(com, 0.)
-                                    - status.gdegrees.get(node, 0.) )
-    status.internals[com] = float( status.internals.get(com, 0.) -
-                weight - status.loops.get(node, 0.) )
-    status.node2com[node] = -1
-    
-
-def __insert(node, com, weight, status) :
-    """ Insert node into community and modify status"""
-    status.node2com[node] = com
-    status.degrees[com] = ( status.degrees.get(com, 0.) +
-                                status.gdegrees.get(node, 0.) )
-    status.internals[com] = float( status.internals.get(com, 0.) +
-                        weight + status.loops.get(node, 0.) )
-
-
-def __modularity(status) :
-    """
-    Compute the modularity of the partition of the graph faslty using status precomputed
-    """
-    links = float(status.total_weight)
-    result = 0.
-    for community in set(status.node2com.values()) :
-        in_degree = status.internals.get(community, 0.)
-        degree = status.degrees.get(community, 0.)
-        if links > 0 :
-            result = result + in_degree / links - ((degree / (2.*links))**2)
-    return result
-
-
 def __main() :
     """Main function to mimic C++ version behavior"""
     try :
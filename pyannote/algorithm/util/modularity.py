@@ -20,16 +20,19 @@
 
 
 import numpy as np
-import networkx as nx
-from pyannote.base.matrix import LabelMatrix
+from pyannote.algorithm.util.community import _to_csr, _csr_modularity
+
 
 class Modularity(object):
     """
     Modularity
     
+    Same definition as `community.modularity` (self-loops included), with
+    the adjacency matrix computed once for all partitions.
+    
     Parameters
     ----------
-    G : networkx.Graph or networkx.DiGraph
+    G : networkx.Graph
         Graph on which modularity is computed.
     weight : str, optional
         
@@ -39,19 +42,11 @@ class Modularity(object):
     def __init__(self, G, weight='weight'):
         super(Modularity, self).__init__()
         
-        # adjacency matrix
-        A = LabelMatrix.from_networkx_graph(G, weight=weight)
-        
-        # total weights in graph
-        m = np.sum(A.M)
+        if G.is_directed():
+            raise TypeError('Bad graph type, use only non directed graph')
         
-        # node degree (total weight of {in|out}going edges)
-        kin = np.sum(A.M, axis=0)[:, np.newaxis]
-        kout = np.sum(A.M, axis=1)[:, np.newaxis]
-        
-        # modularity matrix
-        A.M = A.M/m - kout*kin.T/(m*m)
-        self.Q = A
+        # (sparse) adjacency matrix
+        self.nodes, self.A = _to_csr(G, weight=weight)
     
     def __call__(self, partition):
         """Compute modularity
@@ -68,20 +63,10 @@ class Modularity(object):
         
         """
         
-        # same partition matrix
-        ilabels, jlabels = self.Q.labels
-        D = LabelMatrix(ilabels=ilabels, jlabels=jlabels, 
-                        dtype=bool, default=False)
-        clusters = {}
-        for node, k in partition.iteritems():
-            if k not in clusters:
-                clusters[k] = set([])
-            clusters[k].add(node)
-        for _, nodes in clusters.iteritems():
-            for n in nodes:
-                for m in nodes:
-                    D[n, m] = True
+        # community index of every node
+        communities = {}
+        C = np.array([communities.setdefault(partition[node],
+                                             len(communities))
+                      for node in self.nodes], dtype=int)
         
-        # modularity
-        return np.sum(D.M * self.Q.M)
-    
+        return _csr_modularity(self.A, C)
@@ -16,8 +16,9 @@ NB: uses density option for numpy.histogram() that appeared in numpy 1.6
 """
 
 import numpy as np
-if np.__version__ < '1.6':
-    raise "Error: needs at least numpy version 1.6"
+from distutils.version import LooseVersion
+if LooseVersion(np.__version__) < LooseVersion('1.6'):
+    raise ImportError("Error: needs at least numpy version 1.6")
 from scipy import stats
 from scipy.stats import norm
 
@@ -82,13 +83,18 @@ def computeMapping(negative, positive, nb=15):
 def applyMapping(scores, map):
     x,y = map
     # perform linear interpolation for converting scores to log likelihoods
-    i = np.digitize(scores, x)
-    # check out-of-boundaries
-    i[i == 0] = 1
-    i[i == len(x)] = len(x) - 1
-    dx = x[i] - x[i - 1]
-    dy = y[i] - y[i - 1]
-    return y[i] + (scores - x[i]) * dy / dx
+    llr = np.interp(scores, x, y)
+    # out-of-boundaries scores are extrapolated using first and last segments
+    scores = np.asarray(scores)
+    low = scores < x[0]
+    if np.any(low):
+        slope = (y[1] - y[0]) / (x[1] - x[0])
+        llr = np.where(low, y[0] + (scores - x[0]) * slope, llr)
+    high = scores > x[-1]
+    if np.any(high):
+        slope = (y[-1] - y[-2]) / (x[-1] - x[-2])
+        llr = np.where(high, y[-1] + (scores - x[-1]) * slope, llr)
+    return llr
 
 def computeLinearMapping(negative, positive, nb=15):
     x, y = computeMapping(negative, positive, nb)
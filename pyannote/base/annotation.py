@@ -28,9 +28,10 @@ warnings.filterwarnings(
 )
 
 from pyannote.util import deprecated
+from pyannote.profiling import profiled
 
 import itertools
-from segment import Segment
+from segment import Segment, SEGMENT_PRECISION
 from timeline import Timeline
 from banyan import SortedDict
 from interval_tree import TimelineUpdator
@@ -143,17 +144,21 @@ class Annotation(object):
 
     uri = property(_get_uri, fset=_set_uri, doc="Resource identifier")
 
+    @profiled('Annotation._updateLabels',
+              items=lambda self: sum(self._labelNeedsUpdate.values()))
     def _updateLabels(self):
 
-        # (re-)initialize changed label timeline
-        for l, needsUpdate in self._labelNeedsUpdate.iteritems():
-            if needsUpdate:
-                self._labels[l] = Timeline(uri=self.uri)
-
-        # fill changed label timeline
+        # gather segments of changed labels
+        segments = {l: [] for l, needsUpdate
+                    in self._labelNeedsUpdate.iteritems() if needsUpdate}
         for segment, track, l in self.itertracks(label=True):
             if self._labelNeedsUpdate[l]:
-                self._labels[l].add(segment)
+                segments[l].append(segment)
+
+        # (re-)initialize changed label timeline
+        # (building them in one go is much faster than adding segments)
+        for l, _segments in segments.iteritems():
+            self._labels[l] = Timeline(segments=_segments, uri=self.uri)
 
         self._labelNeedsUpdate = {l: False for l in self._labels}
 
@@ -227,6 +232,8 @@ class Annotation(object):
         """
         return included in self.get_timeline()
 
+    @profiled('Annotation.crop',
+              items=lambda self, *args, **kwargs: len(self))
     def crop(self, other, mode='intersection'):
         """Crop annotation
 
@@ -380,9 +387,9 @@ class Annotation(object):
     def retrack(self):
         """
         """
-        retracked = self.__class__(uri=self.uri, modality=self.modality)
-        for n, (s, _, label) in enumerate(self.itertracks(label=True)):
-            retracked[s, n] = label
+        retracked = self.empty()
+        retracked._set_tracks(self._iter_mapped_tracks(
+            lambda n, track, label: (n, label)))
         return retracked
 
     def new_track(self, segment, candidate=None, prefix=None):
@@ -403,6 +410,16 @@ class Annotation(object):
         # obtain list of existing tracks for segment
         existing_tracks = set(self._tracks.get(segment, {}))
 
+        return self._new_track(existing_tracks,
+                               candidate=candidate, prefix=prefix)
+
+    def _new_track(self, existing_tracks, candidate=None, prefix=None):
+        """Track name generator
+
+        Same as `new_track` with the set of `existing_tracks` provided
+        explicitly (e.g. for tracks not added to the annotation yet).
+        """
+
         # if candidate is provided, check whether it already exists
         # in case it does not, use it
         if (candidate is not None) and (candidate not in existing_tracks):
@@ -490,6 +507,106 @@ class Annotation(object):
     def empty(self):
         return self.__class__(uri=self.uri, modality=self.modality)
 
+    def _set_tracks(self, tracks):
+        """Replace all tracks at once
+
+        Much faster than adding tracks one by one (annotation[s, t] = l)
+        as the internal interval tree is built in one go.
+
+        Parameters
+        ----------
+        tracks : iterable
+            (segment, {track: label}) iterable, with unique segments.
+        """
+
+        tracks = [(segment, dict(_tracks)) for segment, _tracks in tracks]
+        self._tracks = SortedDict(items=tracks,
+                                  key_type=(float, float),
+                                  updator=TimelineUpdator)
+
+        self._labels = {}
+        self._labelNeedsUpdate = {label: True
+                                  for _, _tracks in tracks
+                                  for label in _tracks.itervalues()}
+        self._timelineNeedsUpdate = True
+
+    def _iter_mapped_tracks(self, func):
+        """Apply `func` to every track, in (sorted) segment order
+
+        Parameters
+        ----------
+        func : callable
+            func(n, track, label) is called for the nth track and returns
+            a new (track, label) tuple, or None to remove the track.
+
+        Generates
+        ---------
+        (segment, {track: label}) tuples suitable for `_set_tracks`,
+        where segments with no track left are skipped.
+        """
+        n = 0
+        for segment, tracks in self._tracks.items():
+            _tracks = {}
+            for track, label in tracks.iteritems():
+                mapped = func(n, track, label)
+                n += 1
+                if mapped is not None:
+                    _tracks[mapped[0]] = mapped[1]
+            if _tracks:
+                yield segment, _tracks
+
+    def _label_coverages(self):
+        """Coverage of every label, as flat arrays
+
+        Computed from all tracks at once (grouped run-length merge) without
+        building any label timeline.
+
+        Returns
+        -------
+        labels : list
+            Sorted list of labels (same as annotation.labels())
+        starts, ends : numpy arrays
+            Start and end times of coverage segments, sorted by label then
+            time. Coverage segments of a given label never overlap.
+        index : numpy array
+            Label index of each coverage segment.
+        """
+
+        # non-empty segments
+        segments = [(label, segment.start, segment.end)
+                    for segment, _, label in self.itertracks(label=True)
+                    if segment]
+
+        labels = sorted(set(label for label, _, _ in segments), key=str)
+        indices = {label: i for i, label in enumerate(labels)}
+
+        if not segments:
+            empty = np.zeros((0, ))
+            return labels, empty, empty, np.zeros((0, ), dtype=int)
+
+        index = np.array([indices[label] for label, _, _ in segments])
+        starts = np.array([start for _, start, _ in segments])
+        ends = np.array([end for _, _, end in segments])
+
+        # sort by label, then by start time (then end time)
+        order = np.lexsort((ends, starts, index))
+        index, starts, ends = index[order], starts[order], ends[order]
+
+        # running max of end times within each label...
+        # (shifted so that labels do not interfere with each other)
+        offset = index * (np.max(ends) - np.min(starts) + 1.)
+        running_end = np.maximum.accumulate(ends + offset) - offset
+
+        # ... so that a new coverage segment starts at each gap
+        # (same behavior as Timeline.coverage)
+        new = np.ones(index.shape, dtype=bool)
+        new[1:] = (index[1:] != index[:-1]) | \
+                  (starts[1:] - running_end[:-1] > SEGMENT_PRECISION)
+        first = np.flatnonzero(new)
+
+        return (labels, starts[first], np.maximum.reduceat(ends, first),
+                index[first])
+
     def labels(self, unknown=True):
         """List of labels
 
@@ -587,10 +704,10 @@ class Annotation(object):
         else:
             labels = labels & set(self.labels())
 
-        sub = self.__class__(uri=self.uri, modality=self.modality)
-        for segment, track, label in self.itertracks(label=True):
-            if label in labels:
-                sub[segment, track] = label
+        sub = self.empty()
+        sub._set_tracks(self._iter_mapped_tracks(
+            lambda n, track, label: (track, label) if label in labels
+            else None))
 
         return sub
 
@@ -825,12 +942,21 @@ class Annotation(object):
             translate = lambda x: translation(x) if translation(x) is not None else x
 
         else:
-            translate = translation
+            translated = self.empty()
+            translated._set_tracks(self._iter_mapped_tracks(
+                lambda n, track, label: (track, translation(label))))
+            return translated
+
+        # dict and mapping translations are computed once per label
+        cache = {}
+
+        def _translate(n, track, label):
+            if label not in cache:
+                cache[label] = translate(label)
+            return track, cache[label]
 
-        # create copy
         translated = self.empty()
-        for segment, track, label in self.itertracks(label=True):
-            translated[segment, track] = translate(label)
+        translated._set_tracks(self._iter_mapped_tracks(_translate))
 
         return translated
 
@@ -866,8 +992,8 @@ class Annotation(object):
 
         """
         anonymized = self.empty()
-        for s, t, _ in self.itertracks(label=True):
-            anonymized[s, t] = Unknown()
+        anonymized._set_tracks(self._iter_mapped_tracks(
+            lambda n, track, label: (track, Unknown())))
         return anonymized
 
     def smooth(self):
@@ -888,17 +1014,22 @@ class Annotation(object):
 
         """
 
-        smoothed = self.empty()
+        labels, starts, ends, index = self._label_coverages()
 
-        n = 0
-        for label in self.labels():
-            coverage = self.label_coverage(label)
-            for segment in coverage:
-                smoothed[segment, n] = label
-                n = n+1
+        # one track per label coverage segment
+        # (different labels may share the same coverage segment)
+        tracks = {}
+        for n, (i, start, end) in enumerate(zip(index.tolist(),
+                                                starts.tolist(),
+                                                ends.tolist())):
+            tracks.setdefault(Segment(start, end), {})[n] = labels[i]
+
+        smoothed = self.empty()
+        smoothed._set_tracks(tracks.iteritems())
 
         return smoothed
 
+    @profiled('Annotation.co_iter')
     def co_iter(self, other):
         """
         Parameters
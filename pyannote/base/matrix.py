@@ -21,6 +21,8 @@
 import numpy as np
 import pandas
 from pyannote.util import deprecated
+from pyannote.profiling import profiled
+from pyannote.base.segment import SEGMENT_PRECISION
 
 
 class LabelMatrix(object):
@@ -96,12 +98,16 @@ class LabelMatrix(object):
                     for (r, c) in self.df.idxmax(axis=axis).iteritems()}
 
         else:
-            values = [
-                (_r, _c, self.df.loc[_r, _c])
-                for (_c, _r) in self.df.idxmax(axis=0).iteritems()
-            ]
-            r, c, _ = sorted(values, key=lambda v: v[2])[-1]
-            return {r: c}
+            # maximum of each column (first row in case of ties)...
+            # (NaN values are skipped, like pandas.DataFrame.idxmax does)
+            values = self.df.values
+            if values.dtype.kind == 'f':
+                values = np.where(np.isnan(values), -np.inf, values)
+            rows = np.argmax(values, axis=0)
+            maxima = values[rows, np.arange(values.shape[1])]
+            # ... and last column in case of ties
+            c = len(maxima) - 1 - np.argmax(maxima[::-1])
+            return {self.df.index[rows[c]]: self.df.columns[c]}
 
     def __neg__(self):
         negated = LabelMatrix()
@@ -136,13 +142,11 @@ class LabelMatrix(object):
     T = property(fget=__get_T)
 
     def remove_column(self, col):
-        del self.df[col]
+        self.df = self.df.drop(col, axis=1)
         return self
 
     def remove_row(self, row):
-        df = self.df.T
-        del df[row]
-        self.df = df.T
+        self.df = self.df.drop(row, axis=0)
         return self
 
     def copy(self):
@@ -158,15 +162,12 @@ class LabelMatrix(object):
         if columns is None:
             columns = set(self.get_columns())
 
-        remove_rows = set(self.get_rows()) - rows
-        remove_columns = set(self.get_columns()) - columns
-
-        copied = self.copy()
-        for row in remove_rows:
-            copied = copied.remove_row(row)
-        for col in remove_columns:
-            copied = copied.remove_column(col)
+        # select all rows and columns at once (one copy)
+        keep_rows = [row in rows for row in self.df.index]
+        keep_columns = [col in columns for col in self.df.columns]
 
+        copied = LabelMatrix()
+        copied.df = self.df.loc[keep_rows, keep_columns].copy()
         return copied
 
     def __gt__(self, value):
@@ -296,25 +297,57 @@ class LabelMatrix(object):
 
 #         return copied
 
+
+@profiled('get_cooccurrence_matrix', items=lambda R, C: len(R) + len(C))
 def get_cooccurrence_matrix(R, C):
+    """Label cooccurrence matrix
 
-    rows = R.labels()
-    cols = C.labels()
-    nRows = len(rows)
-    nCols = len(cols)
+    K[r, c] is the total duration of the intersection of the coverage of
+    label r (in R) with the coverage of label c (in C).
 
-    K = np.zeros((nRows, nCols), dtype=np.float)
-    for r, row in enumerate(rows):
-        row_coverage = R.label_coverage(row)
-        for c, col in enumerate(cols):
-            col_coverage = C.label_coverage(col)
-            coverage = row_coverage.crop(col_coverage, mode='intersection')
-            K[r, c] = coverage.duration()
+    Parameters
+    ----------
+    R, C : Annotation
 
-    return LabelMatrix(data=K, rows=rows, columns=cols)
+    Returns
+    -------
+    K : LabelMatrix
+        Rows are R labels, columns are C labels.
+    """
 
+    rows, r_starts, r_ends, r_index = R._label_coverages()
+    cols, c_starts, c_ends, c_index = C._label_coverages()
 
-from pyannote.base.segment import SEGMENT_PRECISION
+    K = np.zeros((len(rows), len(cols)), dtype=np.float)
+
+    # coverage segments of one column label are sorted and do not overlap,
+    # therefore the ones intersecting each row coverage segment
+    # are contiguous and can be found by binary search
+    boundaries = np.searchsorted(c_index, np.arange(len(cols) + 1))
+    for c in range(len(cols)):
+
+        i, j = boundaries[c], boundaries[c+1]
+        starts, ends = c_starts[i:j], c_ends[i:j]
+
+        lo = np.searchsorted(ends, r_starts, side='right')
+        hi = np.searchsorted(starts, r_ends, side='left')
+        n = np.maximum(hi - lo, 0)
+        if not np.any(n):
+            continue
+
+        # all (row segment, column segment) intersecting pairs
+        r = np.repeat(np.arange(len(n)), n)
+        k = np.repeat(lo - np.cumsum(n) + n, n) + np.arange(np.sum(n))
+
+        duration = np.minimum(r_ends[r], ends[k]) - \
+            np.maximum(r_starts[r], starts[k])
+
+        # empty intersections are discarded (same as Timeline)
+        keep = duration > SEGMENT_PRECISION
+        K[:, c] = np.bincount(r_index[r[keep]], weights=duration[keep],
+                              minlength=len(rows))
+
+    return LabelMatrix(data=K, rows=rows, columns=cols)
 
 
 def get_tfidf_matrix(words, documents, idf=True, log=False):
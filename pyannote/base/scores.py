@@ -21,28 +21,68 @@
 from segment import Segment
 from timeline import Timeline
 from annotation import Annotation, Unknown
+import itertools
 import numpy as np
 from pyannote.base import SEGMENT, TRACK, LABEL, SCORE
-from pandas import MultiIndex, DataFrame, pivot_table
-from pyannote.util import deprecated
+from pandas import MultiIndex, DataFrame
+from pyannote.stats.posterior import unknown_posterior
 
 
 class AnnotationMixin(object):
+    """(segment, track)-indexed container
+
+    Tracks are stored in insertion order (`_segments` and `_tracks` lists)
+    along with a {(segment, track): row} index, so that sub-classes can store
+    their data as one row per track.
+
+    Sub-classes must implement `_take(rows, segments=None, tracks=None)`
+    which returns a new instance made of the requested rows.
+    """
+
+    def _reset_tracks(self, segments=(), tracks=()):
+        """(Re)build track index from lists of segments and track names"""
+        self._segments = []
+        self._tracks = []
+        self._rows = {}
+        self._segment_tracks = {}
+        for segment, track in itertools.izip(segments, tracks):
+            self._add_track(segment, track)
+        self._order = None
+        self._timelineHasChanged = True
+
+    def _add_track(self, segment, track):
+        """Add new track and return its row index"""
+        row = len(self._segments)
+        self._segments.append(segment)
+        self._tracks.append(track)
+        self._rows[segment, track] = row
+        self._segment_tracks.setdefault(segment, set()).add(track)
+        self._order = None
+        self._timelineHasChanged = True
+        return row
+
+    def _sorted_rows(self):
+        """Row indices sorted by (segment, track)"""
+        if self._order is None:
+            keys = zip(self._segments, self._tracks)
+            self._order = np.array(
+                sorted(range(len(keys)), key=keys.__getitem__), dtype=int)
+        return self._order
 
     def get_timeline(self):
         if self._timelineHasChanged:
-            self._timeline = Timeline(segments=[s for s, _ in self._df.index],
+            self._timeline = Timeline(segments=list(self._segment_tracks),
                                       uri=self.uri)
             self._timelineHasChanged = False
         return self._timeline
 
     def __len__(self):
         """Number of annotated segments"""
-        return len(self.get_timeline())
+        return len(self._segment_tracks)
 
     def __nonzero__(self):
         """False if annotation is empty"""
-        return len(self.get_timeline()) > 0
+        return len(self._segment_tracks) > 0
 
     def __contains__(self, included):
         """Check if segments are annotated
@@ -71,12 +111,8 @@ class AnnotationMixin(object):
 
     def itertracks(self):
         """Iterate over annotation as (segment, track) tuple"""
-
-        # make sure segment/track pairs are sorted
-        self._df = self._df.sort_index()
-
-        for (segment, track), _ in self._df.iterrows():
-            yield segment, track
+        for row in self._sorted_rows():
+            yield self._segments[row], self._tracks[row]
 
     def crop(self, focus, mode='strict'):
         """Crop on focus
@@ -121,16 +157,14 @@ class AnnotationMixin(object):
             if mode in ['strict', 'loose']:
 
                 # segments (strictly or loosely) included in requested coverage
-                included = timeline.crop(coverage, mode=mode)
+                included = set(timeline.crop(coverage, mode=mode))
 
-                # boolean array: True if row must be kept, False otherwise
-                keep = [(s in included) for s, _ in self._df.index]
+                # rows to keep
+                rows = [row for row, s in enumerate(self._segments)
+                        if s in included]
 
                 # crop-crop
-                A = self.__class__(uri=self.uri, modality=self.modality)
-                A._df = self._df[keep]
-
-                return A
+                return self._take(rows)
 
             elif mode == 'intersection':
 
@@ -139,8 +173,9 @@ class AnnotationMixin(object):
                 intersection, mapping = timeline.crop(coverage,
                                                       mode=mode, mapping=True)
 
-                # create new empty annotation
+                # new (empty) annotation only used to choose new track names
                 A = self.__class__(uri=self.uri, modality=self.modality)
+                rows = []
 
                 for cropped in intersection:
                     for original in mapping[cropped]:
@@ -148,14 +183,12 @@ class AnnotationMixin(object):
                             # try to use original track name (candidate)
                             # if it already exists, create a brand new one
                             new_track = A.new_track(cropped, candidate=track)
-                            # copy each value, column by column
-                            for label in self._df.columns:
-                                value = self._df.get_value((original, track),
-                                                           label)
-                                A._df = A._df.set_value((cropped, new_track),
-                                                        label, value)
+                            A._add_track(cropped, new_track)
+                            rows.append(self._rows[original, track])
 
-                return A
+                # copy all values, row by row
+                return self._take(rows, segments=A._segments,
+                                  tracks=A._tracks)
 
         else:
             raise TypeError('')
@@ -173,15 +206,7 @@ class AnnotationMixin(object):
         tracks : set
             Set of tracks for query segment
         """
-
-        try:
-            df = self._df.xs(segment)
-            existing_tracks = set(df.index)
-
-        except Exception, e:
-            existing_tracks = set([])
-
-        return existing_tracks
+        return set(self._segment_tracks.get(segment, set()))
 
     def has_track(self, segment, track):
         """Check whether a given track exists
@@ -198,7 +223,7 @@ class AnnotationMixin(object):
         exists : bool
             True if track exists for segment
         """
-        return (segment, track) in self._df.index
+        return (segment, track) in self._rows
 
     def get_track_by_name(self, track):
         """Get all tracks with given name
@@ -213,25 +238,16 @@ class AnnotationMixin(object):
         tracks : list
             List of (segment, track) tuples
         """
-        try:
-            segments = list(self._df.xs(track, level=1).index)
-        except Exception, e:
-            segments = []
-        return [(s, track) for s in segments]
+        return [(s, t) for s, t in self.itertracks() if t == track]
 
     def copy(self):
-        A = self.__class__(uri=self.uri, modality=self.modality)
-        A._df = self._df.copy()
-        return A
+        return self._take(range(len(self._segments)))
 
     def retrack(self):
         """
         """
-        A = self.copy()
-        reindex = MultiIndex.from_tuples([(s, n)
-                                          for n, (s, _) in enumerate(A._df.index)])
-        A._df.index = reindex
-        return A
+        rows = self._sorted_rows()
+        return self._take(rows, tracks=range(len(rows)))
 
     def new_track(self, segment, candidate=None, prefix=None):
         """Track name generator
@@ -278,8 +294,7 @@ class AnnotationMixin(object):
     def __str__(self):
         """Human-friendly representation"""
         if self:
-            self._df.sort_index(inplace=True)
-            return str(self._df)
+            return str(self.to_df())
         else:
             return ""
 
@@ -287,6 +302,10 @@ class AnnotationMixin(object):
 class Scores(AnnotationMixin, object):
     """
 
+    Scores are stored in a dense (n_tracks x n_labels) float array, with
+    NaN for missing values. Each track is a row and each label is a column,
+    so accessing any (segment, track, label) score is O(1).
+
     Parameters
     ----------
     uri : str, optional
@@ -311,6 +330,15 @@ class Scores(AnnotationMixin, object):
         >>> s[Segment(2,3), 's1', 'B'] = 0.1
         >>> s[Segment(2,3), 's1', 'C'] = 0.3
 
+    Or, equivalently (and much faster)
+
+        >>> s = Scores.from_arrays(
+        ...     [Segment(0,1), Segment(0,1), Segment(2,3)], ['s1', 's2', 's1'],
+        ...     ['A', 'B', 'C'], [[0.1, 0.2, 0.3],
+        ...                       [0.4, 0.3, 0.2],
+        ...                       [0.2, 0.1, 0.3]],
+        ...     uri='video', modality='speaker')
+
     """
     @classmethod
     def from_df(
@@ -336,26 +364,190 @@ class Scores(AnnotationMixin, object):
         -------
 
         """
+
+        # row index of each (segment, track) pair
+        keys = zip(df[SEGMENT], df[TRACK])
+        rows = {}
+        for key in keys:
+            rows.setdefault(key, len(rows))
+        segments, tracks = [], []
+        if rows:
+            segments, tracks = zip(*sorted(rows, key=rows.get))
+
+        # column index of each label
+        labels = sorted(set(df[LABEL]))
+        columns = {label: j for j, label in enumerate(labels)}
+
+        I = np.array([rows[key] for key in keys], dtype=int)
+        J = np.array([columns[label] for label in df[LABEL]], dtype=int)
+        values = np.array(df[SCORE], dtype=np.float64)
+
+        data = np.empty((len(rows), len(labels)), dtype=np.float64)
+        data.fill(np.nan)
+
+        # group duplicate (segment, track, label) tuples
+        cells = I * len(labels) + J
+        unique, inverse = np.unique(cells, return_inverse=True)
+
+        if len(unique) == len(cells):
+            data[I, J] = values
+        else:
+            order = np.argsort(inverse, kind='mergesort')
+            counts = np.bincount(inverse)
+            groups = np.split(values[order], np.cumsum(counts)[:-1])
+            data.flat[unique] = [aggfunc(group) for group in groups]
+
+        return cls.from_arrays(segments, tracks, labels, data,
+                               uri=uri, modality=modality)
+
+    @classmethod
+    def from_arrays(cls, segments, tracks, labels, data,
+                    uri=None, modality=None, copy=True):
+        """Bulk constructor
+
+        Parameters
+        ----------
+        segments : list of `Segment`
+            Segment of each track
+        tracks : list
+            Name of each track
+        labels : list
+            Labels
+        data : (len(tracks), len(labels)) array-like
+            Scores (use NaN for missing values).
+        uri : str, optional
+            Resource identifier
+        modality : str, optional
+            Modality
+        copy : bool, optional
+            Set to False to use `data` as internal storage when it already is
+            a float64 numpy array (e.g. a memory-mapped one). Defaults to True.
+
+        Returns
+        -------
+        scores : `Scores`
+
+        """
+
+        segments = list(segments)
+        tracks = list(tracks)
+        labels = list(labels)
+
+        n, m = len(segments), len(labels)
+        if len(tracks) != n:
+            raise ValueError('segments and tracks must have the same length.')
+
+        data = np.array(data, dtype=np.float64, copy=copy)
+        if data.size == 0:
+            data = data.reshape((n, m))
+        if data.shape != (n, m):
+            raise ValueError(
+                'data must be a (%d, %d) array (is %r).' % (n, m, data.shape))
+
         A = cls(uri=uri, modality=modality)
-        A._df = pivot_table(
-            df, values=SCORE,
-            rows=[SEGMENT, TRACK], cols=LABEL,
-            aggfunc=aggfunc
-        )
+
+        A._reset_tracks(segments, tracks)
+        if len(A._rows) != n:
+            raise ValueError('(segment, track) pairs must be unique.')
+
+        A._reset_labels(labels)
+        if len(A._columns) != m:
+            raise ValueError('labels must be unique.')
+
+        A._data = data
         return A
 
     def __init__(self, uri=None, modality=None):
         super(Scores, self).__init__()
 
-        index = MultiIndex(
-            levels=[[], []], labels=[[], []],
-            names=[SEGMENT, TRACK]
-        )
+        self._reset_tracks()
+        self._reset_labels()
+        self._data = np.empty((0, 0), dtype=np.float64)
 
-        self._df = DataFrame(index=index, dtype=np.float64)
         self.modality = modality
         self.uri = uri
-        self._timelineHasChanged = True
+
+    def _reset_labels(self, labels=()):
+        """(Re)build label index"""
+        self._labels = []
+        self._columns = {}
+        for label in labels:
+            self._add_label(label)
+
+    def _add_label(self, label):
+        """Add new label and return its column index"""
+        column = len(self._labels)
+        self._labels.append(label)
+        self._columns[label] = column
+        return column
+
+    def _reserve(self, n_rows, n_columns):
+        """Make sure internal array can store (n_rows, n_columns) scores
+
+        Capacity is (at least) doubled every time it is exceeded so that
+        adding scores one at a time remains cheap.
+        """
+        N, M = self._data.shape
+        if n_rows <= N and n_columns <= M:
+            return
+        shape = (max(n_rows, 2 * N) if n_rows > N else N,
+                 max(n_columns, 2 * M) if n_columns > M else M)
+        data = np.empty(shape, dtype=np.float64)
+        data.fill(np.nan)
+        data[:N, :M] = self._data
+        self._data = data
+
+    def _values(self):
+        """(n_tracks, n_labels) view of scores, in insertion order"""
+        return self._data[:len(self._segments), :len(self._labels)]
+
+    def _take(self, rows, segments=None, tracks=None):
+        """New scores made of the requested `rows`
+
+        Parameters
+        ----------
+        rows : list or numpy array
+            Row indices
+        segments, tracks : list, optional
+            When provided, use these instead of original segments and tracks.
+        """
+        rows = np.asarray(rows, dtype=int)
+        if segments is None:
+            segments = [self._segments[row] for row in rows]
+        if tracks is None:
+            tracks = [self._tracks[row] for row in rows]
+        return self.__class__.from_arrays(
+            segments, tracks, self._labels, self._values()[rows],
+            uri=self.uri, modality=self.modality)
+
+    def _with_data(self, data, labels=None):
+        """New scores with same tracks but new `data` (and `labels`)"""
+        return self.__class__.from_arrays(
+            self._segments, self._tracks,
+            self._labels if labels is None else labels, data,
+            uri=self.uri, modality=self.modality)
+
+    def to_df(self):
+        """Convert to (segment, track)-indexed pandas DataFrame"""
+
+        rows = self._sorted_rows()
+
+        if len(rows) == 0:
+            index = MultiIndex(
+                levels=[[], []], labels=[[], []],
+                names=[SEGMENT, TRACK]
+            )
+        else:
+            # (make sure segments are not converted into plain tuples)
+            segments = np.empty((len(rows), ), dtype=object)
+            segments[:] = [self._segments[row] for row in rows]
+            tracks = np.empty((len(rows), ), dtype=object)
+            tracks[:] = [self._tracks[row] for row in rows]
+            index = MultiIndex.from_arrays([segments, tracks],
+                                           names=[SEGMENT, TRACK])
+
+        return DataFrame(data=self._values()[rows], index=index,
+                         columns=list(self._labels), dtype=np.float64)
 
     # del scores[segment]
     # del scores[segment, :]
@@ -364,21 +556,30 @@ class Scores(AnnotationMixin, object):
 
         if isinstance(key, Segment):
             segment = key
-            self._df = self._df.drop(segment, axis=0)
-            self._timelineHasChanged = True
+            if segment not in self._segment_tracks:
+                raise KeyError('%r' % (segment, ))
+            rows = [row for row, s in enumerate(self._segments)
+                    if s != segment]
 
         elif isinstance(key, tuple) and len(key) == 2:
             segment, track = key
-            self._df = self._df.drop((segment, track), axis=0)
-            self._timelineHasChanged = True
+            if (segment, track) not in self._rows:
+                raise KeyError('%r' % (key, ))
+            removed = self._rows[segment, track]
+            rows = [row for row in range(len(self._segments))
+                    if row != removed]
 
         else:
             raise KeyError('')
 
+        A = self._take(rows)
+        self._reset_tracks(A._segments, A._tracks)
+        self._data = A._data
+
     # value = scores[segment, track, label]
     def __getitem__(self, key):
         segment, track, label = key
-        return self._df.get_value((segment, track), label)
+        return self._data[self._rows[segment, track], self._columns[label]]
 
     def get_track_scores(self, segment, track):
         """Get all scores for a given track.
@@ -394,13 +595,56 @@ class Scores(AnnotationMixin, object):
         scores : dict
             {label: score} dictionary
         """
-        return {l: self._df.get_value((segment, track), l) for l in self._df}
+        values = self._data[self._rows[segment, track]]
+        return {l: values[j] for l, j in self._columns.iteritems()}
+
+    def align(self, tracks, labels=None):
+        """Get scores of many tracks at once
+
+        Parameters
+        ----------
+        tracks : iterable
+            (segment, track) tuples, e.g. annotation.itertracks()
+        labels : list, optional
+            Ordered list of labels. Defaults to self.labels().
+
+        Returns
+        -------
+        found : (n_tracks, ) boolean numpy array
+            found[i] is True if ith track has scores
+        data : (n_found, n_labels) numpy array
+            Scores of found tracks, in requested order.
+            Missing scores (and unknown labels) are set to NaN.
+        """
+
+        if labels is None:
+            labels = self.labels()
+
+        rows = np.array([self._rows.get(key, -1) for key in tracks],
+                        dtype=int)
+        columns = np.array([self._columns.get(label, -1) for label in labels],
+                           dtype=int)
+
+        found = rows > -1
+        data = self._values()[rows[found]][:, np.maximum(columns, 0)]
+        data[:, columns < 0] = np.nan
+
+        return found, data
 
     # scores[segment, track, label] = value
     def __setitem__(self, key, value):
         segment, track, label = key
-        self._df = self._df.set_value((segment, track), label, value)
-        self._timelineHasChanged = True
+
+        row = self._rows.get((segment, track), None)
+        if row is None:
+            row = self._add_track(segment, track)
+
+        column = self._columns.get(label, None)
+        if column is None:
+            column = self._add_label(label)
+
+        self._reserve(len(self._segments), len(self._labels))
+        self._data[row, column] = value
 
     def labels(self, unknown=True):
         """List of labels
@@ -420,7 +664,7 @@ class Scores(AnnotationMixin, object):
         -------
             Labels are sorted based on their string representation.
         """
-        labels = sorted(self._df.columns, key=str)
+        labels = sorted(self._labels, key=str)
         if unknown:
             return labels
         else:
@@ -429,18 +673,15 @@ class Scores(AnnotationMixin, object):
     def itervalues(self):
         """Iterate over annotation as (segment, track, label, value) tuple"""
 
-        # make sure segment/track pairs are sorted
-        self._df = self._df.sort_index()
+        # sorted segment/track pairs
+        rows = self._sorted_rows()
+        values = self._values()[rows]
 
-        # yield one (segment, track, label) tuple per loop
-        labels = self._df.columns
-        for (segment, track), columns in self._df.iterrows():
-            for label in labels:
-                value = columns[label]
-                if np.isnan(value):
-                    continue
-                else:
-                    yield segment, track, label, value
+        # yield one (segment, track, label) tuple per non-NaN value
+        I, J = np.nonzero(~np.isnan(values))
+        for i, j, value in itertools.izip(I, J, values[I, J]):
+            row = rows[i]
+            yield self._segments[row], self._tracks[row], self._labels[j], value
 
     def _rank(self, invert):
 
@@ -450,26 +691,29 @@ class Scores(AnnotationMixin, object):
         else:
             direction = -1.
 
-        def nan_rank(data):
+        data = self._values()
+        n, m = data.shape
 
-            # replace NaN by -inf or +inf depending on the requested direction
-            finite = np.isfinite(data)
-            fixed = np.where(finite, direction*data, -direction*np.inf)
+        # replace NaN by -inf or +inf depending on the requested direction
+        finite = np.isfinite(data)
+        fixed = np.where(finite, direction*data, -direction*np.inf)
 
-            # do the actual argsort
-            indices = np.argsort(fixed)
-            # get rank from argsort
-            rank = np.argsort(indices)
+        # do the actual (row-wise) argsort
+        indices = np.argsort(fixed, axis=1, kind='mergesort')
 
-            # special treatment for inverted NaN scores
-            # (we want ranks to start at 0 even in case of NaN)
-            if invert:
-                rank = np.where(finite, rank-(len(data)-np.sum(finite)), np.nan)
-            else:
-                rank = np.where(finite, rank, np.nan)
-            return rank
+        # get rank from argsort
+        rank = np.empty((n, m), dtype=np.float64)
+        rank[np.arange(n)[:, np.newaxis], indices] = np.arange(m)
+
+        # special treatment for inverted NaN scores
+        # (we want ranks to start at 0 even in case of NaN)
+        if invert:
+            missing = m - np.sum(finite, axis=1)
+            rank = np.where(finite, rank-missing[:, np.newaxis], np.nan)
+        else:
+            rank = np.where(finite, rank, np.nan)
 
-        return self._df.apply(nan_rank, axis=1)
+        return rank
 
     def rank(self, invert=False):
         """
@@ -485,9 +729,7 @@ class Scores(AnnotationMixin, object):
         rank : `Scores`
 
         """
-        A = self.__class__(uri=self.uri, modality=self.modality)
-        A._df = self._rank(invert)
-        return A
+        return self._with_data(self._rank(invert))
 
     def nbest(self, n, invert=False):
         """
@@ -506,14 +748,34 @@ class Scores(AnnotationMixin, object):
             New scores where only n-best are kept.
 
         """
-        df = self._df.copy()
-        nbest = self._rank(invert) < n
-        df[~nbest] = np.nan
+        data = np.array(self._values())
+        N, M = data.shape
 
-        A = self.__class__(uri=self.uri, modality=self.modality)
-        A._df = df
+        if n < 1:
+            data.fill(np.nan)
 
-        return A
+        elif n < M:
+
+            # same as self._rank(invert) < n, without sorting every row
+            direction = 1. if invert else -1.
+            finite = np.isfinite(data)
+            fixed = np.where(finite, direction*data, np.inf)
+
+            # nth best score of each row
+            nth = np.partition(fixed, n-1, axis=1)[:, n-1:n]
+
+            # keep all better scores and, in case of ties with the nth best,
+            # as many as needed in label order (like a stable sort would)
+            better = fixed < nth
+            tie = fixed == nth
+            available = n - np.sum(better, axis=1)[:, np.newaxis]
+            nbest = better | (tie & (np.cumsum(tie, axis=1) <= available))
+            data[~(nbest & finite)] = np.nan
+
+        else:
+            data[~np.isfinite(data)] = np.nan
+
+        return self._with_data(data)
 
     def subset(self, labels, invert=False):
         """Scores subset
@@ -541,10 +803,10 @@ class Scores(AnnotationMixin, object):
         else:
             labels = labels & set(self.labels())
 
-        A = self.__class__(uri=self.uri, modality=self.modality)
-        A._df = self._df[list(labels)]
+        columns = [j for j, l in enumerate(self._labels) if l in labels]
 
-        return A
+        return self._with_data(self._values()[:, columns],
+                               labels=[self._labels[j] for j in columns])
 
     def to_annotation(self, threshold=-np.inf, posterior=False):
         """
@@ -566,38 +828,64 @@ class Scores(AnnotationMixin, object):
         if not self:
             return annotation
 
-        best = self.nbest(1, invert=False)
-
-        if posterior:
-
-            # compute unknown posterior
-            func = lambda p: 1. - np.nansum(p, axis=1)
-            Pu = self.apply(func, new_columns=['_'])
-
-            # threshold best target posterior
-            # with unknown posterior and threshold
-            for segment, track, label, value in best.itervalues():
+        rows = self._sorted_rows()
+        data = self._values()[rows]
 
-                if value < Pu[segment, track, '_'] or value < threshold:
-                    label = Unknown()
+        # best target score (tracks with no finite score are skipped)
+        finite = np.isfinite(data)
+        fixed = np.where(finite, data, -np.inf)
+        best = np.argmax(fixed, axis=1)
+        value = fixed[np.arange(len(rows)), best]
 
-                annotation[segment, track] = label
+        # threshold best target score with threshold
+        unknown = value < threshold
 
-        else:
+        if posterior:
+            # threshold best target posterior with unknown posterior
+            unknown |= value < unknown_posterior(data)
 
-            # threshold best target score with threshold
-            for segment, track, label, value in best.itervalues():
-                if value < threshold:
-                    label = Unknown()
-                annotation[segment, track] = label
+        for i in np.flatnonzero(np.any(finite, axis=1)):
+            row = rows[i]
+            label = Unknown() if unknown[i] else self._labels[best[i]]
+            annotation[self._segments[row], self._tracks[row]] = label
 
         return annotation
 
     def map(self, func):
-        """Apply function to all values"""
-        A = self.__class__(uri=self.uri, modality=self.modality)
-        A._df = func(self._df)
-        return A
+        """Apply function to all values
+
+        Parameters
+        ----------
+        func : func
+            Function expecting (n_tracks x n_labels) numpy array as input,
+            and returning an array with the same shape (typically, a
+            vectorized function such as np.log or a calibration).
+
+        Returns
+        -------
+        scores : `Scores`
+            Scores with same tracks and labels, and `func` values.
+
+        Raises
+        ------
+        ValueError
+            If `func` does not return an array with the same shape.
+
+        Notes
+        -----
+        `func` used to be given the internal (segment, track)-indexed
+        pandas DataFrame. It is now given a plain numpy array (rows in
+        insertion order, NaN for missing values). Functions relying on
+        DataFrame methods must wrap it themselves, e.g.
+        `scores.map(lambda values: DataFrame(values).fillna(0.).values)`.
+        """
+        values = self._values()
+        data = np.asarray(func(values), dtype=np.float64)
+        if data.shape != values.shape:
+            raise ValueError(
+                'map function must return a %s array (got %s).' %
+                (values.shape, data.shape))
+        return self._with_data(data)
 
     def apply(self, data_func, new_index=None, new_columns=None):
         """Apply `data_func` on internal numpy array
@@ -606,28 +894,36 @@ class Scores(AnnotationMixin, object):
         ----------
         data_func : func
             Function expecting (index x columns) numpy array as input
+            (with (segment, track) rows sorted like in `itertracks`)
         new_index : iterable, optional
             When provided, these will be the index of returned array.
+            It must be an iterable of (segment, track) tuples.
         new_columns : iterable, optional
             When provided, these will be the columns of returned array.
         """
-        new_data = data_func(self._df.values)
+
+        rows = self._sorted_rows()
+        new_data = np.asarray(data_func(self._values()[rows]))
 
         if new_index is None:
-            new_index = self._df.index
+            segments = [self._segments[row] for row in rows]
+            tracks = [self._tracks[row] for row in rows]
+        else:
+            new_index = list(new_index)
+            segments = [s for s, _ in new_index]
+            tracks = [t for _, t in new_index]
 
         if new_columns is None:
-            new_columns = self._df.columns
-
-        df = DataFrame(
-            data=new_data,
-            index=new_index,
-            columns=new_columns)
+            new_columns = self._labels
+        new_columns = list(new_columns)
 
-        new_scores = self.__class__(uri=self.uri, modality=self.modality)
-        new_scores._df = df
+        # single column result
+        if new_data.ndim == 1:
+            new_data = new_data.reshape((-1, len(new_columns)))
 
-        return new_scores
+        return self.__class__.from_arrays(
+            segments, tracks, new_columns, new_data,
+            uri=self.uri, modality=self.modality)
 
 
 if __name__ == "__main__":
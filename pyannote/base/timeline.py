@@ -27,6 +27,7 @@ warnings.filterwarnings("ignore",
 from segment import Segment
 from banyan import SortedSet
 from interval_tree import TimelineUpdator
+from pyannote.profiling import profiled
 
 # =====================================================================
 # Timeline class
@@ -190,10 +191,12 @@ class Timeline(object):
         segments = self._segments.union(other._segments)
         return Timeline(segments=segments, uri=self.uri)
 
+    @profiled('Timeline.co_iter')
     def co_iter(self, other):
         for segment, other_segment in self._segments.co_iter(other._segments):
             yield segment, other_segment
 
+    @profiled('Timeline.crop', items=lambda self, *args, **kwargs: len(self))
     def crop(self, other, mode='intersection', mapping=False):
 
         if isinstance(other, Segment):
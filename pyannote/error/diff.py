@@ -19,7 +19,7 @@
 #     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
 
 import numpy as np
-from munkres import Munkres
+from pyannote.algorithm.util.assignment import linear_sum_assignment
 
 from pyannote.metric.identification import UnknownIDMatcher
 from pyannote.base.annotation import Annotation
@@ -46,7 +46,6 @@ class Diff(object):
         else:
             self.matcher = UnknownIDMatcher()
         self.unknown = unknown
-        self.munkres = Munkres()
 
     def compare(self, reference, hypothesis, correct=True):
         """
@@ -136,7 +135,7 @@ class Diff(object):
                 for i2, e2 in enumerate(new_errors):
                     match[i1, i2] = self._match_errors(e1, e2)
 
-            mapping = self.munkres.compute(2-match)
+            mapping = zip(*linear_sum_assignment(2-match))
 
             for i1, i2 in mapping:
 
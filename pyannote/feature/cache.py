@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Persistent feature extraction cache
+
+Features are stored on disk as .npy files (loaded as memory-mapped arrays)
+indexed by the hash of the audio file content and of the feature extractor
+parameters, so that they are shared by every process and run using the same
+cache directory, whatever the path of the audio file.
+"""
+
+import os
+import json
+import errno
+import hashlib
+import tempfile
+import itertools
+import traceback
+import multiprocessing
+import numpy as np
+from pyannote.base.segment import SlidingWindow
+from pyannote.base.feature import SlidingWindowFeature
+
+# default cache directory (unless PYANNOTE_CACHE environment variable is set)
+DEFAULT_DIRECTORY = os.path.join('~', '.pyannote', 'cache', 'feature')
+
+# status of batch extraction (see FeatureCache.extract_many)
+CACHED = 'cached'
+EXTRACTED = 'extracted'
+FAILED = 'failed'
+
+
+def _hash_file(path, chunk_size=1 << 20):
+    """SHA1 hash of file content"""
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), ''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def _hash_extractor(extractor):
+    """SHA1 hash of feature extractor class and parameters
+
+    Parameters are the extractor attributes (e.g. sample_rate, block_size,
+    step_size, coefs, ... for YaafeMFCC).
+    """
+    cls = extractor.__class__
+    parameters = sorted(vars(extractor).iteritems())
+    description = '%s.%s%r' % (cls.__module__, cls.__name__, parameters)
+    return hashlib.sha1(description).hexdigest()
+
+
+def _atomic_write(path, write):
+    """Write file with `write(f)` so that it appears all at once
+
+    (data is written to a temporary file which is then renamed)
+    """
+    directory = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.rename(tmp, path)
+    except:
+        os.remove(tmp)
+        raise
+
+
+def _remove(path):
+    """Remove file (if it was not already removed by another process)"""
+    try:
+        os.remove(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+
+def _extract(task):
+    """Extract features of one file into cache (worker of extract_many)"""
+    directory, extractor, wav = task
+    cache = FeatureCache(directory=directory)
+    try:
+        if cache.get(extractor, wav) is not None:
+            return wav, CACHED, None
+        cache.extract(extractor, wav)
+        return wav, EXTRACTED, None
+    except Exception:
+        return wav, FAILED, traceback.format_exc()
+
+
+class FeatureCache(object):
+    """Persistent, content-addressed feature extraction cache
+
+    Parameters
+    ----------
+    directory : str, optional
+        Cache directory. Defaults to PYANNOTE_CACHE environment variable
+        or, if not set, to ~/.pyannote/cache/feature.
+    size_limit : int, optional
+        Maximum size of the cache (in bytes). When exceeded, least recently
+        used features are removed. Defaults to no limit.
+
+    Example
+    -------
+
+    >>> cache = FeatureCache(size_limit=10 * 1024 ** 3)
+    >>> features = cache.extract(YaafeMFCC(), '/path/to/file.wav')
+
+    Notes
+    -----
+    Several processes can safely share the same cache directory: features
+    are written to temporary files which are then atomically renamed.
+    """
+
+    def __init__(self, directory=None, size_limit=None):
+        super(FeatureCache, self).__init__()
+
+        if directory is None:
+            directory = os.environ.get('PYANNOTE_CACHE', DEFAULT_DIRECTORY)
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.size_limit = size_limit
+
+        try:
+            os.makedirs(self.directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        # {(path, size, mtime): content hash} (avoid re-hashing audio files)
+        self._hashes = {}
+
+    def _get_key(self, extractor, wav):
+
+        stat = os.stat(wav)
+        stamp = (os.path.abspath(wav), stat.st_size, stat.st_mtime)
+        if stamp not in self._hashes:
+            self._hashes[stamp] = _hash_file(wav)
+
+        return '%s-%s' % (_hash_extractor(extractor), self._hashes[stamp])
+
+    def _get_paths(self, key):
+        """Paths to feature data (.npy) and sliding window (.json)"""
+        path = os.path.join(self.directory, key)
+        return path + '.npy', path + '.json'
+
+    def get(self, extractor, wav):
+        """Get cached features
+
+        Returns
+        -------
+        features : SlidingWindowFeature or None
+            Memory-mapped features, or None if not in cache.
+        """
+
+        data_path, window_path = self._get_paths(self._get_key(extractor, wav))
+
+        try:
+            data = np.load(data_path, mmap_mode='r')
+            with open(window_path, 'r') as f:
+                window = json.load(f)
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return None
+
+        # mark as recently used
+        try:
+            os.utime(data_path, None)
+        except OSError:
+            pass
+
+        sliding_window = SlidingWindow(**window)
+        return SlidingWindowFeature(data, sliding_window)
+
+    def set(self, extractor, wav, features):
+        """Store features in cache"""
+
+        data_path, window_path = self._get_paths(self._get_key(extractor, wav))
+
+        # sliding window first, data last:
+        # features are available once data file exists
+        sliding_window = features.sliding_window
+        window = {'start': sliding_window.start,
+                  'duration': sliding_window.duration,
+                  'step': sliding_window.step}
+        if np.isfinite(sliding_window.end):
+            window['end'] = sliding_window.end
+        _atomic_write(window_path, lambda f: json.dump(window, f))
+
+        data = np.ascontiguousarray(features.data)
+        _atomic_write(data_path, lambda f: np.save(f, data))
+
+        if self.size_limit is not None:
+            self.evict(self.size_limit)
+
+    def extract(self, extractor, wav):
+        """Extract features, using cached ones when available
+
+        Parameters
+        ----------
+        extractor :
+            Feature extractor (e.g. YaafeMFCC)
+        wav : str
+            Path to audio file
+
+        Returns
+        -------
+        features : SlidingWindowFeature
+        """
+
+        features = self.get(extractor, wav)
+        if features is not None:
+            return features
+
+        features = extractor.extract(wav)
+        self.set(extractor, wav, features)
+
+        # use memory-mapped version (unless it was evicted already)
+        cached = self.get(extractor, wav)
+        return features if cached is None else cached
+
+    def extract_many(self, extractor, wavs, n_jobs=1):
+        """Extract features of many files and store them in cache
+
+        Files whose features are already cached are skipped, so that an
+        interrupted (or partially failed) batch can simply be run again.
+
+        Parameters
+        ----------
+        extractor :
+            Feature extractor (e.g. YaafeMFCC). Must be picklable.
+        wavs : iterable
+            Paths to audio files
+        n_jobs : int, optional
+            Number of worker processes. Defaults to 1.
+
+        Generates
+        ---------
+        wav : str
+            Path to audio file (in order of completion)
+        status : {CACHED, EXTRACTED, FAILED}
+        error : str
+            Error traceback when status is FAILED, None otherwise.
+        """
+
+        tasks = [(self.directory, extractor, wav) for wav in wavs]
+
+        if n_jobs == 1:
+            for result in itertools.imap(_extract, tasks):
+                yield result
+
+        else:
+            pool = multiprocessing.Pool(processes=n_jobs)
+            try:
+                for result in pool.imap_unordered(_extract, tasks):
+                    yield result
+                pool.close()
+            except:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+
+        # size limit is only enforced once the whole batch is done
+        if self.size_limit is not None:
+            self.evict(self.size_limit)
+
+    def _entries(self):
+        """(last use, size, data path, window path) of every cached feature"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npy'):
+                continue
+            data_path = os.path.join(self.directory, name)
+            window_path = data_path[:-4] + '.json'
+            try:
+                stat = os.stat(data_path)
+                size = stat.st_size + os.path.getsize(window_path)
+            except OSError:
+                # removed by another process in the meantime
+                continue
+            entries.append((stat.st_mtime, size, data_path, window_path))
+        return entries
+
+    def size(self):
+        """Total size of cache (in bytes)"""
+        return sum(size for _, size, _, _ in self._entries())
+
+    def evict(self, size_limit):
+        """Remove least recently used features until cache fits `size_limit`
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _, _ in entries)
+        for _, size, data_path, window_path in entries:
+            if total <= size_limit:
+                break
+            _remove(data_path)
+            _remove(window_path)
+            total -= size
+
+    def clear(self):
+        """Remove all cached features"""
+        self.evict(0)
+
+
+def get_cache(cache):
+    """Feature cache from `cache` constructor argument
+
+    Parameters
+    ----------
+    cache : bool, str or FeatureCache
+        False (or None) for no cache, True for default cache, a cache
+        directory or a FeatureCache instance.
+
+    Returns
+    -------
+    cache : FeatureCache or None
+    """
+    if cache is None or cache is False:
+        return None
+    if cache is True:
+        return FeatureCache()
+    if isinstance(cache, basestring):
+        return FeatureCache(directory=cache)
+    return cache
@@ -23,13 +23,47 @@
 import scipy.stats
 import numpy as np
 from pyannote.base.feature import SlidingWindowFeature
-from pyannote.base.segment import Segment
+from pyannote.base.segment import Segment, SlidingWindow
+
+
+def _ranks(x, w, start, stop):
+    """Rank of each frame within its sliding window
+
+    For every frame t in [start, stop), computes the rank of x[t] within
+    window x[t-w/2+1:t-w/2+1+w], exactly as the (w/2-1)th row of
+    np.argsort(np.argsort(window, 0), 0) would.
+
+    Ranks are obtained by counting (for all frames at once) window values
+    lower than the current one, which is O(n.w) instead of O(n.w.log(w)),
+    with a loop over the w window offsets instead of the n frames.
+    Frames with tied (or NaN) values, whose rank depends on the order in
+    which argsort breaks ties, are computed with argsort.
+    """
+
+    h = w / 2
+    target = x[start:stop]
+    less = np.zeros(target.shape, dtype=int)
+    equal = np.zeros(target.shape, dtype=int)
+
+    # NaN comparisons are dealt with below
+    with np.errstate(invalid='ignore'):
+        for k in range(w):
+            other = x[start-h+1+k:stop-h+1+k]
+            less += other < target
+            equal += other == target
+
+    # target itself is the only equal value (unless tied or NaN)
+    for r in np.unique(np.nonzero(equal != 1)[0]):
+        t = start + r
+        a = np.argsort(np.argsort(x[t-h+1:t-h+1+w, :], 0), 0)
+        less[r] = a[h-1]
+
+    return less
 
 
 def _warp(x, w):
     """
     Apply feature warping using sliding window
-    NB: C implementation is more than 10x faster...
 
     Parameters:
     ----------
@@ -56,13 +90,11 @@ def _warp(x, w):
         y[0:w/2, :] = table[a[0:w/2, :]]
 
         # n-w middle vectors using sliding window
-        for i in range(0, n-w):
-            a = np.argsort(np.argsort(x[i+1:i+1+w, :], 0), 0)
-            y[i+w/2, :] = table[a[w/2-1]]
+        y[w/2:n-w+w/2, :] = table[_ranks(x, w, w/2, n-w+w/2)]
 
-        # last w/2 vectors
+        # last w-w/2 vectors
         a = np.argsort(np.argsort(x[n-w:n, :], 0), 0)
-        y[n-w/2:n, :] = table[a[w/2:w, :]]
+        y[n-w+w/2:n, :] = table[a[w/2:w, :]]
 
     else:
         # perform global warping
@@ -72,6 +104,78 @@ def _warp(x, w):
     return y
 
 
+def _iterwarp(chunks, w):
+    """Streaming version of `_warp`
+
+    Parameters
+    ----------
+    chunks : iterable
+        Consecutive (nb_frames, dim_frame) chunks of features
+    w : int
+        size of sliding window (nb_frames)
+
+    Generates
+    ---------
+    i : int
+        Index of first frame of warped chunk
+    y : ndarray
+        Warped chunk. Concatenated chunks are the same as _warp(x, w).
+    """
+
+    h = w / 2
+    table = scipy.stats.norm.ppf((np.arange(w) + 0.5) / w) if w > 0 else None
+
+    # buffer of frames [offset, offset + len(buffer))
+    buffer = None
+    offset = 0
+    # index of next frame to warp
+    done = 0
+
+    for chunk in chunks:
+
+        buffer = chunk if buffer is None else np.vstack([buffer, chunk])
+        end = offset + len(buffer)
+
+        # need more than w frames to use sliding window
+        if w <= 0 or end <= w:
+            continue
+
+        # first w/2 vectors
+        if done == 0:
+            a = np.argsort(np.argsort(buffer[0:w, :], 0), 0)
+            y = np.zeros_like(buffer[:h])
+            y[:] = table[a[0:h, :]]
+            yield 0, y
+            done = h
+
+        # middle vectors whose window is complete
+        stop = end - w + h
+        if stop > done:
+            y = np.zeros_like(buffer[done-offset:stop-offset])
+            y[:] = table[_ranks(buffer, w, done - offset, stop - offset)]
+            yield done, y
+            done = stop
+
+        # only keep frames needed for next windows (and last w vectors)
+        keep = min(done - h + 1, end - w)
+        buffer = buffer[keep-offset:]
+        offset = keep
+
+    if buffer is None:
+        return
+
+    n = offset + len(buffer)
+
+    if w > 0 and n > w:
+        # last w-w/2 vectors
+        y = np.zeros_like(buffer[done-offset:n-offset])
+        a = np.argsort(np.argsort(buffer[n-w-offset:n-offset, :], 0), 0)
+        y[:] = table[a[h:w, :]]
+        yield done, y
+    else:
+        yield 0, _warp(buffer, w)
+
+
 def warp(features, window):
     """
     Parameters
@@ -88,3 +192,42 @@ def warp(features, window):
     y = _warp(x, w)
 
     return SlidingWindowFeature(y, features.sliding_window)
+
+
+def iterwarp(features, window):
+    """Streaming feature warping
+
+    Parameters
+    ----------
+    features : iterable
+        Consecutive chunks of features, as SlidingWindowFeature
+        (e.g. YaafeFeatureExtractor.iterextract)
+    window : float
+        Duration of warping window in seconds
+
+    Generates
+    ---------
+    warped : SlidingWindowFeature
+        Consecutive chunks of warped features. Once concatenated, they are
+        the same as `warp` applied to concatenated features.
+    """
+
+    features = iter(features)
+    try:
+        first = next(features)
+    except StopIteration:
+        return
+
+    sliding_window = first.sliding_window
+    _, w = sliding_window.segmentToRange(Segment(start=0., end=window))
+
+    def chunks():
+        yield first.data
+        for chunk in features:
+            yield chunk.data
+
+    for i, y in _iterwarp(chunks(), w):
+        shifted = SlidingWindow(
+            duration=sliding_window.duration, step=sliding_window.step,
+            start=sliding_window.start + i * sliding_window.step)
+        yield SlidingWindowFeature(y, shifted)
@@ -20,7 +20,6 @@
 
 
 import scipy.io.wavfile
-import yaafelib
 from pyannote.base.feature import SlidingWindowFeature
 from pyannote.base.segment import SlidingWindow
 import numpy as np
@@ -54,6 +53,47 @@ class YaafeFrame(SlidingWindow):
         )
 
 
+def _pop_aligned(outputs, stack, pending):
+    """Stack feature vectors available for every output
+
+    Yaafe outputs (e.g. derivatives) may lag behind one another when audio
+    is processed incrementally: frames are buffered until all outputs are
+    available.
+
+    Parameters
+    ----------
+    outputs : dict
+        Yaafe outputs {name: (n_frames, dimension) array}
+    stack : list
+        Output names, in stacking order
+    pending : dict
+        {name: list of arrays} buffer of frames not stacked yet.
+        It is updated in place.
+
+    Returns
+    -------
+    data : numpy array or None
+        (n_frames, dimension) stacked features, None if no frame is ready.
+    """
+
+    for name in stack:
+        output = outputs.get(name, None)
+        if output is not None and len(output):
+            pending[name].append(output)
+
+    n = min(sum(len(output) for output in pending[name]) for name in stack)
+    if n == 0:
+        return None
+
+    data = []
+    for name in stack:
+        output = np.vstack(pending[name])
+        data.append(output[:n])
+        pending[name] = [output[n:]] if len(output) > n else []
+
+    return np.hstack(data)
+
+
 class YaafeFeatureExtractor(object):
     """
 
@@ -83,13 +123,29 @@ class YaafeFeatureExtractor(object):
             'get_flow_and_stack method must be implemented'
         )
 
-    def extract(self, wav):
+    def _get_engine(self):
+        import yaafelib
+        data_flow, stack = self.get_flow_and_stack()
+        engine = yaafelib.Engine()
+        engine.load(data_flow)
+        return engine, stack
+
+    def _get_frame(self):
+        return YaafeFrame(
+            blockSize=self.block_size, stepSize=self.step_size,
+            sampleRate=self.sample_rate)
+
+    def extract(self, wav, chunk_duration=None):
         """Extract features
 
         Parameters
         ----------
         wav : string
             Path to wav file.
+        chunk_duration : float, optional
+            When provided, audio is read and processed by chunks of
+            `chunk_duration` seconds (see `iterextract`), so that the whole
+            audio signal never has to fit in memory. Features are the same.
 
         Returns
         -------
@@ -97,11 +153,13 @@ class YaafeFeatureExtractor(object):
 
         """
 
-        # hack
-        data_flow, stack = self.get_flow_and_stack()
+        if chunk_duration is not None:
+            chunks = [chunk.data for chunk in self.iterextract(
+                wav, chunk_duration=chunk_duration)]
+            data = np.vstack(chunks) if chunks else np.empty((0, 0))
+            return SlidingWindowFeature(data, self._get_frame())
 
-        engine = yaafelib.Engine()
-        engine.load(data_flow)
+        engine, stack = self._get_engine()
 
         sample_rate, raw_audio = scipy.io.wavfile.read(wav)
         assert sample_rate == self.sample_rate, "sample rate mismatch"
@@ -111,11 +169,66 @@ class YaafeFeatureExtractor(object):
         features = engine.processAudio(audio)
         data = np.hstack([features[name] for name in stack])
 
-        sliding_window = YaafeFrame(
-            blockSize=self.block_size, stepSize=self.step_size,
-            sampleRate=self.sample_rate)
+        return SlidingWindowFeature(data, self._get_frame())
+
+    def iterextract(self, wav, chunk_duration=60.):
+        """Extract features chunk by chunk
+
+        The wav file is memory-mapped and fed to Yaafe incrementally, so that
+        memory usage does not depend on the duration of the audio file.
+        Concatenating all chunks gives the same features as `extract`.
+
+        Parameters
+        ----------
+        wav : string
+            Path to wav file.
+        chunk_duration : float, optional
+            Duration of audio chunks, in seconds. Defaults to one minute.
+
+        Generates
+        ---------
+        features : SlidingWindowFeature
+            Consecutive chunks of features. The sliding window of each chunk
+            is shifted so that frames keep their original (YaafeFrame)
+            timestamps.
+        """
+
+        engine, stack = self._get_engine()
+
+        sample_rate, raw_audio = scipy.io.wavfile.read(wav, mmap=True)
+        assert sample_rate == self.sample_rate, "sample rate mismatch"
+
+        # same sample order as `extract`
+        raw_audio = raw_audio.reshape(-1)
+        chunk_size = max(1, int(chunk_duration * self.sample_rate))
+
+        frame = self._get_frame()
+        pending = {name: [] for name in stack}
+        n = 0
+
+        def _chunk(data, n):
+            sliding_window = SlidingWindow(
+                duration=frame.duration, step=frame.step,
+                start=frame.start + n * frame.step)
+            return SlidingWindowFeature(data, sliding_window)
+
+        engine.reset()
+
+        for i in xrange(0, len(raw_audio), chunk_size):
+            audio = np.array(raw_audio[i:i+chunk_size],
+                             dtype=np.float64, order='C').reshape(1, -1)
+            engine.writeInput('audio', audio)
+            engine.process()
+            data = _pop_aligned(engine.readAllOutputs(), stack, pending)
+            if data is not None:
+                yield _chunk(data, n)
+                n += len(data)
 
-        return SlidingWindowFeature(data, sliding_window)
+        # process remaining frames
+        engine.flush()
+        data = _pop_aligned(engine.readAllOutputs(), stack, pending)
+        if data is not None:
+            yield _chunk(data, n)
 
 
 class YaafeMFCC(YaafeFeatureExtractor):
@@ -191,6 +304,7 @@ class YaafeMFCC(YaafeFeatureExtractor):
 
     def get_flow_and_stack(self):
 
+        import yaafelib
         feature_plan = yaafelib.FeaturePlan(sample_rate=self.sample_rate)
         stack = []
 
@@ -23,6 +23,7 @@
 
 import scipy.stats
 import numpy as np
+from pyannote.profiling import profiled
 
 
 class BaseMetric(object):
@@ -102,6 +103,9 @@ class BaseMetric(object):
         else:
             return rate
 
+    @profiled('BaseMetric.__call__',
+              items=lambda self, reference, hypothesis, *args, **kwargs:
+              len(reference) + len(hypothesis))
     def __call__(self, reference, hypothesis, detailed=False, **kwargs):
         """Compute metric value and accumulate components
 
@@ -23,7 +23,7 @@ from pyannote.metric.base import Precision, Recall, \
     PRECISION_RETRIEVED, PRECISION_RELEVANT_RETRIEVED, \
     RECALL_RELEVANT, RECALL_RELEVANT_RETRIEVED
 from pyannote.util import deprecated
-from munkres import Munkres
+from pyannote.algorithm.util.assignment import linear_sum_assignment
 import numpy as np
 
 from base import BaseMetric
@@ -47,7 +47,6 @@ class IDMatcher(object):
 
     def __init__(self):
         super(IDMatcher, self).__init__()
-        self.munkres = Munkres()
 
     def oneToOneMatch(self, id1, id2):
         # Two IDs match if they are equal to each other
@@ -85,7 +84,7 @@ class IDMatcher(object):
                 for i2, id2 in enumerate(ids2):
                     match[i1, i2] = self.oneToOneMatch(id1, id2)
 
-            mapping = self.munkres.compute(1-match)
+            mapping = zip(*linear_sum_assignment(1-match))
 
             for i1, i2 in mapping:
                 if i1 >= n1:
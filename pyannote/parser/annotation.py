@@ -27,6 +27,7 @@ import xgtf
 import etf
 import tvm
 import facetracks
+import pab
 
 
 class AnnotationParser(object):
@@ -41,6 +42,7 @@ class AnnotationParser(object):
         '.facetracks': facetracks.FACETRACKSParser,
         '.etf0': etf.ETF0Parser,
         '.tvm': tvm.TVMParser,
+        '.pab': pab.PABParser,
     }
 
     @classmethod
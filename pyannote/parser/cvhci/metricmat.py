@@ -59,7 +59,7 @@ class METRICMATParser(object):
         for i in range(D.shape[0]):
             D[i, i] = .5*D[i, i]
 
-        return LabelMatrix(ilabels=tracks, jlabels=tracks, Mij=D)
+        return LabelMatrix(data=D, rows=tracks, columns=tracks)
 
 if __name__ == "__main__":
     import doctest
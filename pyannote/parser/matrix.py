@@ -19,12 +19,14 @@
 #     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
 
 import tvt
+import pab
+from cvhci import metricmat
 
 
 class LabelMatrixParser(object):
 
     specific = {
-        # '.mat': METRICMATParser,
+        '.mat': metricmat.METRICMATParser,
         '.tvt': tvt.TVTParser,
     }
 
@@ -38,10 +40,31 @@ class LabelMatrixParser(object):
         super(LabelMatrixParser, self).__init__()
         self.__parser = None
 
-    def read(self, path, **kwargs):
+    def read(self, path, uri=None, rows=None, columns=None, **kwargs):
+        """Read label matrix
+
+        Parameters
+        ----------
+        path : str
+            Path to label matrix. PAB files (.pab) may contain matrices for
+            several resources, other unsupported extensions are unpickled.
+        uri : str, optional
+            Resource identifier (PAB files only)
+        rows, columns : iterable, optional
+            Only load these rows and columns (PAB files only). Otherwise,
+            the whole matrix is memory-mapped.
+
+        Returns
+        -------
+        matrix : `LabelMatrix`
+        """
 
         GuessParser, extension = self.__class__.guess(path)
 
+        if extension == '.pab':
+            return pab.PABParser().read(path, uri=uri).get_matrix(
+                uri=uri, rows=rows, columns=columns)
+
         if GuessParser is None:
             import pickle
             f = open(path, 'r')
@@ -53,3 +76,32 @@ class LabelMatrixParser(object):
                 self.__parser = GuessParser(**kwargs)
             matrix = self.__parser.read(path, **kwargs)
         return matrix
+
+    def write(self, matrix, path, uri=None, **kwargs):
+        """Write label matrix
+
+        Parameters
+        ----------
+        matrix : `LabelMatrix`
+        path : str
+            Path to output file. Matrix is added to PAB files (.pab) and
+            pickled for unsupported extensions. Extensions with a specific
+            (read-only) parser, e.g. .mat or .tvt, cannot be written.
+        uri : str, optional
+            Resource identifier (PAB files only)
+        **kwargs
+            PAB storage options (dtype, sparse). See `PABParser.write`.
+        """
+
+        GuessParser, extension = self.__class__.guess(path)
+        if GuessParser is not None:
+            raise NotImplementedError(
+                "writing '%s' files is not supported. supported: .pab "
+                "(or any extension but %s for pickle)." %
+                (extension, ', '.join(sorted(self.__class__.specific))))
+        if extension == '.pab':
+            pab.PABParser().write(matrix, path, uri=uri, append=True, **kwargs)
+        else:
+            import pickle
+            with open(path, 'w') as f:
+                pickle.dump(matrix, f)
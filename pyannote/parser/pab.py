@@ -0,0 +1,530 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+PAB (PyAnnote Binary) is a compact binary container for annotations,
+timelines, scores and label matrices.
+
+A PAB file may contain any number of entries (one per (uri, modality) pair).
+Each entry is stored as little-endian columnar arrays (segment start and end
+times, indices into per-entry track and label tables, scores) and described
+in a JSON index located at the end of the file. Therefore, any entry can be
+loaded without parsing the others, and arrays are memory-mapped (not copied)
+when loaded.
+
+Label matrices can be stored as dense or sparse (CSR, missing values being
+NaN) blocks, in any numeric type (e.g. float32 to halve the size of large
+distance matrices). Use `PABParser.get_matrix` to extract the sub-matrix of
+a given set of labels without loading the whole matrix.
+
+File layout: magic | arrays (8-byte aligned) | JSON index | trailer, where
+trailer is (index offset, index length, magic) packed as '<QQ8s'.
+"""
+
+import os
+import json
+import struct
+import itertools
+import numpy as np
+
+from pyannote.base.segment import Segment
+from pyannote.base.timeline import Timeline
+from pyannote.base.annotation import Annotation, Unknown
+from pyannote.base.scores import Scores
+from pyannote.base.matrix import LabelMatrix
+
+MAGIC = 'PYANNOTE'
+VERSION = 1
+TRAILER = '<QQ8s'
+
+ANNOTATION = 'annotation'
+TIMELINE = 'timeline'
+SCORES = 'scores'
+MATRIX = 'matrix'
+
+# encoding of Unknown labels in string tables
+UNKNOWN = '__unknown__'
+
+
+def _encode(value):
+    """JSON-serializable version of a label, track, uri or modality"""
+
+    if isinstance(value, Unknown):
+        return {UNKNOWN: str(value)}
+
+    if isinstance(value, str):
+        return value.decode('utf-8')
+
+    if isinstance(value, np.generic):
+        value = value.item()
+
+    if value is None or isinstance(value, (unicode, bool, int, long, float)):
+        return value
+
+    raise ValueError('unsupported label or track type: %s' % type(value))
+
+
+def _decode(value):
+    """Inverse of `_encode` (a new Unknown is created for each Unknown)"""
+
+    if isinstance(value, dict):
+        return Unknown()
+
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+
+    return value
+
+
+def _table(values):
+    """Index of each value in the table of (unique) values
+
+    Returns
+    -------
+    indices : numpy array
+    table : list
+    """
+    index = {}
+    indices = np.array([index.setdefault(value, len(index))
+                        for value in values], dtype='<i4')
+    table = sorted(index, key=index.get)
+    return indices, table
+
+
+def _csr_take(indptr, indices, data, rows, columns, n_columns):
+    """Dense sub-matrix of a CSR matrix (missing values are NaN)
+
+    Parameters
+    ----------
+    indptr, indices, data : numpy arrays
+        CSR matrix
+    rows, columns : numpy arrays
+        Indices of requested rows and columns
+    n_columns : int
+        Total number of columns
+
+    Returns
+    -------
+    block : (len(rows), len(columns)) numpy array
+    """
+
+    # position of each column in the block (-1 if not requested)
+    position = -np.ones((n_columns, ), dtype=int)
+    position[columns] = np.arange(len(columns))
+
+    # gather stored values of requested rows
+    starts = indptr[rows].astype(int)
+    counts = indptr[rows + 1].astype(int) - starts
+    offsets = np.cumsum(counts) - counts
+    stored = np.repeat(starts - offsets, counts) + np.arange(np.sum(counts))
+
+    i = np.repeat(np.arange(len(rows)), counts)
+    j = position[indices[stored]]
+    keep = j > -1
+
+    block = np.empty((len(rows), len(columns)), dtype=data.dtype)
+    block.fill(np.nan)
+    block[i[keep], j[keep]] = data[stored[keep]]
+    return block
+
+
+def _read_index(f):
+    """Read index of PAB file `f` and return it with its offset"""
+
+    size = struct.calcsize(TRAILER)
+    f.seek(0, os.SEEK_END)
+    if f.tell() < len(MAGIC) + size:
+        raise IOError('not a PAB file.')
+    f.seek(-size, os.SEEK_END)
+    offset, length, magic = struct.unpack(TRAILER, f.read(size))
+    if magic != MAGIC:
+        raise IOError('not a PAB file.')
+    f.seek(offset)
+    index = json.loads(f.read(length))
+    if index['version'] > VERSION:
+        raise IOError('unsupported PAB version (%d).' % index['version'])
+    return index, offset
+
+
+class PABParser(object):
+
+    def __init__(self):
+        super(PABParser, self).__init__()
+        self.reset()
+
+    def reset(self):
+        # (uri, modality) ==> (memory-mapped file, entry description)
+        self._loaded = {}
+
+    def __get_uris(self):
+        return sorted(set([v for (v, m) in self._loaded]))
+    uris = property(fget=__get_uris)
+    """"""
+
+    def __get_modalities(self):
+        return sorted(set([m for (v, m) in self._loaded]))
+    modalities = property(fget=__get_modalities)
+    """"""
+
+    # == writing
+
+    def _arrays(self, obj, dtype=None, sparse=False):
+        """Columnar arrays and string tables describing `obj`"""
+
+        arrays, tables = {}, {}
+
+        if isinstance(obj, Timeline):
+            kind = TIMELINE
+            segments = list(obj)
+            arrays['start'] = np.array([s.start for s in segments], dtype='<f8')
+            arrays['end'] = np.array([s.end for s in segments], dtype='<f8')
+
+        elif isinstance(obj, Annotation):
+            kind = ANNOTATION
+            segments, tracks, labels = [], [], []
+            for segment, track, label in obj.itertracks(label=True):
+                segments.append(segment)
+                tracks.append(track)
+                labels.append(label)
+            arrays['start'] = np.array([s.start for s in segments], dtype='<f8')
+            arrays['end'] = np.array([s.end for s in segments], dtype='<f8')
+            arrays['track'], tables['tracks'] = _table(tracks)
+            arrays['label'], tables['labels'] = _table(labels)
+
+        elif isinstance(obj, Scores):
+            kind = SCORES
+            segments = obj._segments
+            arrays['start'] = np.array([s.start for s in segments], dtype='<f8')
+            arrays['end'] = np.array([s.end for s in segments], dtype='<f8')
+            arrays['track'], tables['tracks'] = _table(obj._tracks)
+            arrays['data'] = obj._values().astype('<f8')
+            tables['labels'] = list(obj._labels)
+
+        elif isinstance(obj, LabelMatrix):
+            kind = MATRIX
+            data = obj.df.values
+            if data.dtype.kind not in 'biuf':
+                raise ValueError('only numeric label matrices are supported.')
+            if dtype is None:
+                dtype = data.dtype
+            data = data.astype(np.dtype(dtype).newbyteorder('<'))
+            if sparse:
+                if data.dtype.kind != 'f':
+                    raise ValueError('sparse matrices must be float matrices.')
+                stored = ~np.isnan(data)
+                arrays['indptr'] = np.hstack(
+                    [[0], np.cumsum(np.sum(stored, axis=1))]).astype('<i8')
+                arrays['indices'] = np.nonzero(stored)[1].astype('<i4')
+                arrays['data'] = data[stored]
+            else:
+                arrays['data'] = data
+            tables['rows'] = obj.get_rows()
+            tables['columns'] = obj.get_columns()
+
+        else:
+            raise ValueError('unsupported type: %s' % type(obj))
+
+        tables = {name: [_encode(v) for v in table]
+                  for name, table in tables.iteritems()}
+
+        return kind, arrays, tables
+
+    def write(self, obj, f, uri=None, modality=None, append=False,
+              dtype=None, sparse=False):
+        """Write to PAB file
+
+        Parameters
+        ----------
+        obj : `Annotation`, `Timeline`, `Scores` or `LabelMatrix`
+            Object to store. Use a list to store several objects at once.
+        f : str
+            Path to PAB file
+        uri, modality : str, optional
+            Override `obj` attributes (label matrices have none).
+            Only available when storing one object.
+        append : bool, optional
+            Add entries to existing file `f`. An existing entry with the same
+            (uri, modality) is replaced. Defaults to False (overwrite).
+        dtype : numpy dtype, optional
+            Store label matrices with this type (e.g. np.float32).
+            Defaults to their actual type.
+        sparse : bool, optional
+            Store label matrices as sparse matrices (NaN being missing
+            values). Defaults to False.
+        """
+
+        if isinstance(obj, (list, tuple)):
+            if uri is not None or modality is not None:
+                raise ValueError(
+                    'uri and modality cannot be overriden for several objects.')
+            objs = obj
+        else:
+            objs = [obj]
+
+        if append and os.path.exists(f):
+            g = open(f, 'r+b')
+            index, offset = _read_index(g)
+            g.seek(offset)
+            g.truncate()
+        else:
+            g = open(f, 'wb')
+            g.write(MAGIC)
+            index = {'version': VERSION, 'entries': []}
+
+        with g:
+
+            entries = index['entries']
+
+            for i, obj in enumerate(objs):
+
+                kind, arrays, tables = self._arrays(
+                    obj, dtype=dtype, sparse=sparse)
+
+                entry = {
+                    'type': kind,
+                    'uri': _encode(getattr(obj, 'uri', None)
+                                   if uri is None else uri),
+                    'modality': _encode(getattr(obj, 'modality', None)
+                                        if modality is None else modality),
+                    'arrays': {},
+                }
+                entry.update(tables)
+
+                for name, array in arrays.iteritems():
+                    # 8-byte alignment
+                    g.write('\0' * (-g.tell() % 8))
+                    entry['arrays'][name] = \
+                        [g.tell(), array.dtype.str, array.shape]
+                    g.write(np.ascontiguousarray(array).tostring())
+
+                key = (entry['uri'], entry['modality'])
+                entries[:] = [e for e in entries
+                              if (e['uri'], e['modality']) != key]
+                entries.append(entry)
+
+            offset = g.tell()
+            data = json.dumps(index)
+            g.write(data)
+            g.write(struct.pack(TRAILER, offset, len(data), MAGIC))
+
+    # == reading
+
+    def read(self, path, uri=None, modality=None, **kwargs):
+        """Read PAB file index
+
+        Entries are only loaded when requested (see `__call__`).
+
+        Parameters
+        ----------
+        path : str
+        uri, modality : str, optional
+            Only index entries with this uri (and/or modality)
+        """
+
+        with open(path, 'rb') as f:
+            index, _ = _read_index(f)
+
+        # copy-on-write memory map: loaded arrays share file pages
+        # until they are modified
+        mmap = np.memmap(path, dtype=np.uint8, mode='c')
+
+        for entry in index['entries']:
+            key = (_decode(entry['uri']), _decode(entry['modality']))
+            if uri is not None and key[0] != uri:
+                continue
+            if modality is not None and key[1] != modality:
+                continue
+            self._loaded[key] = (mmap, entry)
+
+        return self
+
+    def _array(self, mmap, entry, name):
+        """Memory-mapped array `name` of `entry`"""
+        offset, dtype, shape = entry['arrays'][name]
+        dtype = np.dtype(str(dtype))
+        count = int(np.prod(shape))
+        return np.frombuffer(mmap, dtype=dtype, count=count,
+                             offset=offset).reshape(shape)
+
+    def _load(self, mmap, entry, uri, modality):
+
+        kind = entry['type']
+        tables = {name: [_decode(v) for v in entry[name]]
+                  for name in ['tracks', 'labels', 'rows', 'columns']
+                  if name in entry}
+
+        if kind == MATRIX:
+            return self._load_matrix(mmap, entry, tables)
+
+        segments = itertools.izip(
+            self._array(mmap, entry, 'start').tolist(),
+            self._array(mmap, entry, 'end').tolist())
+
+        if kind == TIMELINE:
+            return Timeline(segments=[Segment(s, e) for s, e in segments],
+                            uri=uri)
+
+        track_table = tables['tracks']
+        tracks = [track_table[t]
+                  for t in self._array(mmap, entry, 'track').tolist()]
+
+        if kind == SCORES:
+            # 'start' and 'end' are stored in insertion order
+            # (not necessarily sorted), so segments are not shared
+            segments = [Segment(s, e) for s, e in segments]
+            return Scores.from_arrays(
+                segments, tracks, tables['labels'],
+                self._array(mmap, entry, 'data'),
+                uri=uri, modality=modality, copy=False)
+
+        if kind == ANNOTATION:
+            # tracks are stored in sorted order:
+            # group consecutive tracks of the same segment
+            label_table = tables['labels']
+            labels = [label_table[l]
+                      for l in self._array(mmap, entry, 'label').tolist()]
+            _tracks = []
+            previous = None
+            for (s, e), track, label in itertools.izip(
+                    segments, tracks, labels):
+                if (s, e) != previous:
+                    previous = (s, e)
+                    segment_tracks = {}
+                    _tracks.append((Segment(s, e), segment_tracks))
+                segment_tracks[track] = label
+            annotation = Annotation(uri=uri, modality=modality)
+            annotation._set_tracks(_tracks)
+            return annotation
+
+        raise IOError('unsupported PAB entry type (%s).' % kind)
+
+    def _load_matrix(self, mmap, entry, tables, rows=None, columns=None):
+
+        row_table, column_table = tables['rows'], tables['columns']
+
+        # zero-copy
+        if rows is None and columns is None and 'indptr' not in entry['arrays']:
+            return LabelMatrix(data=self._array(mmap, entry, 'data'),
+                               rows=row_table, columns=column_table)
+
+        # indices of requested rows and columns (in storage order)
+        if rows is None:
+            i = np.arange(len(row_table))
+        else:
+            rows = set(rows)
+            i = np.array([k for k, label in enumerate(row_table)
+                          if label in rows], dtype=int)
+        if columns is None:
+            j = np.arange(len(column_table))
+        else:
+            columns = set(columns)
+            j = np.array([k for k, label in enumerate(column_table)
+                          if label in columns], dtype=int)
+
+        data = self._array(mmap, entry, 'data')
+        if 'indptr' in entry['arrays']:
+            data = _csr_take(self._array(mmap, entry, 'indptr'),
+                             self._array(mmap, entry, 'indices'),
+                             data, i, j, len(column_table))
+        else:
+            # only requested rows are actually read from disk
+            data = data[i][:, j]
+
+        return LabelMatrix(data=data,
+                           rows=[row_table[k] for k in i],
+                           columns=[column_table[k] for k in j])
+
+    def _match(self, uri=None, modality=None):
+        """((uri, modality), (mmap, entry)) of the matching entry, or None"""
+
+        match = dict(self._loaded)
+
+        # filter out all entries
+        # but the ones for the requested resource
+        if uri is not None:
+            match = {(v, m): e for (v, m), e in match.iteritems() if v == uri}
+
+        # filter out all remaining entries
+        # but the ones for the requested modality
+        if modality is not None:
+            match = {(v, m): e for (v, m), e in match.iteritems()
+                     if m == modality}
+
+        if len(match) == 0:
+            return None
+        elif len(match) > 1:
+            raise ValueError(
+                'Found more than one matching entry: %s' % match.keys())
+
+        return match.items()[0]
+
+    def get_matrix(self, uri=None, modality=None, rows=None, columns=None):
+        """Get (sub-)matrix
+
+        Parameters
+        ----------
+        uri : str, optional
+            If None and there is more than one resource
+        modality : str, optional
+        rows, columns : iterable, optional
+            Only extract these rows and columns. Labels missing from the
+            matrix are ignored, and storage order is kept. Defaults to all.
+
+        Returns
+        -------
+        matrix : `LabelMatrix`
+        """
+
+        match = self._match(uri=uri, modality=modality)
+        if match is None:
+            raise KeyError('No matching label matrix.')
+
+        _, (mmap, entry) = match
+        if entry['type'] != MATRIX:
+            raise ValueError('Matching entry is not a label matrix.')
+
+        tables = {name: [_decode(v) for v in entry[name]]
+                  for name in ['rows', 'columns']}
+        return self._load_matrix(mmap, entry, tables,
+                                 rows=rows, columns=columns)
+
+    def __call__(self, uri=None, modality=None, **kwargs):
+        """
+
+        Parameters
+        ----------
+        uri : str, optional
+            If None and there is more than one resource
+        modality : str, optional
+
+        Returns
+        -------
+        obj : `Annotation`, `Timeline`, `Scores` or `LabelMatrix`
+            A new object is loaded at each call.
+
+        """
+
+        match = self._match(uri=uri, modality=modality)
+        if match is None:
+            return Annotation(uri=uri, modality=modality)
+
+        (uri, modality), (mmap, entry) = match
+        return self._load(mmap, entry, uri, modality)
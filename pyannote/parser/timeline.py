@@ -20,12 +20,14 @@
 
 import uem
 import srt
+import pab
 
 class TimelineParser(object):
 
     supported = {
         '.uem': uem.UEMParser,
         '.srt': srt.SRTParser,
+        '.pab': pab.PABParser,
     }
 
     def __guess(self, extension):
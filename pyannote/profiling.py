@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Opt-in profiling of core operations
+
+Core operations (e.g. Timeline.co_iter, Annotation._updateLabels or
+get_cooccurrence_matrix) are decorated with `profiled`. Once profiling is
+enabled, their number of calls, cumulative duration and number of processed
+items are recorded, per URI. When it is disabled (default), decorated
+functions are called directly.
+
+Example
+-------
+
+>>> import pyannote.profiling
+>>> pyannote.profiling.enable()
+>>> for uri in pyannote.profiling.iteruris(uris):
+...     metric(reference[uri], hypothesis[uri])
+>>> pyannote.profiling.to_frame()
+"""
+
+import json
+import time
+import inspect
+import functools
+import contextlib
+
+# whether profiling is enabled
+_enabled = False
+
+# URI of currently processed resource
+_uri = None
+
+# {(uri, name): [number of calls, cumulative duration, number of items]}
+_stats = {}
+
+CALLS = 'calls'
+DURATION = 'duration'
+ITEMS = 'items'
+
+
+def enable():
+    """Enable profiling"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Disable profiling (collected statistics are kept)"""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Remove collected statistics"""
+    _stats.clear()
+
+
+@contextlib.contextmanager
+def uri(name):
+    """Aggregate statistics of operations run in this context under `name`
+    """
+    global _uri
+    previous = _uri
+    _uri = name
+    try:
+        yield
+    finally:
+        _uri = previous
+
+
+def iteruris(uris):
+    """Iterate over `uris`, aggregating statistics of the operations run in
+    each loop iteration under the corresponding URI (see `uri`)
+    """
+    for name in uris:
+        with uri(name):
+            yield name
+
+
+def _record(uri, name, duration, items):
+    stats = _stats.setdefault((uri, name), [0, 0., 0])
+    stats[0] += 1
+    stats[1] += duration
+    stats[2] += items
+
+
+def _iterate(name, generator):
+    """Profile `generator` (time spent by consumer is not counted)"""
+
+    uri, duration, items = _uri, 0., 0
+
+    try:
+        while True:
+            t = time.time()
+            try:
+                item = next(generator)
+            except StopIteration:
+                break
+            finally:
+                duration += time.time() - t
+            items += 1
+            yield item
+
+    # also recorded when generator is not exhausted
+    finally:
+        _record(uri, name, duration, items)
+
+
+def profiled(name, items=None):
+    """Profiling decorator
+
+    Parameters
+    ----------
+    name : str
+        Name of decorated operation (e.g. 'Timeline.co_iter')
+    items : func, optional
+        Called with the arguments of the decorated function, returns the
+        number of items it processes (e.g. lambda self: len(self)).
+        For generator functions, defaults to the number of generated items.
+    """
+
+    def decorate(func):
+
+        if inspect.isgeneratorfunction(func):
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not _enabled:
+                    return func(*args, **kwargs)
+                return _iterate(name, func(*args, **kwargs))
+
+        else:
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not _enabled:
+                    return func(*args, **kwargs)
+                n = 0 if items is None else items(*args, **kwargs)
+                uri = _uri
+                t = time.time()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    _record(uri, name, time.time() - t, n)
+
+        return wrapper
+
+    return decorate
+
+
+def get_stats():
+    """Collected statistics
+
+    Returns
+    -------
+    stats : list
+        One {'uri': uri, 'name': name, 'calls': number of calls,
+        'duration': cumulative duration (in seconds), 'items': number of
+        processed items} dictionary per (uri, operation) pair.
+    """
+    return [{'uri': uri, 'name': name,
+             CALLS: calls, DURATION: duration, ITEMS: items}
+            for (uri, name), (calls, duration, items)
+            in sorted(_stats.iteritems())]
+
+
+def to_json(f=None):
+    """Export collected statistics as JSON (see get_stats)
+
+    Parameters
+    ----------
+    f : file, optional
+        Write to file `f`. Defaults to return JSON string.
+    """
+    if f is None:
+        return json.dumps(get_stats())
+    json.dump(get_stats(), f)
+
+
+def to_frame():
+    """Export collected statistics as pandas DataFrame
+
+    Returns
+    -------
+    df : DataFrame
+        Indexed by (uri, name), with columns 'calls', 'duration' and 'items'.
+    """
+    from pandas import DataFrame
+    df = DataFrame(get_stats(), columns=['uri', 'name',
+                                         CALLS, DURATION, ITEMS])
+    return df.set_index(['uri', 'name'])
@@ -180,3 +180,77 @@ class Gaussian(object):
         return np.float(
             dmean.dot(np.sqrt(self.inv_covar * g.inv_covar)).dot(dmean.T)
         )
+
+
+def delta_bic(gaussian, others, penalty_coef=3.5):
+    """Delta BIC between one gaussian and many others at once
+
+    Vectorized version of [gaussian.bic(other)[0] for other in others]
+    where merged covariance matrices and their log-determinants are
+    computed for all `others` at once.
+
+    Parameters
+    ----------
+    gaussian : Gaussian
+    others : list of Gaussian
+        Gaussians with the same dimension and covariance type.
+    penalty_coef : float, optional
+        Defaults to 3.5
+
+    Returns
+    -------
+    delta_bic : (len(others), ) numpy array
+    """
+
+    if not others:
+        return np.zeros((0, ))
+
+    covariance_type = gaussian.covariance_type
+
+    n1 = float(gaussian.n_samples)
+    m1 = gaussian.mean.reshape((-1, ))
+    k1 = gaussian.covar
+    ldc1 = gaussian.log_det_covar if n1 > 0 else 0.
+
+    n2 = np.array([g.n_samples for g in others], dtype=np.float64)
+    m2 = np.vstack([g.mean.reshape((1, -1)) for g in others])
+    ldc2 = np.array([g.log_det_covar if g.n_samples > 0 else 0.
+                     for g in others])
+
+    n = n1 + n2
+    d = len(m1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+
+        # merged mean
+        m = (n1 * m1 + n2[:, np.newaxis] * m2) / n[:, np.newaxis]
+
+        # merged covariance log-determinant
+        if covariance_type == 'diag':
+            v1 = np.diag(k1)
+            v2 = np.vstack([np.diag(g.covar) for g in others])
+            v = (n1 * (v1 + m1 * m1) +
+                 n2[:, np.newaxis] * (v2 + m2 * m2)) / n[:, np.newaxis] \
+                - m * m
+            ldc = np.sum(np.log(np.abs(v)), axis=1)
+            N = 2 * d
+
+        else:
+            k2 = np.array([g.covar for g in others])
+            k = (n1 * (k1 + np.outer(m1, m1)) +
+                 n2[:, np.newaxis, np.newaxis] *
+                 (k2 + np.einsum('ki,kj->kij', m2, m2))) \
+                / n[:, np.newaxis, np.newaxis] \
+                - np.einsum('ki,kj->kij', m, m)
+            ldc = np.empty(n.shape)
+            valid = n > 0
+            ldc[valid] = np.linalg.slogdet(k[valid])[1]
+            N = int(d * (d + 1) / 2. + d)
+
+        # merging with an empty gaussian does not change anything
+        if n1 == 0:
+            ldc = ldc2.copy()
+        ldc = np.where(n2 == 0, ldc1, ldc)
+        ldc = np.where(n == 0, 0., ldc)
+
+        return n * ldc - n1 * ldc1 - n2 * ldc2 - penalty_coef * N * np.log(n)
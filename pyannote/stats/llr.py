@@ -19,8 +19,8 @@
 #     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
 
 import numpy as np
+from posterior import logsumexp
 from sklearn.isotonic import IsotonicRegression
-from sklearn.linear_model import LinearRegression
 
 
 class LLR(object):
@@ -79,7 +79,7 @@ class LLR(object):
         """
 
         # Get log-likelihood ratio
-        llr = self.toLogLikelihoodRatio(scores)
+        llr = np.asarray(self.toLogLikelihoodRatio(scores), dtype=np.float64)
 
         # Get prior
         if self.equal_priors:
@@ -89,12 +89,21 @@ class LLR(object):
 
         priorRatio = (1.-prior) / prior
 
-        # Compute posterior probability
-        return 1/(1+priorRatio*np.exp(-llr))
+        # Compute posterior probability 1/(1+priorRatio*exp(-llr)) in place
+        posterior = np.negative(llr, out=llr)
+        np.exp(posterior, out=posterior)
+        posterior *= priorRatio
+        posterior += 1.
+        return np.reciprocal(posterior, out=posterior)
 
 
 class LLRIsotonicRegression(LLR):
-    """Log-likelihood ratio estimation by isotonic regression"""
+    """Log-likelihood ratio estimation by isotonic regression
+
+    The isotonic mapping is stored as a monotone piecewise-linear lookup
+    table (`knots_`, `values_`). Scores out of the table range are mapped
+    to the extreme log-likelihood ratios.
+    """
 
     def __init__(self, equal_priors=False):
         super(LLRIsotonicRegression, self).__init__()
@@ -108,11 +117,40 @@ class LLRIsotonicRegression(LLR):
 
         y_min = np.min(ratios)
         y_max = np.max(ratios)
-        self.ir = IsotonicRegression(y_min=y_min, y_max=y_max)
-        self.ir.fit(scores, ratios)
+        ir = IsotonicRegression(y_min=y_min, y_max=y_max)
+        ir.fit(scores, ratios)
+
+        self._set_lookup_table(scores, ir.predict(scores))
 
         return self
 
+    def _set_lookup_table(self, knots, values):
+
+        order = np.argsort(knots, kind='mergesort')
+        knots = np.asarray(knots, dtype=np.float64)[order]
+        values = np.asarray(values, dtype=np.float64)[order]
+
+        # only keep knots where the slope changes
+        # (plus both ends of the table)
+        if len(knots) > 2:
+            slopes = np.diff(values) / np.diff(knots)
+            keep = np.ones(knots.shape, dtype=bool)
+            keep[1:-1] = slopes[1:] != slopes[:-1]
+            knots = knots[keep]
+            values = values[keep]
+
+        self.knots_ = np.ascontiguousarray(knots)
+        self.values_ = np.ascontiguousarray(values)
+
+    def __setstate__(self, state):
+        # files saved before lookup tables were introduced
+        # contain the scikit-learn IsotonicRegression instance
+        ir = state.pop('ir', None)
+        self.__dict__.update(state)
+        if ir is not None and not hasattr(self, 'knots_'):
+            knots = np.unique(ir.X_)
+            self._set_lookup_table(knots, ir.predict(knots))
+
     def toLogLikelihoodRatio(self, scores):
         """Get log-likelihood ratio given scores
 
@@ -126,22 +164,14 @@ class LLRIsotonicRegression(LLR):
         llr : numpy array
             Log-likelihood ratio array with same shape as input `scores`
         """
-        x_min = np.min(self.ir.X_)
-        x_max = np.max(self.ir.X_)
-
-        oob_min = np.where(scores < x_min)
-        oob_max = np.where(scores > x_max)
-        ok = np.where((scores >= x_min) * (scores <= x_max))
-
-        calibrated = np.zeros(scores.shape)
-        calibrated[ok] = self.ir.transform(scores[ok])
-        calibrated[oob_min] = self.ir.y_min
-        calibrated[oob_max] = self.ir.y_max
-        return calibrated
+        return np.interp(scores, self.knots_, self.values_)
 
 
 class LLRLinearRegression(LLR):
-    """Log-likelihood ratio estimation by linear regression"""
+    """Log-likelihood ratio estimation by linear regression
+
+    llr = slope_ * score + intercept_
+    """
 
     def __init__(self, equal_priors=False):
         super(LLRLinearRegression, self).__init__()
@@ -153,11 +183,20 @@ class LLRLinearRegression(LLR):
 
         scores, ratios = self._get_scores_ratios(X, Y)
 
-        self.lr = LinearRegression(fit_intercept=True, normalize=False)
-        self.lr.fit(scores, ratios)
+        # least-square fit of ratios = slope * scores + intercept
+        self.slope_, self.intercept_ = np.polyfit(scores, ratios, 1)
 
         return self
 
+    def __setstate__(self, state):
+        # files saved before lookup tables were introduced
+        # contain the scikit-learn LinearRegression instance
+        lr = state.pop('lr', None)
+        self.__dict__.update(state)
+        if lr is not None and not hasattr(self, 'slope_'):
+            self.slope_ = float(np.ravel(lr.coef_)[0])
+            self.intercept_ = float(np.ravel(lr.intercept_)[0])
+
     def toLogLikelihoodRatio(self, scores):
         """Get log-likelihood ratio given scores
 
@@ -171,23 +210,6 @@ class LLRLinearRegression(LLR):
         llr : numpy array
             Log-likelihood ratio array with same shape as input `scores`
         """
-        return self.lr.transform(scores)
-
-
-def logsumexp(a, b=None, axis=0):
-    """{Over|under}flow-robust computation of log(sum(b*exp(a)))
-
-    Parameters
-    ----------
-    a : numpy array
-    b :
-    """
-    a = np.rollaxis(a, axis)
-    vmax = np.nanmax(a, axis=0)
-    if b is None:
-        out = np.log(np.sum(np.exp(a - vmax), axis=0))
-    else:
-        b = np.atleast_2d(b).T
-        out = np.log(np.sum(b * np.exp(a - vmax), axis=0))
-    out += vmax
-    return out
+        llr = np.multiply(scores, self.slope_)
+        llr += self.intercept_
+        return llr
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Log-likelihood ratio to posterior probability conversion
+
+All computations are done in the log domain so that large log-likelihood
+ratios (or large numbers of targets) do not overflow. Labels (targets) are
+expected along the last axis of input arrays.
+"""
+
+import numpy as np
+
+
+def logsumexp(a, b=None, axis=0):
+    """{Over|under}flow-robust computation of log(sum(b*exp(a)))
+
+    Parameters
+    ----------
+    a : numpy array
+    b : numpy array, optional
+        Weights, with shape a.shape[axis]
+    axis : int, optional
+        Axis over which the sum is taken. Defaults to 0.
+
+    Returns
+    -------
+    out : numpy array
+        Same shape as `a` without `axis`
+    """
+    a = np.rollaxis(np.asarray(a, dtype=np.float64), axis)
+
+    if b is not None:
+        b = np.asarray(b, dtype=np.float64).reshape(
+            (-1, ) + (1, ) * (a.ndim - 1))
+        with np.errstate(divide='ignore'):
+            a = a + np.log(b)
+
+    vmax = np.max(a, axis=0)
+    # rows made of -inf only (i.e. sum is 0.)
+    vmax = np.where(np.isfinite(vmax), vmax, 0.)
+
+    with np.errstate(divide='ignore'):
+        out = np.log(np.sum(np.exp(a - vmax), axis=0))
+    out += vmax
+    return out
+
+
+def log_posterior(llr, priors, unknown_prior=0., out=None):
+    """Log-posterior probabilities from log-likelihood ratios
+
+    log p(i|x) = log P(i) + llr(i) - log(P(?) + sum_j P(j) exp(llr(j)))
+
+    where P(i) is the prior probability of target i, and P(?) the prior
+    probability of unknown targets (open-set).
+
+    Parameters
+    ----------
+    llr : (..., n_targets) array-like
+        Log-likelihood ratios
+    priors : (n_targets, ) array-like
+        Target prior probabilities
+    unknown_prior : float, optional
+        Unknown prior probability. Defaults to 0 (close-set).
+    out : (..., n_targets) numpy array, optional
+        Contiguous float array where to store the output.
+        Use out=llr to do the conversion in place.
+
+    Returns
+    -------
+    log_posterior : (..., n_targets) numpy array
+    """
+
+    if out is None:
+        out = np.array(llr, dtype=np.float64, order='C')
+    elif out is not llr:
+        out[...] = llr
+
+    with np.errstate(divide='ignore'):
+        # log P(i) + llr(i)
+        out += np.log(np.asarray(priors, dtype=np.float64))
+        log_unknown = np.log(unknown_prior)
+
+    # log(P(?) + sum_j P(j) exp(llr(j))) with max trick
+    vmax = np.maximum(np.max(out, axis=-1), log_unknown)[..., np.newaxis]
+    vmax[~np.isfinite(vmax)] = 0.
+
+    buffer = np.subtract(out, vmax)
+    np.exp(buffer, out=buffer)
+    denominator = np.sum(buffer, axis=-1)[..., np.newaxis]
+    denominator += np.exp(log_unknown - vmax)
+    with np.errstate(divide='ignore'):
+        np.log(denominator, out=denominator)
+    denominator += vmax
+
+    # (posterior is undefined -- NaN -- when all priors are zero)
+    with np.errstate(invalid='ignore'):
+        out -= denominator
+    return out
+
+
+def posterior(llr, priors, unknown_prior=0., out=None):
+    """Posterior probabilities from log-likelihood ratios
+
+    Same as exp(log_posterior(...)). See `log_posterior` for details.
+    """
+    out = log_posterior(llr, priors, unknown_prior=unknown_prior, out=out)
+    return np.exp(out, out=out)
+
+
+def unknown_posterior(posteriors):
+    """Unknown posterior probability from target posterior probabilities
+
+    Parameters
+    ----------
+    posteriors : (..., n_targets) array-like
+        Target posterior probabilities (NaN are ignored)
+
+    Returns
+    -------
+    unknown : (..., ) numpy array
+        1 - sum_i p(i|x), clipped to [0, 1]
+    """
+    unknown = 1. - np.nansum(posteriors, axis=-1)
+    return np.clip(unknown, 0., 1.)
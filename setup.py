@@ -43,8 +43,7 @@ setup(
         'numpy >=1.7.1',
         'scipy >=0.13.0',
         'banyan >=0.1.5',
-        'pandas >=0.12.0',
-        'munkres >=1.0.5.4',
+        'pandas >=0.17.0',
         'decorator >=3.4.0',
         'networkx >=1.8.1',
         'scikit-learn >=0.14',
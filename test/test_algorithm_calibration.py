@@ -23,3 +23,51 @@ class test_algorithm_calibration(object):
 
     def setup(self):
         pass
+
+    def teardown(self):
+        pass
+
+    def test_isotonic_lookup_table(self):
+        import numpy as np
+        from pyannote.stats.llr import LLRIsotonicRegression
+        rng = np.random.RandomState(0)
+        X = np.concatenate([rng.randn(1000), rng.randn(1000) + 2.])
+        Y = np.concatenate([np.zeros(1000), np.ones(1000)])
+        llr = LLRIsotonicRegression().fit(X, Y)
+        scores = np.linspace(-10., 10., 200).reshape((20, 10))
+        calibrated = llr.toLogLikelihoodRatio(scores)
+        assert calibrated.shape == scores.shape
+        assert np.all(np.diff(calibrated.ravel()) >= 0)
+        assert calibrated[0, 0] == llr.values_[0]
+        assert calibrated[-1, -1] == llr.values_[-1]
+
+    def test_to_file(self):
+        import os
+        import tempfile
+        import numpy as np
+        from pyannote.algorithm.calibration.clustering import \
+            ClusteringCalibration
+        rng = np.random.RandomState(0)
+        X = np.concatenate([rng.randn(1000), rng.randn(1000) + 2.])
+        Y = np.concatenate([np.zeros(1000), np.ones(1000)])
+        calibration = ClusteringCalibration(method='linear')
+        calibration.llr.fit(X, Y)
+        calibration._X, calibration._Y = X, Y
+        _, path = tempfile.mkstemp()
+        try:
+            calibration.to_file(path)
+            loaded = ClusteringCalibration.from_file(path)
+        finally:
+            os.remove(path)
+        # training data is not serialized
+        assert not hasattr(loaded, '_X') and not hasattr(loaded, '_Y')
+        scores = rng.randn(5, 5)
+        assert np.allclose(loaded.llr.toPosteriorProbability(scores),
+                           calibration.llr.toPosteriorProbability(scores))
+
+    def test_authentication_no_scores(self):
+        from nose.tools import assert_raises
+        from pyannote.algorithm.calibration.authentication import \
+            AuthenticationCalibration
+        with assert_raises(ValueError):
+            AuthenticationCalibration().fit([], [])
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+from pyannote import Segment, Annotation
+from pyannote.stats.gaussian import Gaussian
+from pyannote.algorithm.clustering.hac.model import HACModel
+from pyannote.algorithm.diarization.bic import BICModel, BICClustering
+from pyannote.algorithm.clustering.hac.hac import \
+    HierarchicalAgglomerativeClustering
+from pyannote.algorithm.clustering.hac.clusters import HACClusters
+from pyannote.algorithm.clustering.hac.history import HACHistory
+from pyannote.algorithm.clustering.hac.linkage import \
+    AverageLinkageModel, SimilarityThresholdStop
+from pyannote.base.matrix import LabelMatrix
+from pyannote.base.segment import SlidingWindow
+from pyannote.base.feature import SlidingWindowFeature
+
+
+class DurationModel(HACModel):
+    """Toy model relying on (actual) annotation at current iteration"""
+
+    def __init__(self):
+        super(DurationModel, self).__init__()
+        self.statuses = []
+
+    def get_model(self, cluster, annotation=None, status=None, **kwargs):
+        assert isinstance(annotation, Annotation)
+        self.statuses.append(status)
+        # (Annotation method not available in HACClusters)
+        return annotation.subset(set([cluster])).get_timeline().duration()
+
+    def merge_models(self, clusters, **kwargs):
+        return sum(self.get_model(cluster, **kwargs) for cluster in clusters)
+
+    def get_similarity(self, cluster1, cluster2, models=None, **kwargs):
+        return -abs(models[cluster1] - models[cluster2])
+
+    def is_symmetric(self):
+        return True
+
+
+class CountingBICModel(BICModel):
+    """BIC model counting calls to `get_model`"""
+
+    calls = 0
+
+    def get_model(self, cluster, **kwargs):
+        CountingBICModel.calls += 1
+        return super(CountingBICModel, self).get_model(cluster, **kwargs)
+
+
+class test_algorithm_clustering(object):
+
+    def setup(self):
+        self.annotation = Annotation(uri='uri', modality='speaker')
+        self.annotation[Segment(0, 1), '_'] = 'a'
+        self.annotation[Segment(1, 2), '_'] = 'b'
+        self.annotation[Segment(2, 3), '_'] = 'c'
+        self.annotation[Segment(3, 4), '_'] = 'd'
+        self.annotation[Segment(4, 5), '_'] = 'a'
+
+    def teardown(self):
+        pass
+
+    def test_hac_clusters(self):
+        clusters = HACClusters(self.annotation)
+        clusters.merge(['a', 'b'], 'a')
+        clusters.merge(['c', 'd'], 'd')
+        clusters.merge(['d', 'a'], 'e')
+        assert clusters.labels() == ['e']
+        assert clusters.get_cluster('b') == 'e'
+        assert sorted(clusters.get_members('e')) == ['a', 'b', 'c', 'd']
+        assert list(clusters.label_coverage('e')) == [Segment(0, 5)]
+        annotation = clusters.to_annotation()
+        assert annotation.labels() == ['e']
+        assert self.annotation.labels() == ['a', 'b', 'c', 'd']
+
+    def test_hac_history(self):
+        history = HACHistory(self.annotation)
+        history.add_iteration(['a', 'b'], 1., 'b')
+        history.add_iteration(['b', 'c'], 0.5, 'a')
+        assert history[0].labels() == ['a', 'b', 'c', 'd']
+        assert history[1].labels() == ['b', 'c', 'd']
+        assert history[2].labels() == ['a', 'd']
+        assert history[2][Segment(2, 3), '_'] == 'a'
+
+    def test_hac_history_linkage(self):
+        history = HACHistory(self.annotation)
+        history.add_iteration(['a', 'b'], 1., 'a')
+        history.add_iteration(['c', 'd'], 0.5, 'c')
+        history.add_iteration(['a', 'c'], -1., 'a')
+        leaves, linkage = history.get_linkage()
+        assert leaves == ['a', 'b', 'c', 'd']
+        assert np.array_equal(linkage, [[0, 1, 0., 2],
+                                        [2, 3, 0.5, 2],
+                                        [4, 5, 2., 4]])
+        assert history.get_n_iterations(0.) == 2
+        assert history.cut(0.).labels() == ['a', 'c']
+        assert history.cut(0.75).labels() == ['a', 'c', 'd']
+        assert history.get_translation(3)['d'] == 'a'
+
+    def test_hac_history_scipy_linkage(self):
+        from scipy.cluster.hierarchy import is_valid_linkage, fcluster
+        history = HACHistory(self.annotation)
+        history.add_iteration(['a', 'b'], 0.9, 'a')
+        history.add_iteration(['c', 'd'], 0.7, 'c')
+        history.add_iteration(['a', 'c'], 0.2, 'a')
+        leaves, linkage = history.get_linkage()
+        assert is_valid_linkage(linkage)
+        assert np.all(linkage[:, 2] >= 0)
+        clusters = fcluster(linkage, 0.4, criterion='distance')
+        assert clusters[0] == clusters[1] and clusters[2] == clusters[3]
+        assert clusters[0] != clusters[2]
+        assert len(set(fcluster(linkage, 0.1, criterion='distance'))) == 3
+        # raw similarities are kept for cut(threshold)
+        assert [i.similarity for i in history.iterations] == [0.9, 0.7, 0.2]
+        assert history.cut(0.5).labels() == ['a', 'c']
+
+    def test_hac_history_non_monotone_linkage(self):
+        # e.g. BIC similarity may increase after a merge
+        history = HACHistory(self.annotation)
+        history.add_iteration(['a', 'b'], 3., 'a')
+        history.add_iteration(['a', 'c'], 1., 'a')
+        history.add_iteration(['a', 'd'], 2., 'a')
+        _, linkage = history.get_linkage()
+        assert np.array_equal(linkage[:, 2], [0., 2., 2.])
+        from scipy.cluster.hierarchy import is_valid_linkage, is_monotonic
+        assert is_valid_linkage(linkage) and is_monotonic(linkage)
+
+    def test_bic_similarity_array(self):
+        np.random.seed(1337)
+        models = {c: Gaussian(covariance_type='full').fit(
+                  np.random.randn(20 + 10 * i, 3) + i)
+                  for i, c in enumerate('abcd')}
+        model = BICModel(covariance_type='full')
+        batched = model.get_similarity_array('abcd', models=models)
+        rowwise = HACModel.get_similarity_array(model, 'abcd', models=models)
+        assert np.allclose(batched, rowwise)
+        assert np.allclose(batched, batched.T)
+        assert np.allclose(
+            model.get_similarities('a', ['b', 'c'], models=models),
+            [model.get_similarity('a', c, models=models) for c in 'bc'])
+
+    def test_average_linkage_update(self):
+        labels = ['a', 'b', 'c', 'd']
+        data = -np.array([[0., 1., 4., 6.],
+                          [1., 0., 3., 5.],
+                          [4., 3., 0., 2.],
+                          [6., 5., 2., 0.]])
+        feature = LabelMatrix(data=data, rows=labels, columns=labels)
+        model = AverageLinkageModel()
+        models = {label: (label, ) for label in labels}
+        model.get_similarity_array(labels, models=models, feature=feature)
+        models['a'] = model.merge_models(
+            ['a', 'b'], models=models, feature=feature)
+        del models['b']
+        assert model.get_similarity('a', 'c', models=models,
+                                    feature=feature) == -3.5
+        assert np.allclose(
+            model.get_similarities('d', ['a', 'c'], models=models,
+                                   feature=feature), [-5.5, -2.])
+
+    def test_hac_annotation_hooks(self):
+        model = DurationModel()
+        hac = HierarchicalAgglomerativeClustering(
+            model, stop=SimilarityThresholdStop(threshold=-1.5))
+        annotation = hac(self.annotation)
+        assert annotation.labels() == ['a', 'c']
+        assert all(isinstance(status, HACClusters)
+                   for status in model.statuses)
+
+    def test_hac_clusters_indices(self):
+        np.random.seed(1337)
+        window = SlidingWindow(duration=0.02, step=0.01)
+        feature = SlidingWindowFeature(np.random.randn(600, 2), window)
+        clusters = HACClusters(self.annotation)
+        for label in 'abcd':
+            clusters.get_indices(label, feature)
+        clusters.merge(['a', 'c'], 'a')
+        clusters.merge(['b', 'd'], 'd')
+        for cluster in ['a', 'd']:
+            expected = feature.crop(clusters.label_timeline(cluster))
+            indices = clusters.get_indices(cluster, feature)
+            assert np.array_equal(feature.data[indices], expected)
+        # merged indices are not computed again
+        clusters.annotation = None
+        clusters.merge(['a', 'd'], 'a')
+        assert np.array_equal(feature.data[clusters.get_indices('a', feature)],
+                              feature.crop(Segment(0, 5)))
+
+    def test_bic_clustering_models(self):
+        np.random.seed(1337)
+        window = SlidingWindow(duration=0.02, step=0.01)
+        feature = SlidingWindowFeature(np.random.randn(600, 2), window)
+        feature.data[200:400] += 10.
+        annotation = Annotation()
+        for i in range(10):
+            annotation[Segment(0.5 * i, 0.5 * (i + 1)), '_'] = i
+        CountingBICModel.calls = 0
+        clustering = BICClustering()
+        clustering.hacModel = CountingBICModel()
+        output = clustering(annotation, feature=feature)
+        # one model per initial cluster, merged models are not computed again
+        assert CountingBICModel.calls == 10
+        assert len(output.labels()) == 2
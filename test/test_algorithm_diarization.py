@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import scipy.io.wavfile
+from pyannote import Segment, Timeline, Annotation
+from pyannote.base.segment import SlidingWindow
+from pyannote.base.feature import SlidingWindowFeature
+from pyannote.algorithm.diarization.bic import BICClustering
+from pyannote.algorithm.diarization.pipeline import DiarizationPipeline, \
+    SAD, SEGMENTATION, CLUSTERING
+
+
+class Stage(object):
+    """Toy speech activity detection and segmentation counting calls"""
+
+    SPEECH = 'speech'
+    calls = []
+
+    def __init__(self, name, duration=0.25):
+        super(Stage, self).__init__()
+        self.name = name
+        self.hmm = self.segmentation = self.feature = duration
+
+    def get_features(self, wav):
+        sample_rate, audio = scipy.io.wavfile.read(wav)
+        data = audio.astype(np.float64).reshape((-1, 160))
+        window = SlidingWindow(duration=0.01, step=0.01)
+        return SlidingWindowFeature(data[:, :2], window)
+
+    def apply(self, features=None, speech=None):
+        Stage.calls.append(self.name)
+        extent = features.getExtent()
+        if speech is None:
+            annotation = Annotation()
+            annotation[extent, '_'] = self.SPEECH
+            return annotation
+        starts = np.arange(extent.start, extent.end, self.segmentation)
+        return Timeline([Segment(t, t + self.segmentation) for t in starts])
+
+
+class test_algorithm_diarization(object):
+
+    def setup(self):
+        self.tmp = tempfile.mkdtemp()
+        np.random.seed(1337)
+        audio = np.random.randint(-1000, 1000, size=16000).astype(np.int16)
+        self.wav = os.path.join(self.tmp, 'a.wav')
+        scipy.io.wavfile.write(self.wav, 16000, audio)
+        self.directory = os.path.join(self.tmp, 'cache')
+        Stage.calls = []
+
+    def teardown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_pipeline(self):
+        pipeline = DiarizationPipeline(
+            Stage(SAD), segmentation=Stage(SEGMENTATION),
+            clustering=BICClustering(penalty_coef=1.),
+            directory=self.directory)
+        diarization = pipeline.apply(self.wav, uri='a')
+        assert Stage.calls == [SAD, SEGMENTATION]
+        assert diarization.uri == 'a'
+        assert set(pipeline.timing) == set(['feature', SAD, SEGMENTATION,
+                                            CLUSTERING])
+        # nothing is computed again
+        cached = pipeline.apply(self.wav, uri='a')
+        assert Stage.calls == [SAD, SEGMENTATION]
+        assert list(cached.itertracks(label=True)) == \
+            list(diarization.itertracks(label=True))
+        # only clustering is computed again
+        pipeline.clustering.hacModel.penalty_coef = 10.
+        _, output, _, error = next(pipeline.apply_many([self.wav]))
+        assert error is None and output.uri is None
+        assert Stage.calls == [SAD, SEGMENTATION]
+        assert len(output.labels()) <= len(diarization.labels())
+        # segmentation (and clustering) is computed again
+        pipeline.segmentation.segmentation = 0.5
+        pipeline.apply(self.wav)
+        assert Stage.calls == [SAD, SEGMENTATION, SEGMENTATION]
+
+    def test_clustering_keys(self):
+        pipeline = DiarizationPipeline(
+            Stage(SAD), segmentation=Stage(SEGMENTATION),
+            clustering=BICClustering(penalty_coef=1.))
+        keys = pipeline._get_keys(self.wav)
+        pipeline.apply(self.wav)
+        # run-time state does not change keys
+        pipeline.clustering.hacModel._similarity = np.random.randn(10, 10)
+        assert pipeline._get_keys(self.wav) == keys
+        # parameters do
+        pipeline.clustering.hacModel.penalty_coef = 10.
+        other_keys = pipeline._get_keys(self.wav)
+        assert other_keys[SEGMENTATION] == keys[SEGMENTATION]
+        assert other_keys[CLUSTERING] != keys[CLUSTERING]
@@ -22,6 +22,7 @@ from pyannote import Segment, Annotation
 from pyannote.algorithm.mapping import ConservativeDirectMapper
 from pyannote.algorithm.mapping import ArgMaxMapper
 from pyannote.algorithm.mapping import HungarianMapper
+from pyannote.algorithm.mapping import LouvainMapper
 
 
 class test_algorithm_mapping(object):
@@ -85,3 +86,60 @@ class test_algorithm_mapping(object):
         assert set(mapping['A']) == set(['a'])
         assert set(mapping['B']) == set(['b'])
         assert set(mapping['C']) == set(['c'])
+
+    def test_hungarian_mapper_rectangular(self):
+        hm = HungarianMapper()
+
+        # 'd' does not cooccur with any target label
+        # and 'b' cannot be mapped to both 'B' and 'D'
+        source = self.source.copy()
+        source[Segment(5.0, 6.0), '_'] = 'd'
+        source[Segment(7.0, 8.0), '_'] = 'b'
+        target = self.target.copy()
+        target[Segment(7.0, 7.5), '_'] = 'D'
+
+        mapping = hm(source, target)
+        assert set(mapping['a']) == set(['A'])
+        assert set(mapping['b']) == set(['B'])
+        assert set(mapping['c']) == set(['C'])
+        assert set(mapping['d']) == set([])
+        assert 'D' not in set.union(*[set(mapping[l]) for l in 'abcd'])
+
+    def test_louvain_mapper(self):
+        lm = LouvainMapper()
+
+        # 'd' and 'D' do not cooccur with any other label
+        source = self.source.copy()
+        source[Segment(5.0, 6.0), '_'] = 'd'
+        target = self.target.copy()
+        target[Segment(7.0, 7.5), '_'] = 'D'
+
+        mapping = lm(source, target)
+        assert set(mapping['a']) == set(['A'])
+        assert set(mapping['b']) == set(['B', 'C'])
+        assert set(mapping['c']) == set(['B', 'C'])
+        assert set(mapping['d']) == set([])
+        assert 'D' not in set.union(*[set(mapping[l]) for l in 'abcd'])
+
+    def test_batch(self):
+        hm = HungarianMapper()
+        pairs = [(self.source, self.target), (self.target, self.source)]
+        mappings = hm.batch(pairs)
+        assert len(mappings) == 2
+        assert set(mappings[0]['b']) == set(['B'])
+        assert set(mappings[1]['C']) == set(['c'])
+
+    def test_cross_file(self):
+        hm = HungarianMapper()
+
+        # in this other file, 'b' mostly cooccurs with 'C'
+        source = Annotation(uri='other', modality='source')
+        source[Segment(0.0, 5.0), '_'] = 'b'
+        target = Annotation(uri='other', modality='target')
+        target[Segment(0.0, 5.0), '_'] = 'C'
+
+        mapping = hm.cross_file([(self.source, self.target),
+                                 (source, target)])
+        assert set(mapping['a']) == set(['A'])
+        assert set(mapping['b']) == set(['C'])
+        assert set(mapping['c']) == set([])
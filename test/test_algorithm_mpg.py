@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import numpy as np
+from pyannote.algorithm.mpg.graph import _label_pair_edges
+from pyannote.algorithm.mpg.graph import MultimodalProbabilityGraph
+from pyannote.algorithm.mpg.graph import TrackCooccurrenceStatistics
+from pyannote.algorithm.mpg.graph import TrackCooccurrenceGraph
+from pyannote.algorithm.mpg.sparse import SparseProbabilityGraph
+from pyannote import Segment, Timeline, Annotation
+
+
+def _label_pair_edges_loop(y, probability, cooccurring,
+                           threshold=None, nbest=None):
+    """Track pair edges, one pair at a time (as LabelSimilarityGraph used to)
+    """
+
+    T = len(y)
+
+    hard, soft = {}, {}
+    for i in range(T):
+        for j in range(i + 1, T):
+            l, L = y[i], y[j]
+            if l == L:
+                hard[i, j] = 1.
+            elif cooccurring[l, L]:
+                hard[i, j] = 0.
+            elif not np.isnan(probability[l, L]):
+                if threshold is None or probability[l, L] > threshold:
+                    soft[i, j] = probability[l, L]
+
+    if nbest is not None:
+        best = set()
+        for i in range(T):
+            neighbours = sorted(
+                [(-p, j if k == i else k) for (k, j), p in soft.iteritems()
+                 if i in (k, j)])
+            for _, j in neighbours[:nbest]:
+                best.add((min(i, j), max(i, j)))
+        soft = {edge: p for edge, p in soft.iteritems() if edge in best}
+
+    edges = dict(hard)
+    edges.update(soft)
+    return sorted((i, j, p) for (i, j), p in edges.iteritems())
+
+
+class test_algorithm_mpg(object):
+
+    def setup(self):
+        np.random.seed(1337)
+        self.y = np.random.randint(5, size=30)
+        # raw similarities (outside [0, 1]), some of them not available
+        self.probability = 10. * np.random.randn(5, 5)
+        self.probability = self.probability + self.probability.T
+        self.probability[1, 2] = self.probability[2, 1] = np.nan
+        self.probability[0, 1] = self.probability[1, 0] = -5.
+        self.cooccurring = np.zeros((5, 5), dtype=bool)
+        self.cooccurring[3, 4] = self.cooccurring[4, 3] = True
+
+    def teardown(self):
+        pass
+
+    def test_label_pair_edges(self):
+        for threshold, nbest in [(None, None), (0.5, None),
+                                 (None, 1), (None, 3), (-1., 2)]:
+            edges = _label_pair_edges(
+                self.y, self.probability, self.cooccurring,
+                threshold=threshold, nbest=nbest)
+            expected = _label_pair_edges_loop(
+                self.y, self.probability, self.cooccurring,
+                threshold=threshold, nbest=nbest)
+            assert sorted(edges) == expected
+
+    def test_raw_similarity_is_soft(self):
+        y = np.array([0, 1, 2])
+        probability = np.array([[1., -5., 0.8],
+                                [-5., 1., 0.7],
+                                [0.8, 0.7, 1.]])
+        cooccurring = np.zeros((3, 3), dtype=bool)
+        for threshold, nbest in [(0.5, None), (None, 1)]:
+            edges = _label_pair_edges(y, probability, cooccurring,
+                                      threshold=threshold, nbest=nbest)
+            assert sorted(edges) == [(0, 2, 0.8), (1, 2, 0.7)]
+
+
+def _random_graph(n=12, seed=0):
+    """Small probability graph with hard (p=0, p=1) and soft edges"""
+    random = np.random.RandomState(seed)
+    g = MultimodalProbabilityGraph()
+    g.add_nodes_from(range(n))
+    for i in range(n):
+        for j in range(i + 1, n):
+            if random.rand() < 0.3:
+                p = random.choice([0., 1., 0.3, 0.7])
+                g.add_edge(i, j, probability=p)
+    return g
+
+
+def _edges(g):
+    return sorted((min(e, f), max(e, f), d['probability'])
+                  for e, f, d in g.edges_iter(data=True))
+
+
+class test_algorithm_mpg_sparse(object):
+
+    def setup(self):
+        self.graphs = [_random_graph(seed=seed) for seed in range(5)]
+        # conflicting graph: p=0 edge within a p=1 component
+        g = MultimodalProbabilityGraph()
+        g.add_edge('a', 'b', probability=1.)
+        g.add_edge('b', 'c', probability=1.)
+        g.add_edge('a', 'c', probability=0.)
+        g.add_edge('c', 'd', probability=0.)
+        g.add_edge('d', 'e', probability=0.5)
+        self.graphs.append(g)
+
+    def teardown(self):
+        pass
+
+    def test_propagate_constraints(self):
+        for g in self.graphs:
+            sparse = SparseProbabilityGraph.from_graph(g)
+            assert _edges(sparse) == _edges(g)
+            g.propagate_constraints()
+            sparse.propagate_constraints()
+            assert _edges(sparse) == _edges(g)
+        assert g['a']['c']['probability'] == 1.
+        assert g['a']['d']['probability'] == 0.
+
+    def test_subgraphs_iter(self):
+        for g in self.graphs:
+            sparse = SparseProbabilityGraph.from_graph(g)
+            for threshold in [0., 0.5]:
+                expected = sorted((sorted(c.nodes()), _edges(c))
+                                  for c in g.subgraphs_iter(threshold))
+                components = sorted((sorted(c.nodes()), _edges(c))
+                                    for c in sparse.subgraphs_iter(threshold))
+                assert components == expected
+
+    def test_map(self):
+        with np.errstate(divide='ignore'):
+            for g in self.graphs:
+                sparse = SparseProbabilityGraph.from_graph(g)
+                assert _edges(sparse.map(np.log)) == _edges(g.map(np.log))
+
+
+def _random_annotation(uri, modality, seed):
+    """Annotation with overlapping tracks of a few labels"""
+    random = np.random.RandomState(seed)
+    annotation = Annotation(uri=uri, modality=modality)
+    for t in range(15):
+        start = float(random.randint(0, 40))
+        duration = float(random.randint(1, 10))
+        label = 'person%d' % random.randint(0, 4)
+        annotation[Segment(start, start + duration), t] = label
+    return annotation
+
+
+def _statistics_loop(pairs, min_duration=0.):
+    """(Na, Nb)-indexed statistics, as TrackCooccurrenceGraph used to
+    gather them (tagging the segmentation of both timelines)"""
+    possible_match, actual_match, overlap = {}, {}, {}
+    for A, B in pairs:
+        timeline = A.get_timeline().union(B.get_timeline()).segmentation()
+        timeline = Timeline([s for s in timeline
+                             if s.duration > min_duration], uri=A.uri)
+        a, b = A >> timeline, B >> timeline
+        for segment in timeline:
+            Na = len(a.get_tracks(segment))
+            Nb = len(b.get_tracks(segment))
+            if Na == 0 or Nb == 0:
+                continue
+            N = len(a.get_labels(segment) & b.get_labels(segment))
+            key = (Na, Nb)
+            possible_match[key] = possible_match.get(key, 0.) + \
+                min(Na, Nb) * segment.duration
+            actual_match[key] = actual_match.get(key, 0.) + \
+                N * segment.duration
+            overlap[key] = overlap.get(key, 0.) + segment.duration
+    return possible_match, actual_match, overlap
+
+
+class test_algorithm_mpg_cooccurrence(object):
+
+    def setup(self):
+        self.pairs = [(_random_annotation('uri%d' % i, 'speaker', 2 * i),
+                       _random_annotation('uri%d' % i, 'head', 2 * i + 1))
+                      for i in range(3)]
+
+    def teardown(self):
+        pass
+
+    def _check(self, statistics, expected):
+        for histogram, counts in zip(
+            [statistics.possible_match, statistics.actual_match,
+             statistics.overlap], expected):
+            seen = {key: histogram[key]
+                    for key in zip(*np.nonzero(statistics.overlap))}
+            assert sorted(seen) == sorted(counts)
+            for key, value in counts.iteritems():
+                assert np.isclose(seen[key], value)
+
+    def test_statistics(self):
+        for min_duration in [0., 1.5]:
+            statistics = TrackCooccurrenceStatistics(
+                min_duration=min_duration)
+            for A, B in self.pairs:
+                statistics.update(A, B)
+            self._check(statistics,
+                        _statistics_loop(self.pairs,
+                                         min_duration=min_duration))
+
+    def test_merged_statistics(self):
+        single = TrackCooccurrenceStatistics()
+        merged = TrackCooccurrenceStatistics()
+        for A, B in self.pairs:
+            single.update(A, B)
+            merged = merged + TrackCooccurrenceStatistics().update(A, B)
+        for name in ['possible_match', 'actual_match', 'overlap']:
+            assert np.allclose(getattr(merged, name), getattr(single, name))
+        sequential = TrackCooccurrenceGraph().fit(self.pairs)
+        # annotations are iterated lazily (e.g. from a generator)
+        parallel = TrackCooccurrenceGraph().fit(iter(self.pairs), n_jobs=2)
+        assert sequential.overlap.equals(parallel.overlap)
+        assert np.allclose(sequential.P.values, parallel.P.values,
+                           equal_nan=True)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+from pyannote.algorithm.pig.pig import PersonInstanceGraph, PROBABILITY
+from pyannote.algorithm.pig.vertex import InstanceVertex, IdentityVertex
+from pyannote.base.matrix import LabelMatrix
+from pyannote.base.scores import Scores
+from pyannote import Segment, Annotation
+
+URI = 'uri'
+MODALITY = 'speaker'
+
+
+def _edges(pig):
+    """{(v, w): probability} with v, w in canonical order"""
+    return {tuple(sorted([v, w])): data[PROBABILITY]
+            for v, w, data in pig.edges_iter(data=True)}
+
+
+def _vertex(segment, track):
+    return InstanceVertex(segment=segment, track=track,
+                          modality=MODALITY, uri=URI)
+
+
+class test_algorithm_pig(object):
+
+    def setup(self):
+        self.annotation = Annotation(uri=URI, modality=MODALITY)
+        # touching segments
+        self.annotation[Segment(0, 2), 'a'] = 'A'
+        self.annotation[Segment(2, 3), 'b'] = 'B'
+        # nested segments
+        self.annotation[Segment(1, 10), 'c'] = 'C'
+        self.annotation[Segment(4, 5), 'd'] = 'A'
+        # several tracks on the same segment
+        self.annotation[Segment(4, 5), 'e'] = 'B'
+        # isolated segment
+        self.annotation[Segment(12, 13), 'f'] = 'C'
+
+    def teardown(self):
+        pass
+
+    def test_cooccurrence_edge(self):
+        # one track at a time (as add_annotation used to)
+        expected = {}
+        for segment, track in self.annotation.itertracks():
+            v = _vertex(segment, track)
+            for s, t in self.annotation.crop(segment,
+                                             mode='loose').itertracks():
+                w = _vertex(s, t)
+                if v != w:
+                    expected[tuple(sorted([v, w]))] = 0
+        pig = PersonInstanceGraph()
+        pig.add_annotation(self.annotation, cooccurrence_edge=True)
+        assert _edges(pig) == expected
+        assert set(pig.get_instance_vertices()) == set(
+            _vertex(s, t) for s, t in self.annotation.itertracks())
+
+    def test_identification_edge(self):
+        expected = {}
+        for segment, track, label in self.annotation.itertracks(label=True):
+            v = _vertex(segment, track)
+            expected[tuple(sorted([v, IdentityVertex(identity=label)]))] = 1
+        pig = PersonInstanceGraph()
+        pig.add_annotation(self.annotation, identification_edge=True)
+        assert _edges(pig) == expected
+
+    def test_add_scores(self):
+        tracks = list(self.annotation.itertracks())
+        labels = ['A', 'B', 'C']
+        data = np.random.rand(len(tracks), len(labels))
+        data[0, 1] = data[3, 0] = np.nan
+        scores = Scores.from_arrays(
+            [s for s, _ in tracks], [t for _, t in tracks], labels, data,
+            uri=URI, modality=MODALITY)
+        expected = {}
+        for segment, track, label, p in scores.itervalues():
+            v = _vertex(segment, track)
+            expected[tuple(sorted([v, IdentityVertex(identity=label)]))] = p
+        pig = PersonInstanceGraph()
+        pig.add_scores(scores)
+        assert len(expected) == data.size - 2
+        assert _edges(pig) == expected
+
+    def test_add_track_similarity_matrix(self):
+        tracks = list(self.annotation.itertracks())
+        data = np.random.rand(len(tracks), len(tracks))
+        data[0, 1] = data[1, 0] = data[2, 4] = data[4, 2] = np.nan
+        data = .5 * (data + data.T)
+        np.fill_diagonal(data, np.nan)
+        matrix = LabelMatrix(data=data, rows=tracks, columns=tracks)
+        expected = {}
+        for (s1, t1), (s2, t2), p in matrix.itervalues():
+            v, w = _vertex(s1, t1), _vertex(s2, t2)
+            expected[tuple(sorted([v, w]))] = p
+        pig = PersonInstanceGraph()
+        pig.add_track_similarity_matrix(matrix, URI, MODALITY)
+        assert _edges(pig) == expected
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2012-2013 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from pyannote import Segment, Timeline, Annotation
+from pyannote.algorithm.tagging import DirectTagger
+from pyannote.algorithm.tagging import ArgMaxDirectTagger
+from pyannote.algorithm.tagging import HungarianTagger
+
+
+class test_algorithm_tagging(object):
+
+    def setup(self):
+
+        self.source = Annotation(uri='uri', modality='speaker')
+        self.source[Segment(0.0, 1.0), 'A'] = 'a'
+        self.source[Segment(0.5, 3.0), 'A'] = 'b'
+        self.source[Segment(0.5, 3.0), 'B'] = 'c'
+        self.source[Segment(2.5, 6.0), 'A'] = 'a'
+
+        self.timeline = Timeline(uri='uri', segments=[
+            Segment(0.0, 0.5), Segment(0.0, 2.0), Segment(2.0, 5.0),
+            Segment(3.0, 4.0), Segment(7.0, 8.0)])
+
+    def teardown(self):
+        pass
+
+    def _crop(self, segment):
+        return self.source.crop(segment, mode='loose')
+
+    def test_direct_tagger(self):
+        tagged = DirectTagger()(self.source, self.timeline)
+        assert tagged.get_timeline() == Timeline(segments=[
+            Segment(0.0, 0.5), Segment(0.0, 2.0), Segment(2.0, 5.0),
+            Segment(3.0, 4.0)])
+        for segment in tagged.itersegments():
+            expected = sorted(label for _, _, label
+                              in self._crop(segment).itertracks(label=True))
+            assert sorted(tagged.get_labels(segment, unique=False)) == expected
+        # conflicting track names are renamed
+        assert len(tagged.get_tracks(Segment(0.0, 2.0))) == 3
+
+    def test_rshift(self):
+        tagged = self.source >> self.timeline
+        assert tagged.get_labels(Segment(2.0, 5.0)) == set(['a', 'b', 'c'])
+
+    def test_argmax_direct_tagger(self):
+        tagged = ArgMaxDirectTagger()(self.source, self.timeline)
+        assert tagged.get_labels(Segment(0.0, 0.5)) == set(['a'])
+        assert tagged.get_labels(Segment(0.0, 2.0)) == set(['b', 'c'])
+        labels = tagged.get_labels(Segment(2.0, 5.0), unique=False)
+        assert len(labels) == 2 and 'a' in labels
+        assert tagged.get_labels(Segment(3.0, 4.0)) == set(['a'])
+
+    def test_cross_file_batch(self):
+        # label 'x' appears in both files
+        target1 = Annotation(uri='uri1', modality='speaker')
+        target1[Segment(0, 10), '_'] = 'x'
+        target1[Segment(10, 12), '_'] = 'y'
+        target2 = Annotation(uri='uri2', modality='speaker')
+        target2[Segment(0, 4), '_'] = 'x'
+        target2[Segment(4, 9), '_'] = 'z'
+        source1 = Annotation(uri='uri1', modality='speaker')
+        source1[Segment(0, 10), '_'] = 'alice'
+        source2 = Annotation(uri='uri2', modality='speaker')
+        source2[Segment(0, 9), '_'] = 'alice'
+        pairs = [(source1, target1), (source2, target2)]
+        # 'z' is the best match of 'alice' in second file...
+        _, tagged2 = HungarianTagger().batch(pairs)
+        assert tagged2.get_labels(Segment(4, 9)) == set(['alice'])
+        assert tagged2.get_labels(Segment(0, 4)) == set(['x'])
+        # ... but 'x' is the best match of 'alice' over both files
+        tagged1, tagged2 = HungarianTagger().batch(pairs, cross_file=True)
+        assert tagged1.get_labels(Segment(0, 10)) == set(['alice'])
+        assert tagged2.get_labels(Segment(0, 4)) == set(['alice'])
+        assert tagged2.get_labels(Segment(4, 9)) == set(['z'])
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import networkx as nx
+from pyannote.algorithm.util import community
+from pyannote.algorithm.util.modularity import Modularity
+
+
+class test_algorithm_util(object):
+
+    def setup(self):
+        self.graph = nx.Graph()
+        self.graph.add_edges_from([(0, 1), (1, 2), (2, 3), (0, 0)])
+        self.partition = {0: 'a', 1: 'a', 2: 'b', 3: 'b'}
+
+    def teardown(self):
+        pass
+
+    def test_modularity_self_loop(self):
+        expected = community.modularity(self.partition, self.graph)
+        assert np.allclose(expected, 0.21875)
+        assert np.allclose(Modularity(self.graph)(self.partition), expected)
+
+    def test_modularity_weighted(self):
+        np.random.seed(1337)
+        graph = nx.gnm_random_graph(30, 80, seed=1337)
+        for u, v in graph.edges():
+            graph[u][v]['weight'] = np.random.rand()
+        graph.add_edge(3, 3, weight=2.)
+        modularity = Modularity(graph)
+        for _ in range(5):
+            partition = {n: np.random.randint(4) for n in graph}
+            assert np.allclose(modularity(partition),
+                               community.modularity(partition, graph))
+        partition = community.best_partition(graph)
+        assert np.allclose(modularity(partition),
+                           community.modularity(partition, graph))
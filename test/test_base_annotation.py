@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+from pyannote import Segment, Annotation
+from pyannote.base.annotation import Unknown
+
+
+class test_base_annotation(object):
+
+    def setup(self):
+        self.annotation = Annotation(uri='uri', modality='speaker')
+        self.annotation[Segment(0, 2), 'a'] = 'alice'
+        self.annotation[Segment(1, 3), 'b'] = 'alice'
+        self.annotation[Segment(3, 4), 'c'] = 'alice'
+        self.annotation[Segment(3, 4), 'd'] = 'bob'
+        self.annotation[Segment(5, 6), 'e'] = 'alice'
+
+    def teardown(self):
+        pass
+
+    def test_smooth(self):
+        smoothed = self.annotation.smooth()
+        assert smoothed.labels() == ['alice', 'bob']
+        assert list(smoothed.label_timeline('alice')) == \
+            [Segment(0, 4), Segment(5, 6)]
+        assert list(smoothed.label_timeline('bob')) == [Segment(3, 4)]
+        assert len(list(smoothed.itertracks())) == 3
+
+    def test_translate(self):
+        translated = self.annotation % {'bob': 'alice', 'alice': 'carol'}
+        assert translated.labels() == ['alice', 'carol']
+        assert translated[Segment(3, 4), 'c'] == 'carol'
+        assert translated[Segment(3, 4), 'd'] == 'alice'
+        assert list(translated.itertracks()) == \
+            list(self.annotation.itertracks())
+
+    def test_retrack(self):
+        retracked = self.annotation.retrack()
+        tracks = [t for _, t in retracked.itertracks()]
+        assert sorted(tracks) == range(5)
+
+    def test_anonymize_tracks(self):
+        anonymized = self.annotation.anonymize_tracks()
+        labels = anonymized.labels()
+        assert len(labels) == 5
+        assert all(isinstance(label, Unknown) for label in labels)
+
+    def test_subset(self):
+        subset = self.annotation.subset(set(['bob']))
+        assert list(subset.itertracks(label=True)) == \
+            [(Segment(3, 4), 'd', 'bob')]
+        subset = self.annotation.subset(set(['bob']), invert=True)
+        assert subset.labels() == ['alice']
+        assert len(subset.get_timeline()) == 4
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2012-2013 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+from pyannote import Segment, Scores
+from pyannote.base.annotation import Unknown
+
+
+class test_base_scores(object):
+
+    def setup(self):
+        self.s = Scores(uri='video', modality='speaker')
+        self.s[Segment(0, 1), 's1', 'A'] = 0.1
+        self.s[Segment(0, 1), 's1', 'B'] = 0.2
+        self.s[Segment(0, 1), 's1', 'C'] = 0.3
+        self.s[Segment(0, 1), 's2', 'A'] = 0.4
+        self.s[Segment(0, 1), 's2', 'B'] = 0.3
+        self.s[Segment(0, 1), 's2', 'C'] = 0.2
+        self.s[Segment(2, 3), 's1', 'A'] = 0.2
+        self.s[Segment(2, 3), 's1', 'C'] = 0.3
+
+    def teardown(self):
+        pass
+
+    def test_get(self):
+        assert self.s[Segment(0, 1), 's2', 'A'] == 0.4
+        assert np.isnan(self.s[Segment(2, 3), 's1', 'B'])
+
+    def test_from_arrays(self):
+        s = Scores.from_arrays(
+            [Segment(0, 1), Segment(0, 1), Segment(2, 3)], ['s1', 's2', 's1'],
+            ['A', 'B', 'C'], [[0.1, 0.2, 0.3],
+                              [0.4, 0.3, 0.2],
+                              [0.2, np.nan, 0.3]],
+            uri='video', modality='speaker')
+        assert list(s.itervalues()) == list(self.s.itervalues())
+
+    def test_itertracks(self):
+        assert list(self.s.itertracks()) == [
+            (Segment(0, 1), 's1'), (Segment(0, 1), 's2'),
+            (Segment(2, 3), 's1')]
+
+    def test_nbest(self):
+        nbest = self.s.nbest(2)
+        assert set(nbest.get_track_scores(Segment(0, 1), 's1')) == \
+            set(['A', 'B', 'C'])
+        assert np.isnan(nbest[Segment(0, 1), 's1', 'A'])
+        assert np.isnan(nbest[Segment(0, 1), 's2', 'C'])
+        assert nbest[Segment(2, 3), 's1', 'A'] == 0.2
+
+    def test_rank(self):
+        rank = self.s.rank(invert=True)
+        assert rank[Segment(0, 1), 's2', 'C'] == 0
+        assert rank[Segment(2, 3), 's1', 'C'] == 1
+        assert np.isnan(rank[Segment(2, 3), 's1', 'B'])
+
+    def test_to_annotation(self):
+        annotation = self.s.to_annotation(threshold=0.35)
+        assert isinstance(annotation[Segment(0, 1), 's1'], Unknown)
+        assert annotation[Segment(0, 1), 's2'] == 'A'
+
+    def test_delete(self):
+        del self.s[Segment(0, 1), 's1']
+        assert not self.s.has_track(Segment(0, 1), 's1')
+        assert self.s[Segment(0, 1), 's2', 'B'] == 0.3
+
+    def test_map(self):
+        log = self.s.map(np.log)
+        assert log[Segment(0, 1), 's2', 'A'] == np.log(0.4)
+        assert np.isnan(log[Segment(2, 3), 's1', 'B'])
+        from nose.tools import assert_raises
+        with assert_raises(ValueError):
+            self.s.map(lambda values: values[:, :2])
+
+    def test_to_df(self):
+        df = self.s.to_df()
+        assert df.shape == (3, 3)
+        assert df.at[(Segment(0, 1), 's2'), 'A'] == 0.4
+
+    def test_align(self):
+        tracks = [(Segment(2, 3), 's1'), (Segment(4, 5), 's1'),
+                  (Segment(0, 1), 's2')]
+        found, data = self.s.align(tracks, labels=['C', 'A', 'Z'])
+        assert list(found) == [True, False, True]
+        assert data.shape == (2, 3)
+        assert data[0, 0] == 0.3 and data[1, 1] == 0.4
+        assert np.all(np.isnan(data[:, 2]))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import scipy.io.wavfile
+from pyannote.base.segment import SlidingWindow
+from pyannote.base.feature import SlidingWindowFeature
+from pyannote.feature.cache import FeatureCache
+
+
+class FrameEnergy(object):
+    """Toy feature extractor counting calls to `extract`"""
+
+    calls = 0
+
+    def __init__(self, step=100):
+        super(FrameEnergy, self).__init__()
+        self.step = step
+
+    def extract(self, wav):
+        FrameEnergy.calls += 1
+        sample_rate, audio = scipy.io.wavfile.read(wav)
+        n = len(audio) // self.step
+        frames = audio[:n * self.step].reshape((n, self.step))
+        data = np.sum(frames.astype(np.float64) ** 2, axis=1).reshape((-1, 1))
+        step = 1. * self.step / sample_rate
+        return SlidingWindowFeature(data, SlidingWindow(duration=step,
+                                                        step=step))
+
+
+class test_feature_cache(object):
+
+    def setup(self):
+        self.tmp = tempfile.mkdtemp()
+        np.random.seed(1337)
+        audio = np.random.randint(-1000, 1000, size=16000).astype(np.int16)
+        self.wav = os.path.join(self.tmp, 'a.wav')
+        scipy.io.wavfile.write(self.wav, 16000, audio)
+        # same content, other path
+        self.copy = os.path.join(self.tmp, 'b.wav')
+        shutil.copy(self.wav, self.copy)
+        self.directory = os.path.join(self.tmp, 'cache')
+        FrameEnergy.calls = 0
+
+    def teardown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_extract(self):
+        extractor = FrameEnergy()
+        features = FeatureCache(directory=self.directory).extract(
+            extractor, self.wav)
+        # new cache instance (e.g. another process), other path
+        cached = FeatureCache(directory=self.directory).extract(
+            extractor, self.copy)
+        assert FrameEnergy.calls == 1
+        assert isinstance(cached.data, np.memmap)
+        assert np.array_equal(cached.data, features.data)
+        assert cached.sliding_window.step == features.sliding_window.step
+        # other parameters, other features
+        FeatureCache(directory=self.directory).extract(
+            FrameEnergy(step=200), self.wav)
+        assert FrameEnergy.calls == 2
+
+    def test_evict(self):
+        cache = FeatureCache(directory=self.directory)
+        cache.extract(FrameEnergy(step=100), self.wav)
+        size = cache.size()
+        cache.extract(FrameEnergy(step=200), self.wav)
+        # mark first one as recently used
+        cache.extract(FrameEnergy(step=100), self.wav)
+        cache.evict(size)
+        assert cache.size() == size
+        cache.extract(FrameEnergy(step=100), self.wav)
+        assert FrameEnergy.calls == 2
+
+    def test_extract_many(self):
+        cache = FeatureCache(directory=self.directory)
+        cache.extract(FrameEnergy(), self.wav)
+        missing = os.path.join(self.tmp, 'missing.wav')
+        results = cache.extract_many(
+            FrameEnergy(step=200), [self.wav, self.copy, missing], n_jobs=2)
+        status = {wav: status for wav, status, _ in results}
+        assert status[missing] == 'failed'
+        assert sorted([status[self.wav], status[self.copy]]) in \
+            (['cached', 'extracted'], ['extracted', 'extracted'])
+        results = cache.extract_many(FrameEnergy(), [self.wav, self.copy])
+        assert [status for _, status, _ in results] == ['cached', 'cached']
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import numpy as np
+import scipy.stats
+from pyannote.feature.warping import _warp, _iterwarp
+
+
+class test_feature_warping(object):
+
+    def setup(self):
+        np.random.seed(1337)
+        self.x = np.random.randn(100, 3)
+        # tied values
+        self.x[40:60, 1] = 0.
+
+    def teardown(self):
+        pass
+
+    def test_warp(self):
+        w = 10
+        y = _warp(self.x, w)
+        # one argsort per frame
+        table = scipy.stats.norm.ppf((np.arange(w) + 0.5) / w)
+        for t in range(w / 2, len(self.x) - w / 2):
+            a = np.argsort(np.argsort(self.x[t-w/2+1:t+w/2+1], 0), 0)
+            assert np.array_equal(y[t], table[a[w/2-1]])
+
+    def test_iterwarp(self):
+        for w in [0, 7, 10, 200]:
+            chunks = np.array_split(self.x, [3, 4, 25, 60])
+            y = np.vstack([y for _, y in _iterwarp(chunks, w)])
+            assert np.array_equal(y, _warp(self.x, w))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import scipy.io.wavfile
+from nose import SkipTest
+from pyannote.feature.yaafe import _pop_aligned, YaafeMFCC
+
+
+class test_feature_yaafe(object):
+
+    def setup(self):
+        self.tmp = tempfile.mkdtemp()
+        np.random.seed(1337)
+        audio = np.random.randint(-1000, 1000, size=48000).astype(np.int16)
+        self.wav = os.path.join(self.tmp, 'a.wav')
+        scipy.io.wavfile.write(self.wav, 16000, audio)
+
+    def teardown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_pop_aligned(self):
+        stack = ['mfcc', 'mfcc_d']
+        mfcc = np.random.randn(7, 3)
+        mfcc_d = np.random.randn(7, 2)
+        # derivatives lag behind coefficients
+        steps = [(0, 3, 0, 0), (3, 5, 0, 2), (5, 5, 2, 3), (5, 7, 3, 7)]
+        pending = {name: [] for name in stack}
+        chunks = []
+        for i, I, j, J in steps:
+            outputs = {'mfcc': mfcc[i:I], 'mfcc_d': mfcc_d[j:J]}
+            data = _pop_aligned(outputs, stack, pending)
+            if data is None:
+                # nothing is ready until both outputs are available
+                assert j == J == 0
+            else:
+                chunks.append(data)
+        assert len(chunks) == 3
+        np.testing.assert_array_equal(np.vstack(chunks),
+                                      np.hstack([mfcc, mfcc_d]))
+        assert pending == {'mfcc': [], 'mfcc_d': []}
+
+    def test_pop_aligned_missing_output(self):
+        stack = ['mfcc', 'mfcc_d']
+        pending = {name: [] for name in stack}
+        data = _pop_aligned({'mfcc': np.ones((2, 3))}, stack, pending)
+        assert data is None
+        assert len(pending['mfcc']) == 1
+        data = _pop_aligned({'mfcc_d': np.ones((1, 2))}, stack, pending)
+        assert data.shape == (1, 5)
+        assert np.vstack(pending['mfcc']).shape == (1, 3)
+
+    def test_chunk_duration(self):
+        try:
+            import yaafelib
+        except ImportError:
+            raise SkipTest('yaafelib is not available.')
+        extractor = YaafeMFCC(e=True, coefs=11, De=True, D=True,
+                              DDe=True, DD=True)
+        expected = extractor.extract(self.wav)
+        for chunk_duration in [0.1, 0.7, 1., 10.]:
+            features = extractor.extract(self.wav,
+                                         chunk_duration=chunk_duration)
+            for attribute in ['start', 'duration', 'step']:
+                assert (getattr(features.sliding_window, attribute) ==
+                        getattr(expected.sliding_window, attribute))
+            np.testing.assert_array_almost_equal(features.data,
+                                                 expected.data)
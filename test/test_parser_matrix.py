@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+from nose.tools import assert_raises
+from pyannote.base.matrix import LabelMatrix
+from pyannote.parser.matrix import LabelMatrixParser
+
+
+class test_parser_matrix(object):
+
+    def setup(self):
+        self.tmp = tempfile.mkdtemp()
+        self.matrix = LabelMatrix(data=[[1., 2.]], rows=['a'],
+                                  columns=['b', 'c'])
+
+    def teardown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_pab(self):
+        path = os.path.join(self.tmp, 'matrix.pab')
+        LabelMatrixParser().write(self.matrix, path, uri='uri')
+        matrix = LabelMatrixParser().read(path, uri='uri')
+        assert matrix.df.equals(self.matrix.df)
+
+    def test_pickle(self):
+        path = os.path.join(self.tmp, 'matrix.pkl')
+        LabelMatrixParser().write(self.matrix, path)
+        matrix = LabelMatrixParser().read(path)
+        assert matrix.df.equals(self.matrix.df)
+
+    def test_write_specific(self):
+        for extension in ['.mat', '.tvt']:
+            path = os.path.join(self.tmp, 'matrix' + extension)
+            with assert_raises(NotImplementedError):
+                LabelMatrixParser().write(self.matrix, path)
+            assert not os.path.exists(path)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import numpy as np
+from pyannote import Segment, Timeline, Annotation
+from pyannote.base.annotation import Unknown
+from pyannote.base.scores import Scores
+from pyannote.base.matrix import LabelMatrix
+from pyannote.parser.pab import PABParser
+
+
+class test_parser_pab(object):
+
+    def setup(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'test.pab')
+
+        self.annotation = Annotation(uri='uri', modality='speaker')
+        self.annotation[Segment(0, 2), 'a'] = 'alice'
+        self.annotation[Segment(0, 2), 1] = 'bob'
+        self.annotation[Segment(3, 4), 'c'] = Unknown()
+
+        self.timeline = Timeline([Segment(0, 1), Segment(2, 3)], uri='other')
+
+        self.scores = Scores.from_arrays(
+            [Segment(2, 3), Segment(0, 1)], ['s1', 's2'], ['A', 'B'],
+            [[0.1, np.nan], [0.3, 0.4]], uri='uri', modality='score')
+
+    def teardown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_annotation(self):
+        PABParser().write([self.annotation, self.timeline], self.path)
+        parser = PABParser().read(self.path)
+        assert parser.uris == ['other', 'uri']
+        annotation = parser(uri='uri')
+        assert annotation.uri == 'uri' and annotation.modality == 'speaker'
+        assert list(annotation.itertracks()) == \
+            list(self.annotation.itertracks())
+        assert annotation[Segment(0, 2), 1] == 'bob'
+        assert isinstance(annotation[Segment(3, 4), 'c'], Unknown)
+        assert list(parser(uri='other')) == list(self.timeline)
+
+    def test_append(self):
+        parser = PABParser()
+        parser.write(self.annotation, self.path)
+        parser.write(self.scores, self.path, append=True)
+        matrix = LabelMatrix(data=[[1., 2.]], rows=['a'], columns=['b', 3])
+        parser.write(matrix, self.path, uri='matrix', append=True)
+        parser = PABParser().read(self.path)
+        assert parser.modalities == [None, 'score', 'speaker']
+        scores = parser(uri='uri', modality='score')
+        assert scores.to_df().equals(self.scores.to_df())
+        assert parser(uri='matrix').df.equals(matrix.df)
+
+    def test_matrix(self):
+        data = np.array([[0., np.nan, 2.],
+                         [3., 4., np.nan],
+                         [np.nan, 7., 8.]])
+        matrix = LabelMatrix(data=data, rows=['a', 'b', 'c'],
+                             columns=['A', 'B', 'C'])
+        parser = PABParser()
+        parser.write(matrix, self.path, uri='dense', dtype=np.float32)
+        parser.write(matrix, self.path, uri='sparse', append=True,
+                     sparse=True)
+        parser = PABParser().read(self.path)
+        for uri in ['dense', 'sparse']:
+            sub = parser.get_matrix(uri=uri, rows=['c', 'a', 'd'],
+                                    columns=['C', 'B'])
+            assert sub.get_rows() == ['a', 'c']
+            assert sub.get_columns() == ['B', 'C']
+            assert np.allclose(sub.df.values, [[np.nan, 2.], [7., 8.]],
+                               equal_nan=True)
+        assert np.allclose(parser(uri='sparse').df.values, data,
+                           equal_nan=True)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import json
+import pyannote.profiling as profiling
+from pyannote import Segment, Timeline
+
+
+class test_profiling(object):
+
+    def setup(self):
+        self.timeline = Timeline([Segment(0, 2), Segment(3, 5)])
+        self.other = Timeline([Segment(1, 4)])
+        profiling.reset()
+
+    def teardown(self):
+        profiling.disable()
+        profiling.reset()
+
+    def test_disabled(self):
+        self.timeline.crop(self.other)
+        assert not profiling.is_enabled()
+        assert profiling.get_stats() == []
+
+    def test_enabled(self):
+        profiling.enable()
+        with profiling.uri('uri'):
+            cropped = self.timeline.crop(self.other)
+            # not exhausted
+            next(self.timeline.co_iter(self.other))
+        self.timeline.crop(self.other)
+        assert list(cropped) == [Segment(1, 2), Segment(3, 4)]
+        df = profiling.to_frame()
+        assert list(df.loc['uri', 'Timeline.co_iter'][['calls', 'items']]) \
+            == [2, 3]
+        assert list(df.loc['uri', 'Timeline.crop'][['calls', 'items']]) \
+            == [1, 2]
+        assert df.loc[None, 'Timeline.crop']['calls'] == 1
+        stats = json.loads(profiling.to_json())
+        assert set(stat['uri'] for stat in stats) == set([None, 'uri'])
+
+    def test_iteruris(self):
+        profiling.enable()
+        for uri in profiling.iteruris(['a', 'b']):
+            self.timeline.crop(self.other)
+            if uri == 'b':
+                self.timeline.crop(self.other)
+        self.timeline.crop(self.other)
+        df = profiling.to_frame()
+        assert df.loc['a', 'Timeline.crop']['calls'] == 1
+        assert df.loc['b', 'Timeline.crop']['calls'] == 2
+        assert df.loc[None, 'Timeline.crop']['calls'] == 1
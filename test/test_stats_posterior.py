@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2014 Herve BREDIN (bredin@limsi.fr)
+
+# This file is part of PyAnnote.
+#
+#     PyAnnote is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     PyAnnote is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with PyAnnote.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import numpy as np
+from pyannote.stats.posterior import posterior, log_posterior, \
+    unknown_posterior
+
+
+def _exp_posterior(llr, priors, unknown_prior):
+    """Posterior probabilities, as computed before (overflows)"""
+    denominator = unknown_prior + np.sum(priors * np.exp(llr), axis=1)
+    return ((priors * np.exp(llr)).T / denominator).T
+
+
+class test_stats_posterior(object):
+
+    def setup(self):
+        np.random.seed(1337)
+        self.priors = np.array([0.2, 0.3, 0.1])
+        self.unknown_prior = 0.4
+
+    def teardown(self):
+        pass
+
+    def test_moderate_llr(self):
+        llr = 5. * np.random.randn(20, 3)
+        expected = _exp_posterior(llr, self.priors, self.unknown_prior)
+        assert np.allclose(
+            posterior(llr, self.priors, unknown_prior=self.unknown_prior),
+            expected)
+        assert np.allclose(
+            np.exp(log_posterior(llr, self.priors,
+                                 unknown_prior=self.unknown_prior)),
+            expected)
+
+    def test_large_llr(self):
+        llr = 1e3 * np.random.randn(20, 3)
+        llr[0] = [1e3, 1e3, -1e3]
+        p = posterior(llr, self.priors, unknown_prior=self.unknown_prior)
+        assert np.all(np.isfinite(p))
+        assert np.all((p >= 0.) & (p <= 1.))
+        assert np.allclose(p[0], [0.4, 0.6, 0.])
+        # close-set posteriors sum to one
+        p = posterior(llr, self.priors)
+        assert np.allclose(np.sum(p, axis=1), 1.)
+
+    def test_in_place(self):
+        llr = np.random.randn(20, 3)
+        expected = posterior(llr, self.priors,
+                             unknown_prior=self.unknown_prior)
+        out = posterior(llr, self.priors, unknown_prior=self.unknown_prior,
+                        out=llr)
+        assert out is llr
+        assert np.allclose(llr, expected)
+
+    def test_unknown_posterior(self):
+        # (second row sums to more than 1)
+        posteriors = np.array([[0.2, 0.3, np.nan],
+                               [0.7, 0.5, 0.],
+                               [0., 0., 0.]])
+        unknown = unknown_posterior(posteriors)
+        assert np.allclose(unknown, [0.5, 0., 1.])
+        assert np.all((unknown >= 0.) & (unknown <= 1.))